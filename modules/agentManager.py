@@ -4,6 +4,13 @@ import logging
 import json
 pp = pprint.PrettyPrinter(indent=4)
 
+# Agents take their render color from this list in the order they are created
+agentColorList = [ "orange", "pink",
+    '#dc143c', '#0000ff', '#ff00ff', '#1e90ff', '#90ee90', '#ff1493', '#7b68ee', '#ee82ee', '#ffc0cb',
+    '#696969', "#7f0000", '#006400', '#808000', '#483d8b', '#008b8b', '#4682b4', '#000080', '#d2691e', '#9acd32',
+    '#8b008b', '#b03060', '#ff4500', '#ffa500', '#ffff00', '#deb887', '#40e0d0', '#00ff00', '#8a2be2', '#00ff7f',
+    ]
+
 class agentManager:
     """
         Class which manages the information pertaining to agent existence and activity
@@ -19,11 +26,7 @@ class agentManager:
         self.currentAgent = []
         logging.debug("Class 'agentManager' initialized.")
 
-        self.colorList = [ "orange", "pink",
-            '#dc143c', '#0000ff', '#ff00ff', '#1e90ff', '#90ee90', '#ff1493', '#7b68ee', '#ee82ee', '#ffc0cb',
-            '#696969', "#7f0000", '#006400', '#808000', '#483d8b', '#008b8b', '#4682b4', '#000080', '#d2691e', '#9acd32',
-            '#8b008b', '#b03060', '#ff4500', '#ffa500', '#ffff00', '#deb887', '#40e0d0', '#00ff00', '#8a2be2', '#00ff7f',
-            ]
+        self.colorList = agentColorList
 
     def createNewAgent(self, **kwargs):
         """
@@ -981,21 +981,29 @@ class mainCanvas(tk.Canvas):
             self.tag_bind(tileID, "<Enter>", partial(self.setInfoTileHoverText, tileNode))
             self.tag_bind(tileID, "<Button-1>", partial(self.agentSelectHandler, tileNode))
 
+    def getTileAgent(self, tileNode):
+        # The simulation graph keeps an agent occupancy index, while the editor graph stores agents in its node data
+        agentOccupancy = self.graphRef.graph.get("agentOccupancy", None)
+        if agentOccupancy is not None:
+            return agentOccupancy.getAgentAtNode(tileNode)
+        return self.graphRef.nodes[tileNode].get("agent", None)
+
     def setInfoTileHoverText(self, tileNode, event):
         nodeData = self.graphRef.nodes[tileNode]
         hoverString = f"{str(tileNode)}: {nodeData['type'].capitalize()}"
-        if "agent" in nodeData:
-            hoverString = hoverString + f", Agent Name: {nodeData['agent'].ID}"
+        tileAgent = self.getTileAgent(tileNode)
+        if tileAgent is not None:
+            hoverString = hoverString + f", Agent Name: {tileAgent.ID}"
         self.hoverText.set(hoverString)
 
     def agentSelectHandler(self, tileNode, event=None):
-        nodeData = self.graphRef.nodes[tileNode]
-        if "agent" in nodeData:
-            agentName = nodeData["agent"].ID
-            agentNumID = nodeData["agent"].numID
-            nodeData["agent"].highlightAgent(multi=False)
-            if nodeData["agent"].currentTask:
-                nodeData["agent"].currentTask.highlightTask(multi=False)
+        tileAgent = self.getTileAgent(tileNode)
+        if tileAgent is not None:
+            agentName = tileAgent.ID
+            agentNumID = tileAgent.numID
+            tileAgent.highlightAgent(multi=False)
+            if tileAgent.currentTask:
+                tileAgent.currentTask.highlightTask(multi=False)
             else:
                 self.requestRender("highlight", "delete", {"highlightType": "pickupHighlight"})
                 self.requestRender("highlight", "delete", {"highlightType": "depositHighlight"})
@@ -5,6 +5,8 @@ import networkx as nx
 from tsmpy import TSM
 import matplotlib.pyplot as plt
 import logging
+from simmodules.simulationMapData import simMapIndex
+from pathfindManagerScripts.distanceTable import distanceTable, UNREACHABLE
 import pprint
 pp = pprint.PrettyPrinter(indent=4)
 
@@ -234,6 +236,19 @@ class mapDataClass:
         # Return a dict of the lists
         return dictOfTypesLists
 
+    def generateAllTaskShortestPathLengths(self, pickupNodeList, depositNodeList):
+        # Length of the shortest path between every pickup and deposit node
+        # Distances come from the cached distance table for this map, so only new maps need searching
+        # Lengths are inclusive of both ends, matching len() of the paths from generateAllTaskShortestPaths
+        pickupDistances = distanceTable(simMapIndex(self.mapGraph), pickupNodeList)
+        pathLengths = []
+        for pickupNode in pickupNodeList:
+            for depositNode in depositNodeList:
+                distance = pickupDistances[pickupNode][depositNode]
+                if distance != UNREACHABLE:
+                    pathLengths.append(distance + 1)
+        return pathLengths
+
     def generateAllTaskShortestPaths(self, pickupNodeList, depositNodeList):
         # start = timer()
         pathsDict = {}
@@ -1,10 +1,10 @@
-import networkx as nx
+import logging
 import numpy as np
 import pprint
 pp = pprint.PrettyPrinter(indent=4)
 import sys
-from copy import deepcopy
 from itertools import count
+from pathfindManagerScripts.reservationTable import reservationTable
 
 class CAstarReserver:
     """
@@ -15,11 +15,6 @@ class CAstarReserver:
         self.mapGraphRef = mapGraph
     
     def build(self):
-        self.graphStructure = nx.Graph()
-        # Add nodes, remove data
-        self.graphStructure.add_nodes_from(self.mapGraphRef.nodes(data=False))
-        self.graphStructure.add_edges_from(self.mapGraphRef.edges(data=False))
-
         # Start the current offset at time t=0
         self.currentDepth = 0
 
@@ -29,39 +24,37 @@ class CAstarReserver:
     def updateSimulationDepth(self, currentDepth):
         # The current simulation step is stored as an offset for any future calls
         self.currentDepth = currentDepth
+        # Nothing can be planned into the past, so its reservations are no longer needed
+        self.purgePastData()
 
     def purgePastData(self):
-        pass
+        # Drop reservations for time steps before the current one, capping the table at the planning horizon
+        self.reservationTable.purgePastData(self.currentDepth)
+
+    def getSearchHorizon(self, startTime=0):
+        return self.reservationTable.getSearchHorizon(self.currentDepth, startTime)
 
     def evaluateNodeEligibility(self, timeDepth, targetNode, sourceNode, agentID):
-        # Verifies if the node is open at a specific time
+        # Node name form of 'evaluateMoveEligibility', for the movers and taskers
+        nodeIndex = self.reservationTable.nodeIndex
+        return self.evaluateMoveEligibility(timeDepth, nodeIndex[targetNode], nodeIndex[sourceNode], agentID)
+
+    def evaluateMoveEligibility(self, timeDepth, targetID, sourceID, agentID):
+        # Verifies if the move from sourceID to targetID is open at a specific time, taking node IDs as the searches do
         # Expands the reservation table if the request depth exceeds the table's depth
         if timeDepth + self.currentDepth >= self.timeTracked:
             self.expandReservationTable(timeDepth + self.currentDepth)
-        
+
         # If the agent is considering a "wait" move, where it does not move
-        # print(targetNode)
-        # print(sourceNode)
-        if targetNode == sourceNode:
+        if targetID == sourceID:
             # Have to check all edges leading to this node, and the future node
-            edgeReserved = False
-            for node in self.reservationTable[timeDepth+self.currentDepth][sourceNode]:
-                edgeReserved = edgeReserved or self.getEdgeState(timeDepth+self.currentDepth, sourceNode, node, agentID)
-            nodeReserved = self.getNodeState(timeDepth+self.currentDepth+1, sourceNode, agentID)
+            edgeReserved = self.reservationTable.isWaitBlockedByID(timeDepth+self.currentDepth, sourceID, agentID)
         else:
-            edgeReserved = self.getEdgeState(timeDepth + self.currentDepth, sourceNode, targetNode, agentID)
-            nodeReserved = self.getNodeState(timeDepth + self.currentDepth + 1, targetNode, agentID)
-        if not nodeReserved and not edgeReserved:
-            print(f"{targetNode} in {timeDepth} from now ({timeDepth+self.currentDepth}) is accessible.")
-            # Node is occupied and ineligible for use in pathfinding
-            return True
-        elif nodeReserved:
-            print(f"<<<{targetNode} in {timeDepth} from now ({timeDepth+self.currentDepth}) is NODE BLOCKED.")
-            return False
-        elif edgeReserved:
-            print(f"<<<{targetNode} in {timeDepth} from now ({timeDepth+self.currentDepth}) is EDGE BLOCKED")
-            return False
-        
+            edgeReserved = self.reservationTable.isEdgeBlockedByID(timeDepth+self.currentDepth, sourceID, targetID, agentID)
+        # Nodes reserved by the agent itself are not blocking
+        nodeReserved = self.reservationTable.isNodeBlockedByID(timeDepth+self.currentDepth+1, targetID, agentID)
+        return not nodeReserved and not edgeReserved
+
     def evaluateNodeOverwritability(self, timeDepth, targetNode, sourceNode, agentID, agentPriority):
         # print(f"Checking if its possible to overwrite {targetNode}...")
         # Verifies if the node is overwritable at a specific time
@@ -69,20 +62,20 @@ class CAstarReserver:
         if timeDepth + self.currentDepth >= self.timeTracked:
             self.expandReservationTable(timeDepth + self.currentDepth)
 
-        edgeReserver = self.getEdgeReserver(timeDepth + self.currentDepth, sourceNode, targetNode)
-        if edgeReserver is False:
+        edgeReserver = self.reservationTable.getEdgeReserver(timeDepth + self.currentDepth, sourceNode, targetNode)
+        if edgeReserver == self.reservationTable.unreserved:
             # Its not even reserved
             edgeOverwritable = True
         else:
             # It is reserved, so compare priorities
-            edgeOverwritable = (agentPriority.index(eval(edgeReserver)) >= agentPriority.index(agentID))
+            edgeOverwritable = (agentPriority.index(edgeReserver) >= agentPriority.index(agentID))
 
-        nodeReserver = self.getNodeReserver(timeDepth+self.currentDepth+1, targetNode)
-        if nodeReserver is False:
+        nodeReserver = self.reservationTable.getNodeReserver(timeDepth+self.currentDepth+1, targetNode)
+        if nodeReserver == self.reservationTable.unreserved:
             # Its not even reserved
             nodeOverwritable = True
         else:
-            nodeOverwritable = (agentPriority.index(eval(nodeReserver)) >= agentPriority.index(agentID))
+            nodeOverwritable = (agentPriority.index(nodeReserver) >= agentPriority.index(agentID))
         
         # print(f"Agent priority: {agentPriority}, for {agentID} vs. {edgeReserver}/{nodeReserver}")
         # print(f"Priority Positions: {agentPriority.index(agentID)} vs. {agentPriority.index(edgeReserver)}{agentPriority.index(nodeReserver)}")
@@ -115,99 +108,61 @@ class CAstarReserver:
             # Release the node at the next time step
             self.releaseNode(depth+self.currentDepth+1, node, agentID)
             # print(f"Released {node}")
-            # pp.pprint(self.reservationTable[depth+self.currentDepth+1].nodes(data=True))
         # self.showReservationsByAgent(agentID)
 
     def createReservationTable(self):
-        # Build the table for the depth
-        self.reservationTable = {
-            0: deepcopy(self.graphStructure),
-        }
-
-        # Preallocate nodes as being unreserved
-        self.preallocNodes(0)
-        self.preallocEdges(0)
+        # Build the table, which holds every time step in one pair of arrays
+        self.reservationTable = reservationTable(self.mapGraphRef.graph["mapIndex"])
 
-        # Instantiate a counter that tracks the forward progression of time = depth of dict
+        # Instantiate a counter that tracks the forward progression of time = depth of the table
         self.depthCounter = count()
         self.timeTracked = next(self.depthCounter)
 
     def reserveNode(self, timeStep, node, agentID):
-        self.reservationTable[timeStep].nodes[node]["Reserved"] = str(agentID)
+        self.reservationTable.reserveNode(timeStep, node, agentID)
 
     def reserveEdge(self, timeStep, sourceNode, targetNode, agentID):
-        # If the agent's plan is to wait, then all neighboring edges need to be reserved
-        if sourceNode == targetNode:
-            # for neighbor in self.reservationTable[timeStep][sourceNode]:
-            #     self.reservationTable[timeStep][sourceNode][neighbor]["Reserved"] = str(agentID)
-            pass
-        else:
-            self.reservationTable[timeStep][sourceNode][targetNode]["Reserved"] = str(agentID)
+        # If the agent's plan is to wait, there is no edge to reserve
+        self.reservationTable.reserveEdge(timeStep, sourceNode, targetNode, agentID)
 
     def releaseNode(self, timeStep, node, agentID):
         # print(f"\tRelease node: {node} @ {timeStep}")
-        # print(f"\t{self.reservationTable[timeStep].nodes[node]['Reserved']}")
-        if self.reservationTable[timeStep].nodes[node]["Reserved"] == str(agentID):
-            # print(f"\t node released")
-            self.reservationTable[timeStep].nodes[node]["Reserved"] = False
+        self.reservationTable.releaseNode(timeStep, node, agentID)
 
     def releaseEdge(self, timeStep, sourceNode, targetNode, agentID):
         # print(f"\tRelease edge: {sourceNode}->{targetNode} @ {timeStep}")
-        if sourceNode == targetNode:
-            # print(f"\t same tile, no edge release needed")
-            pass
-        else:
-            # print(f"\t{self.reservationTable[timeStep][sourceNode][targetNode]['Reserved']}")
-            if self.reservationTable[timeStep][sourceNode][targetNode]["Reserved"] == str(agentID):
-                # print(f"\t edge released")
-                self.reservationTable[timeStep][sourceNode][targetNode]["Reserved"] = False
+        self.reservationTable.releaseEdge(timeStep, sourceNode, targetNode, agentID)
 
     def getNodeState(self, timeStep, node, agentID):
-        reserver = self.reservationTable[timeStep].nodes[node]["Reserved"]
-        # print(f"Node: {self.reservationTable[timeStep].nodes[node]['Reserved']}; {bool(self.reservationTable[timeStep].nodes[node]['Reserved'])}")
-        if reserver == str(agentID):
-            print("Node reserved by self.")
+        reserver = self.reservationTable.getNodeReserver(timeStep, node)
+        if reserver == agentID:
+            logging.debug("Node reserved by self.")
             return False
-        elif reserver == False:
+        elif reserver == self.reservationTable.unreserved:
             return False
         else:
-            print(f"Node reserved by another: {reserver}")
+            logging.debug(f"Node reserved by another: {reserver}")
             return True
         
     def getNodeReserver(self, timeStep, node):
-        reserver = self.reservationTable[timeStep].nodes[node]["Reserved"]
-        # print(f"\t{reserver}")
-        # print(self.reservationTable[timeStep].nodes(data=True))
-        return reserver
+        # Reservers are reported by their ID string, or False if there is none
+        reserver = self.reservationTable.getNodeReserver(timeStep, node)
+        if reserver == self.reservationTable.unreserved:
+            return False
+        return str(reserver)
 
     def getEdgeState(self, timeStep, sourceNode, targetNode, agentID):
-        reserver = self.reservationTable[timeStep][sourceNode][targetNode]["Reserved"]
-        # print(f"Edge: {self.reservationTable[timeStep][sourceNode][targetNode]['Reserved']}; {bool(self.reservationTable[timeStep][sourceNode][targetNode]['Reserved'])}")
-        if reserver == str(agentID):
-            # print("Edge reserved by self.")
-            return False
-        elif reserver == False:
-            return False
-        else:
-            # print("Edge reserved by another.")
-            return True
+        # Edges reserved by the agent itself are not blocking
+        return self.reservationTable.isEdgeBlocked(timeStep, sourceNode, targetNode, agentID)
         
     def getEdgeReserver(self, timeStep, sourceNode, targetNode):
-        if sourceNode == targetNode:
-            # There is no edge between timesteps
+        # There is no edge between timesteps if sourceNode == targetNode, which reads as unreserved
+        reserver = self.reservationTable.getEdgeReserver(timeStep, sourceNode, targetNode)
+        if reserver == self.reservationTable.unreserved:
             return False
-        else:
-            reserver = self.reservationTable[timeStep][sourceNode][targetNode]["Reserved"]
-        return reserver
+        return str(reserver)
 
     def expandReservationTable(self, timeDepth):
-        self.reservationTable[timeDepth+1] = deepcopy(self.graphStructure)
-        self.preallocNodes(timeDepth+1)
-        self.preallocEdges(timeDepth+1)
+        # New time steps start out unreserved
+        self.reservationTable.ensureTimeStep(timeDepth+1)
         self.timeTracked = next(self.depthCounter)
-
-    def preallocNodes(self, timeDepth):
-        nx.set_node_attributes(self.reservationTable[timeDepth], False, "Reserved")
-
-    def preallocEdges(self, timeDepth):
-        nx.set_edge_attributes(self.reservationTable[timeDepth], False, "Reserved")
@@ -3,11 +3,12 @@ import numpy as np
 import pprint
 pp = pprint.PrettyPrinter(indent=4)
 import sys
-from copy import deepcopy
 from itertools import count
-from numpy import inf
-from numpy import sqrt
-from heapq import heappop, heappush
+from pathfindManagerScripts.reservationTable import reservationTable
+from pathfindManagerScripts.distanceTable import distanceTable, mapEndpoints, UNREACHABLE
+from collections import OrderedDict
+from pathfindManagerScripts.RRAstarSearch import RRAstarSearch
+from pathfindScripts.heuristics import getMapHeuristics
 
 class HCAstarReserver:
     """
@@ -16,16 +17,23 @@ class HCAstarReserver:
     def __init__(self, mapGraph):
         # Store the base graph
         self.mapGraphRef = mapGraph
-        self.RRAdata = {}
+        # RRA* searches by goal node, oldest used first
+        self.RRAdata = OrderedDict()
+        # Number of goals whose searches are kept
+        self.RRAmaxGoals = 256
+        # Whether a goal's search is run over the whole map as soon as the goal is first requested
+        self.RRAbatchMode = False
         self.heuristicFunc = None
         self.heuristicCoefficient = None
+        # True distances to every endpoint of the map, loaded from the on-disk cache in place of running RRA*
+        self.useDistanceCache = False
+        self.endpointDistances = None
+        # Where the table is cached, or None for the user's cache directory
+        self.distanceCacheDirectory = None
+        # Distances to each target so far, as lists indexed by node ID
+        self.cachedDistances = {}
     
     def build(self):
-        self.graphStructure = nx.Graph()
-        # Add nodes, remove data
-        self.graphStructure.add_nodes_from(self.mapGraphRef.nodes(data=False))
-        self.graphStructure.add_edges_from(self.mapGraphRef.edges(data=False))
-
         # Start the current offset at time t=0
         self.currentDepth = 0
 
@@ -35,42 +43,37 @@ class HCAstarReserver:
     def updateSimulationDepth(self, currentDepth):
         # The current simulation step is stored as an offset for any future calls
         self.currentDepth = currentDepth
+        # Nothing can be planned into the past, so its reservations are no longer needed
+        self.purgePastData()
 
     def purgePastData(self):
-        pass
+        # Drop reservations for time steps before the current one, capping the table at the planning horizon
+        self.reservationTable.purgePastData(self.currentDepth)
+
+    def getSearchHorizon(self, startTime=0):
+        return self.reservationTable.getSearchHorizon(self.currentDepth, startTime)
 
     def evaluateNodeEligibility(self, timeDepth, targetNode, sourceNode, agentID):
-        # Verifies if the node is open at a specific time
+        # Node name form of 'evaluateMoveEligibility', for the movers and taskers
+        nodeIndex = self.reservationTable.nodeIndex
+        return self.evaluateMoveEligibility(timeDepth, nodeIndex[targetNode], nodeIndex[sourceNode], agentID)
+
+    def evaluateMoveEligibility(self, timeDepth, targetID, sourceID, agentID):
+        # Verifies if the move from sourceID to targetID is open at a specific time, taking node IDs as the searches do
         # Expands the reservation table if the request depth exceeds the table's depth
         if timeDepth + self.currentDepth >= self.timeTracked:
             self.expandReservationTable(timeDepth + self.currentDepth)
-        
+
         # If the agent is considering a "wait" move, where it does not move
-        # print(targetNode)
-        # print(sourceNode)
-        if targetNode == sourceNode:
+        if targetID == sourceID:
             # Have to check all edges leading to this node, and the future node
-            edgeReserved = False
-            for node in self.reservationTable[timeDepth+self.currentDepth][sourceNode]:
-                edgeReserved = edgeReserved or self.getEdgeState(timeDepth+self.currentDepth, sourceNode, node, agentID)
-            nodeReserved = self.getNodeState(timeDepth+self.currentDepth+1, sourceNode, agentID)
+            edgeReserved = self.reservationTable.isWaitBlockedByID(timeDepth+self.currentDepth, sourceID, agentID)
         else:
-            edgeReserved = self.getEdgeState(timeDepth + self.currentDepth, sourceNode, targetNode, agentID)
-            nodeReserved = self.getNodeState(timeDepth + self.currentDepth + 1, targetNode, agentID)
-        if not nodeReserved and not edgeReserved:
-            # print(f"<<<{agentID}:{targetNode} in {timeDepth} from now ({timeDepth+self.currentDepth}) is accessible.")
-            # Node is occupied and ineligible for use in pathfinding
-            return True
-        elif nodeReserved and edgeReserved:
-            # print(f"<<<{agentID}:{targetNode} in {timeDepth} from now ({timeDepth+self.currentDepth}) is NODE AND EDGE BLOCKED")
-            return False
-        elif nodeReserved:
-            # print(f"<<<{agentID}:{targetNode} in {timeDepth} from now ({timeDepth+self.currentDepth}) is NODE BLOCKED.")
-            return False
-        elif edgeReserved:
-            # print(f"<<<{agentID}:{targetNode} in {timeDepth} from now ({timeDepth+self.currentDepth}) is EDGE BLOCKED")
-            return False
-        
+            edgeReserved = self.reservationTable.isEdgeBlockedByID(timeDepth+self.currentDepth, sourceID, targetID, agentID)
+        # Nodes reserved by the agent itself are not blocking
+        nodeReserved = self.reservationTable.isNodeBlockedByID(timeDepth+self.currentDepth+1, targetID, agentID)
+        return not nodeReserved and not edgeReserved
+
     def evaluateNodeOverwritability(self, timeDepth, targetNode, sourceNode, agentID, agentPriority):
         # print(f"Checking if its possible to overwrite {targetNode}...")
         # Verifies if the node is overwritable at a specific time
@@ -78,20 +81,20 @@ class HCAstarReserver:
         if timeDepth + self.currentDepth >= self.timeTracked:
             self.expandReservationTable(timeDepth + self.currentDepth)
 
-        edgeReserver = self.getEdgeReserver(timeDepth + self.currentDepth, sourceNode, targetNode)
-        if edgeReserver is False:
+        edgeReserver = self.reservationTable.getEdgeReserver(timeDepth + self.currentDepth, sourceNode, targetNode)
+        if edgeReserver == self.reservationTable.unreserved:
             # Its not even reserved
             edgeOverwritable = True
         else:
             # It is reserved, so compare priorities
-            edgeOverwritable = (agentPriority.index(eval(edgeReserver)) >= agentPriority.index(agentID))
+            edgeOverwritable = (agentPriority.index(edgeReserver) >= agentPriority.index(agentID))
 
-        nodeReserver = self.getNodeReserver(timeDepth+self.currentDepth+1, targetNode)
-        if nodeReserver is False:
+        nodeReserver = self.reservationTable.getNodeReserver(timeDepth+self.currentDepth+1, targetNode)
+        if nodeReserver == self.reservationTable.unreserved:
             # Its not even reserved
             nodeOverwritable = True
         else:
-            nodeOverwritable = (agentPriority.index(eval(nodeReserver)) >= agentPriority.index(agentID))
+            nodeOverwritable = (agentPriority.index(nodeReserver) >= agentPriority.index(agentID))
         
         # print(f"Agent priority: {agentPriority}, for {agentID} vs. {edgeReserver}/{nodeReserver}")
         # print(f"Priority Positions: {agentPriority.index(agentID)} vs. {agentPriority.index(edgeReserver)}{agentPriority.index(nodeReserver)}")
@@ -125,151 +128,89 @@ class HCAstarReserver:
             # Release the node at the next time step
             self.releaseNode(depth+self.currentDepth+1, node, agentID)
             # print(f"Released {node}")
-            # pp.pprint(self.reservationTable[depth+self.currentDepth+1].nodes(data=True))
         # self.showReservationsByAgent(agentID)
 
     def createReservationTable(self):
-        # Build the table for the depth
-        self.reservationTable = {
-            0: deepcopy(self.graphStructure),
-        }
-        
-        # Preallocate nodes as being unreserved
-        self.preallocNodes(0)
-        self.preallocEdges(0)
+        # Build the table, which holds every time step in one pair of arrays
+        self.reservationTable = reservationTable(self.mapGraphRef.graph["mapIndex"])
 
-        # Instantiate a counter that tracks the forward progression of time = depth of dict
+        # Instantiate a counter that tracks the forward progression of time = depth of the table
         self.depthCounter = count()
         self.timeTracked = next(self.depthCounter)
 
     def reserveNode(self, timeStep, node, agentID):
         # print(f"\tReserving {node}@{timeStep} for {agentID}")
-        self.reservationTable[timeStep].nodes[node]["Reserved"] = str(agentID)
+        self.reservationTable.reserveNode(timeStep, node, agentID)
 
     def reserveEdge(self, timeStep, sourceNode, targetNode, agentID):
         # print(f"\tReserving [{sourceNode}->{targetNode}]@{timeStep} for {agentID}")
-        # If the agent's plan is to wait, then all neighboring edges need to be reserved
-        if sourceNode == targetNode:
-            # for neighbor in self.reservationTable[timeStep][sourceNode]:
-            #     self.reservationTable[timeStep][sourceNode][neighbor]["Reserved"] = str(agentID)
-            pass
-        else:
-            self.reservationTable[timeStep][sourceNode][targetNode]["Reserved"] = str(agentID)
+        # If the agent's plan is to wait, there is no edge to reserve
+        self.reservationTable.reserveEdge(timeStep, sourceNode, targetNode, agentID)
 
     def releaseNode(self, timeStep, node, agentID):
         # print(f"\tRelease node: {node} @ {timeStep}")
-        # print(f"\t{self.reservationTable[timeStep].nodes[node]['Reserved']}")
-        if self.reservationTable[timeStep].nodes[node]["Reserved"] == str(agentID):
-            # print(f"\t node released")
-            self.reservationTable[timeStep].nodes[node]["Reserved"] = False
+        self.reservationTable.releaseNode(timeStep, node, agentID)
 
     def releaseEdge(self, timeStep, sourceNode, targetNode, agentID):
         # print(f"\tRelease edge: {sourceNode}->{targetNode} @ {timeStep}")
-        if sourceNode == targetNode:
-            # print(f"\t same tile, no edge release needed")
-            pass
-        else:
-            # print(f"\t{self.reservationTable[timeStep][sourceNode][targetNode]['Reserved']}")
-            if self.reservationTable[timeStep][sourceNode][targetNode]["Reserved"] == str(agentID):
-                # print(f"\t edge released")
-                self.reservationTable[timeStep][sourceNode][targetNode]["Reserved"] = False
+        self.reservationTable.releaseEdge(timeStep, sourceNode, targetNode, agentID)
 
     def getNodeState(self, timeStep, node, agentID):
-        reserver = self.reservationTable[timeStep].nodes[node]["Reserved"]
-        # print(f"Node: {self.reservationTable[timeStep].nodes[node]['Reserved']}; {bool(self.reservationTable[timeStep].nodes[node]['Reserved'])}")
-        if reserver == str(agentID):
-            # print("Node reserved by self.")
-            return False
-        elif reserver == False:
-            return False
-        else:
-            # print("Node reserved by another.")
-            return True
-    
+        # Nodes reserved by the agent itself are not blocking
+        # print(f"Node: {self.reservationTable.getNodeReserver(timeStep, node)}")
+        return self.reservationTable.isNodeBlocked(timeStep, node, agentID)
+
     def getNodeReserver(self, timeStep, node):
-        reserver = self.reservationTable[timeStep].nodes[node]["Reserved"]
-        # print(f"\t{reserver}")
-        # print(self.reservationTable[timeStep].nodes(data=True))
-        return reserver
+        # Reservers are reported by their ID string, or False if there is none
+        reserver = self.reservationTable.getNodeReserver(timeStep, node)
+        if reserver == self.reservationTable.unreserved:
+            return False
+        return str(reserver)
 
     def getEdgeState(self, timeStep, sourceNode, targetNode, agentID):
-        reserver = self.reservationTable[timeStep][sourceNode][targetNode]["Reserved"]
-        # print(f"Edge: {self.reservationTable[timeStep][sourceNode][targetNode]['Reserved']}; {bool(self.reservationTable[timeStep][sourceNode][targetNode]['Reserved'])}")
-        if reserver == str(agentID):
-            # print("Edge reserved by self.")
-            return False
-        elif reserver == False:
-            return False
-        else:
-            # print("Edge reserved by another.")
-            return True
-        
+        # Edges reserved by the agent itself are not blocking
+        return self.reservationTable.isEdgeBlocked(timeStep, sourceNode, targetNode, agentID)
+
     def getEdgeReserver(self, timeStep, sourceNode, targetNode):
-        if sourceNode == targetNode:
-            # There is no edge between timesteps
+        # There is no edge between timesteps if sourceNode == targetNode, which reads as unreserved
+        reserver = self.reservationTable.getEdgeReserver(timeStep, sourceNode, targetNode)
+        if reserver == self.reservationTable.unreserved:
             return False
-        else:
-            reserver = self.reservationTable[timeStep][sourceNode][targetNode]["Reserved"]
-        return reserver
+        return str(reserver)
 
     def expandReservationTable(self, timeDepth):
-        self.reservationTable[timeDepth+1] = deepcopy(self.graphStructure)
-        self.preallocNodes(timeDepth+1)
-        self.preallocEdges(timeDepth+1)
+        # New time steps start out unreserved
+        self.reservationTable.ensureTimeStep(timeDepth+1)
         self.timeTracked = next(self.depthCounter)
 
-    def preallocNodes(self, timeDepth):
-        nx.set_node_attributes(self.reservationTable[timeDepth], False, "Reserved")
-
-    def preallocEdges(self, timeDepth):
-        nx.set_edge_attributes(self.reservationTable[timeDepth], False, "Reserved")
-
-    def initRRAstarPathfind(self, endNode, heuristicID):
-        # Construct a dict of requested end nodes, with their RRA data stored for quick access
-        if endNode not in self.RRAdata:
-            self.RRAdata[endNode] = {
-                "weight": 1, "gScore": {}, "fScore": {}, "openSet": [], "counter": count()
-            }
+    def initRRAstarPathfind(self, endNode, sourceNode, heuristicID):
         # If the heuristic hasn't been set yet, set it now
         if self.heuristicFunc is None:
             self.setHeuristic(heuristicID)
+        # Each goal gets its own search, guided towards the first node it is asked about
+        goalSearch = RRAstarSearch(self.mapGraphRef.graph["mapIndex"], endNode, self.heuristicFunc(sourceNode))
+        if self.RRAbatchMode:
+            # Search the whole map now, so every later lookup for this goal is an array read
+            goalSearch.runToCompletion()
+        self.RRAdata[endNode] = goalSearch
+        # Only the most recently used goals are kept
+        while len(self.RRAdata) > self.RRAmaxGoals:
+            self.RRAdata.popitem(last=False)
 
     def setHeuristic(self, heuristicID):
-        # Define the heuristic based on the input
-        # Heuristic accepts two nodes and calculates a "distance" estimate that must be admissible
+        # Heuristic accepts a node and estimates the "distance" to it from every node at once, which must be admissible
         # print(f"Setting heuristic: {heuristicID}")
-        if heuristicID == "Dijkstra":
-            def heuristic(u, v):
-                # Dijkstra's always underestimates, making it admissible, but does nothing to speed up pathfinding
-                return 0
-            self.heuristicFunc = heuristic
-        elif heuristicID == "Manhattan":
-            def heuristic(u, v):
-                # Manhattan/taxicab distance is the absolute value of the difference 
-                uPos = self.mapGraphRef.nodes[u]['pos']
-                vPos = self.mapGraphRef.nodes[v]['pos']
-                heuristicDistance = abs(uPos['X']-vPos['X']) + abs(uPos['Y']-vPos['Y'])
-                return heuristicDistance
-            self.heuristicFunc = heuristic
-        elif heuristicID == "Euclidean":
-            def heuristic(u, v):
-                # Euclidean/rectilinear/pythagoras distance is line length between two points
-                uPos = self.mapGraphRef.nodes[u]['pos']
-                vPos = self.mapGraphRef.nodes[v]['pos']
-                heuristicDistance = sqrt((uPos['X']-vPos['X'])**2 + (uPos['Y']-vPos['Y'])**2)
-                return heuristicDistance
+        batchHeuristic = getMapHeuristics(self.mapGraphRef).getBatchHeuristic(heuristicID)
+        if batchHeuristic is not None:
+            def heuristic(v):
+                # Plain lists are quicker than arrays for the search to read one node at a time
+                return batchHeuristic(v).tolist()
             self.heuristicFunc = heuristic
-        elif heuristicID == "Approx. Euclidean":
-            def heuristic(u, v):
-                # An approximation of euclidean distance
-                uPos = self.mapGraphRef.nodes[u]['pos']
-                vPos = self.mapGraphRef.nodes[v]['pos']
-                delta_1 = abs(uPos['X']-vPos['X'])
-                delta_2 = abs(uPos['Y']-vPos['Y'])
-                b = max(delta_1, delta_2)
-                a = min(delta_1, delta_2)
-                heuristicDistance = b + 0.428 * a * a / b
-                return heuristicDistance
+        elif callable(heuristicID):
+            mapIndex = self.mapGraphRef.graph["mapIndex"]
+            def heuristic(v):
+                # A pairwise heuristic function was given, so apply it to every node
+                return [heuristicID(u, v) for u in mapIndex.nodeNames]
             self.heuristicFunc = heuristic
 
     def calculateHeuristicDistance(self, sourceNode, targetNode, heuristicID):
@@ -277,73 +218,44 @@ class HCAstarReserver:
             Accepts the node of the agent as sourceNode
             Accepts the node of the goal node as targetNode
             Checks for the value already being in the dataset, and returns the hScore
-            If it isn't, performs RRA* until the sourceNode is included
+            If it isn't, resumes RRA* until the sourceNode is included
         """
+        return self.calculateHeuristicDistanceByID(self.mapGraphRef.graph["mapIndex"].nodeID[sourceNode], targetNode, heuristicID)
+
+    def calculateHeuristicDistanceByID(self, sourceID, targetNode, heuristicID):
+        # The space-time searches give the agent's node by ID; targets stay named, as the goal searches are kept by name
+        if self.useDistanceCache:
+            return self.getCachedDistance(sourceID, targetNode)
+
         # Check for the existence of the targetNode in the data
         if targetNode not in self.RRAdata:
-            self.initRRAstarPathfind(targetNode, heuristicID)
-            # Set the initial search conditions
-            nodeRRAdata = self.RRAdata[targetNode]
-            heappush(nodeRRAdata["openSet"], (0, next(nodeRRAdata["counter"]), targetNode))
-            nodeRRAdata["gScore"][targetNode] = 0
-            nodeRRAdata["fScore"][targetNode] = self.heuristicFunc(targetNode, sourceNode)
-
-        # print(self.RRAdata[targetNode])
-
-        # Check if the sourceNode has been checked already
-        if sourceNode in self.RRAdata[targetNode]["gScore"]:
-            # print(f"{sourceNode}->{targetNode} gScore is cached: {self.RRAdata[targetNode]['gScore'][sourceNode]}")
-            return self.RRAdata[targetNode]["gScore"][sourceNode]
-        
-        # If not, then the node needs to be searched for via RRA* until its hScore is found
-        self.RRAsearch(sourceNode, targetNode)
-        # print(self.RRAdata[targetNode]["gScore"][sourceNode])
-        return self.RRAdata[targetNode]["gScore"][sourceNode]
-
-    def RRAsearch(self, sourceNode, targetNode):
-        nodeRRA = self.RRAdata[targetNode]
-        # print(nodeRRA["openSet"])
-        # print(type(nodeRRA["openSet"]))
-        while nodeRRA["openSet"]:
-            # Read the new node in the openSet to see if it matches the goal
-            _, __, currentNode = min(nodeRRA["openSet"])
-            # print(f"Currently checking node: {currentNode}")
-            # print(currentNode)
-            if currentNode == sourceNode:
-                heappush(nodeRRA["openSet"], (_, __, currentNode))
-                # The node has been found, and the search can end
-                return True
-            # Pop the next lowest fScore node for evaluation fo neighbors
-            _, __, currentNode = heappop(nodeRRA["openSet"])
-            # print(f"Node has neighbors:")
-            for neighborNode in self.mapGraphRef.neighbors(currentNode):
-                # print(f"\t{neighborNode}")1
-                # Calculate the neighbors estimated gScore
-                est_gScore = nodeRRA["gScore"][currentNode] + nodeRRA["weight"]
-                # print(f"\tEst. gScore: {est_gScore}")
-                # print(f"\tVs current stored: {nodeRRA['gScore'].get(neighborNode, inf)}")
-                if est_gScore < nodeRRA["gScore"].get(neighborNode, inf):
-                    # If the estimate is lower, a new best path to the node has been found
-                    nodeRRA["gScore"][neighborNode] = est_gScore
-                    # Calculate the fScore for this node
-                    node_fScore = est_gScore + self.heuristicFunc(currentNode, sourceNode)
-                    # print("\tCalculated new fScore: ")
-                    # If this new node isn't already in the openSet, add it
-                    # print( neighborNode not in nodeRRA["fScore"])
-                    if neighborNode not in nodeRRA["fScore"]:
-                        heappush(nodeRRA["openSet"], (node_fScore, next(nodeRRA["counter"]), neighborNode))
-                    # Update the fScore
-                    nodeRRA["fScore"][neighborNode] = node_fScore
-            # print(f"Open set: {nodeRRA['openSet']}")
-            # print(f"Closed set: {nodeRRA['gScore']}")
-        raise nx.NetworkXNoPath(f"Node {targetNode} not reachable from {sourceNode}")
-    
+            self.initRRAstarPathfind(targetNode, self.mapGraphRef.graph["mapIndex"].nodeNames[sourceID], heuristicID)
+        else:
+            self.RRAdata.move_to_end(targetNode)
+
+        # Closed nodes hold their true distance, otherwise the search resumes until the sourceNode is closed
+        return self.RRAdata[targetNode].getDistanceByID(sourceID)
+
+    def getCachedDistance(self, sourceID, targetNode):
+        # RRA* converges on the true distance to the target, which the cached table holds for every node at once
+        if targetNode not in self.cachedDistances:
+            self.cachedDistances[targetNode] = self.getTargetDistances(targetNode)
+        distance = self.cachedDistances[targetNode][sourceID]
+        if distance == UNREACHABLE:
+            raise nx.NetworkXNoPath(f"Node {targetNode} not reachable from {self.mapGraphRef.graph['mapIndex'].nodeNames[sourceID]}")
+        return distance
+
+    def getTargetDistances(self, targetNode):
+        # The map's one cached table covers every endpoint, so it is only searched and saved once per map
+        mapIndex = self.mapGraphRef.graph["mapIndex"]
+        if self.endpointDistances is None:
+            self.endpointDistances = distanceTable(mapIndex, mapEndpoints(self.mapGraphRef), cacheDirectory=self.distanceCacheDirectory)
+        if targetNode in self.endpointDistances:
+            return self.endpointDistances.getRow(targetNode).tolist()
+        # Targets which are not endpoints are searched for this run alone, rather than adding a file per target
+        return distanceTable(mapIndex, [targetNode], useCache=False).getRow(targetNode).tolist()
+
     def showReservationsByAgent(self, agentID):
         # Debugging function
-        futureReservations = []
-        for reservationStep in list(self.reservationTable.keys())[self.currentDepth:]:
-            # for node, data in self.reservationTable[reservationStep].nodes(data="Reserved"):
-            #     print(data == str(agentID))
-            reservedNodes = [(reservationStep, node) for node, data in self.reservationTable[reservationStep].nodes(data="Reserved") if data == str(agentID)]
-            futureReservations.append(reservedNodes)
+        futureReservations = self.reservationTable.getReservationsByAgent(agentID, self.currentDepth, self.timeTracked+1)
         # print(f"{agentID}:{futureReservations}")
\ No newline at end of file
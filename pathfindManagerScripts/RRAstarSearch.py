@@ -0,0 +1,66 @@
+import networkx as nx
+import numpy as np
+from heapq import heappop, heappush
+from itertools import count
+
+class RRAstarSearch:
+    """
+        Reverse Resumable A* outward from a single goal node
+        Keeps its search state in arrays indexed by node ID so it can be paused once a requested node is closed,
+        and resumed later from the same open set when a node further away is requested
+    """
+    def __init__(self, mapIndex, goalNode, heuristicScores):
+        self.mapIndex = mapIndex
+        self.goalID = mapIndex.nodeID[goalNode]
+        # Estimated distance from every node to the node the search is guided towards
+        # This has to stay fixed for the life of the search, so that closed nodes always hold their true distance
+        self.heuristicScores = heuristicScores
+
+        # Search state, indexed by node ID
+        self.gScore = np.full(mapIndex.numNodes, np.iinfo(np.int32).max, dtype=np.int32)
+        self.closedSet = np.zeros(mapIndex.numNodes, dtype=bool)
+        self.openSet = []
+        self.counter = count()
+        self.completed = False
+
+        # Set the initial search conditions
+        self.gScore[self.goalID] = 0
+        heappush(self.openSet, (self.heuristicScores[self.goalID], next(self.counter), self.goalID))
+
+    def getDistance(self, sourceNode):
+        return self.getDistanceByID(self.mapIndex.nodeID[sourceNode])
+
+    def getDistanceByID(self, sourceID):
+        # Closed nodes already hold their true distance, otherwise resume the search until the node is closed
+        if not self.closedSet[sourceID]:
+            self.expand(sourceID)
+            if not self.closedSet[sourceID]:
+                raise nx.NetworkXNoPath(f"Node {self.mapIndex.nodeNames[self.goalID]} not reachable from {self.mapIndex.nodeNames[sourceID]}")
+        return int(self.gScore[sourceID])
+
+    def runToCompletion(self):
+        # Close every reachable node, after which every lookup is an array read
+        self.expand(None)
+
+    def expand(self, stopID):
+        # Expands nodes in fScore order until stopID is closed, or the open set is exhausted
+        gScore = self.gScore
+        closedSet = self.closedSet
+        openSet = self.openSet
+        heuristicScores = self.heuristicScores
+        neighborIDs = self.mapIndex.neighborIDs
+        while openSet:
+            _, __, currentID = heappop(openSet)
+            if closedSet[currentID]:
+                # A stale entry, superseded by a lower fScore push of the same node
+                continue
+            closedSet[currentID] = True
+            neighbor_gScore = int(gScore[currentID]) + 1
+            for neighborID in neighborIDs[currentID]:
+                if not closedSet[neighborID] and neighbor_gScore < gScore[neighborID]:
+                    # A new best path to the neighbor has been found
+                    gScore[neighborID] = neighbor_gScore
+                    heappush(openSet, (neighbor_gScore + heuristicScores[neighborID], next(self.counter), neighborID))
+            if currentID == stopID:
+                return
+        self.completed = True
@@ -0,0 +1,207 @@
+from bisect import bisect_right
+from itertools import count
+from numpy import inf
+from pathfindManagerScripts.reservationTable import reservationTable
+
+class SIPPReserver:
+    """
+        Class which maintains a reservation table for Safe Interval Path Planning
+        Each node also keeps its reservations as runs of consecutive time steps held by one agent,
+        from which the safe intervals an agent may occupy the node in are read without visiting every time step
+    """
+    def __init__(self, mapGraph):
+        # Store the base graph
+        self.mapGraphRef = mapGraph
+
+    def build(self):
+        # Start the current offset at time t=0
+        self.currentDepth = 0
+
+        # Initialize the reservation table
+        self.createReservationTable()
+
+    def updateSimulationDepth(self, currentDepth):
+        # The current simulation step is stored as an offset for any future calls
+        self.currentDepth = currentDepth
+        # Nothing can be planned into the past, so its reservations are no longer needed
+        self.purgePastData()
+
+    def purgePastData(self):
+        # Drop reservations for time steps before the current one, capping the table at the planning horizon
+        previousOffset = self.reservationTable.timeOffset
+        self.reservationTable.purgePastData(self.currentDepth)
+        if self.reservationTable.timeOffset != previousOffset:
+            # Runs which ended before the table's first time step can no longer be released or read
+            timeOffset = self.reservationTable.timeOffset
+            for nodeIndex, nodeRuns in enumerate(self.nodeRuns):
+                if nodeRuns and nodeRuns[0][1] <= timeOffset:
+                    self.nodeRuns[nodeIndex] = [run for run in nodeRuns if run[1] > timeOffset]
+
+    def createReservationTable(self):
+        # Build the table, which holds every time step in one pair of arrays
+        mapIndex = self.mapGraphRef.graph["mapIndex"]
+        self.reservationTable = reservationTable(mapIndex)
+        self.nodeIndex = mapIndex.nodeID
+
+        # Per node, the reserved runs as (startTime, endTime, agentID) sorted by startTime, with endTime exclusive
+        # Consecutive time steps held by the same agent, as when it waits, share one run
+        self.nodeRuns = [[] for nodeID in range(mapIndex.numNodes)]
+
+        # Instantiate a counter that tracks the forward progression of time = depth of the table
+        self.depthCounter = count()
+        self.timeTracked = next(self.depthCounter)
+
+    def getSafeIntervals(self, node, agentID):
+        # Lists the (startTime, endTime) intervals in which the node is not held by another agent, relative to currentDepth
+        # The agent's own reservations do not make a node unsafe, and the last interval never ends
+        # Reading the runs stands in for reading the table, so it is counted with the table's lookups
+        self.reservationTable.lookupCount = self.reservationTable.lookupCount + 1
+        nodeRuns = self.nodeRuns[self.nodeIndex[node]]
+        safeIntervals = []
+        safeStart = self.currentDepth
+        # Start from the run holding or preceding the current time
+        firstRun = max(bisect_right(nodeRuns, (self.currentDepth, inf)) - 1, 0)
+        for runIndex in range(firstRun, len(nodeRuns)):
+            runStart, runEnd, reserver = nodeRuns[runIndex]
+            if reserver == agentID or runEnd <= safeStart:
+                continue
+            if runStart > safeStart:
+                safeIntervals.append((safeStart - self.currentDepth, runStart - self.currentDepth))
+            safeStart = runEnd
+        safeIntervals.append((safeStart - self.currentDepth, inf))
+        return safeIntervals
+
+    def isEdgeBlocked(self, timeDepth, sourceNode, targetNode, agentID):
+        # Whether another agent crosses the edge in the step starting at timeDepth
+        return self.reservationTable.isEdgeBlocked(timeDepth + self.currentDepth, sourceNode, targetNode, agentID)
+
+    def addRunStep(self, nodeIndex, timeStep, agentID):
+        # Adds a time step to the agent's runs on the node, joining it to the runs either side where they are the agent's
+        nodeRuns = self.nodeRuns[nodeIndex]
+        runIndex = bisect_right(nodeRuns, (timeStep, inf))
+        previousRun = nodeRuns[runIndex-1] if runIndex > 0 else None
+        nextRun = nodeRuns[runIndex] if runIndex < len(nodeRuns) else None
+        joinsPrevious = previousRun is not None and previousRun[1] == timeStep and previousRun[2] == agentID
+        joinsNext = nextRun is not None and nextRun[0] == timeStep + 1 and nextRun[2] == agentID
+        if joinsPrevious and joinsNext:
+            nodeRuns[runIndex-1] = (previousRun[0], nextRun[1], agentID)
+            del nodeRuns[runIndex]
+        elif joinsPrevious:
+            nodeRuns[runIndex-1] = (previousRun[0], timeStep + 1, agentID)
+        elif joinsNext:
+            nodeRuns[runIndex] = (timeStep, nextRun[1], agentID)
+        else:
+            nodeRuns.insert(runIndex, (timeStep, timeStep + 1, agentID))
+
+    def removeRunStep(self, nodeIndex, timeStep):
+        # Removes a time step from the run holding it, splitting the run if the step was in its middle
+        nodeRuns = self.nodeRuns[nodeIndex]
+        runIndex = bisect_right(nodeRuns, (timeStep, inf)) - 1
+        runStart, runEnd, reserver = nodeRuns[runIndex]
+        remainingRuns = []
+        if runStart < timeStep:
+            remainingRuns.append((runStart, timeStep, reserver))
+        if timeStep + 1 < runEnd:
+            remainingRuns.append((timeStep + 1, runEnd, reserver))
+        nodeRuns[runIndex:runIndex+1] = remainingRuns
+
+    def evaluateNodeEligibility(self, timeDepth, targetNode, sourceNode, agentID):
+        # Verifies if the node is open at a specific time, used by the mover when resolving conflicts
+        # Expands the reservation table if the request depth exceeds the table's depth
+        if timeDepth + self.currentDepth >= self.timeTracked:
+            self.expandReservationTable(timeDepth + self.currentDepth)
+
+        # If the agent is considering a "wait" move, where it does not move
+        if targetNode == sourceNode:
+            # Have to check all edges leading to this node, and the future node
+            edgeReserved = self.reservationTable.isWaitBlocked(timeDepth+self.currentDepth, sourceNode, agentID)
+        else:
+            edgeReserved = self.reservationTable.isEdgeBlocked(timeDepth+self.currentDepth, sourceNode, targetNode, agentID)
+        nodeReserved = self.reservationTable.isNodeBlocked(timeDepth+self.currentDepth+1, targetNode, agentID)
+        return not nodeReserved and not edgeReserved
+
+    def evaluateNodeOverwritability(self, timeDepth, targetNode, sourceNode, agentID, agentPriority):
+        # Verifies if the node is overwritable at a specific time
+        # Expands the reservation table if the request depth exceeds the table's depth
+        if timeDepth + self.currentDepth >= self.timeTracked:
+            self.expandReservationTable(timeDepth + self.currentDepth)
+
+        edgeReserver = self.reservationTable.getEdgeReserver(timeDepth + self.currentDepth, sourceNode, targetNode)
+        if edgeReserver == self.reservationTable.unreserved:
+            # Its not even reserved
+            edgeOverwritable = True
+        else:
+            # It is reserved, so compare priorities
+            edgeOverwritable = (agentPriority.index(edgeReserver) >= agentPriority.index(agentID))
+
+        nodeReserver = self.reservationTable.getNodeReserver(timeDepth+self.currentDepth+1, targetNode)
+        if nodeReserver == self.reservationTable.unreserved:
+            # Its not even reserved
+            nodeOverwritable = True
+        else:
+            nodeOverwritable = (agentPriority.index(nodeReserver) >= agentPriority.index(agentID))
+
+        if edgeOverwritable and nodeOverwritable:
+            return (True, edgeReserver, nodeReserver)
+        return False
+
+    def handlePathPlanRequest(self, requestedNodeList, agentID):
+        # Reserves nodes and edges for the found path, starting from currentDepth
+        for depth, node in enumerate(requestedNodeList[1:]):
+            # Reserve the edge at this time step
+            self.reserveEdge(depth+self.currentDepth, requestedNodeList[depth], node, agentID)
+            # Reserve the node at the next time step
+            self.reserveNode(depth+self.currentDepth+1, node, agentID)
+
+    def handlePathRelease(self, requestedNodeList, agentID):
+        # Releases nodes and edges for the provided path, starting from currentDepth
+        for depth, node in enumerate(requestedNodeList[1:]):
+            # Release the edge at this time step
+            self.releaseEdge(depth+self.currentDepth, requestedNodeList[depth], node, agentID)
+            # Release the node at the next time step
+            self.releaseNode(depth+self.currentDepth+1, node, agentID)
+
+    def reserveNode(self, timeStep, node, agentID):
+        # The table ignores reservations in the past, so the runs do too
+        if timeStep < self.reservationTable.timeOffset:
+            return
+        nodeIndex = self.nodeIndex[node]
+        previousReserver = self.reservationTable.getNodeReserver(timeStep, node)
+        if previousReserver != agentID:
+            # The new reservation replaces any other agent's hold on the node at this time
+            if previousReserver != self.reservationTable.unreserved:
+                self.removeRunStep(nodeIndex, timeStep)
+            self.addRunStep(nodeIndex, timeStep, agentID)
+        self.reservationTable.reserveNode(timeStep, node, agentID)
+
+    def reserveEdge(self, timeStep, sourceNode, targetNode, agentID):
+        # If the agent's plan is to wait, there is no edge to reserve
+        self.reservationTable.reserveEdge(timeStep, sourceNode, targetNode, agentID)
+
+    def releaseNode(self, timeStep, node, agentID):
+        # Only the reserving agent can release its hold on the node
+        if self.reservationTable.getNodeReserver(timeStep, node) == agentID:
+            self.removeRunStep(self.nodeIndex[node], timeStep)
+            self.reservationTable.releaseNode(timeStep, node, agentID)
+
+    def releaseEdge(self, timeStep, sourceNode, targetNode, agentID):
+        self.reservationTable.releaseEdge(timeStep, sourceNode, targetNode, agentID)
+
+    def getNodeReserver(self, timeStep, node):
+        # Reservers are reported by their ID string, or False if there is none
+        reserver = self.reservationTable.getNodeReserver(timeStep, node)
+        if reserver == self.reservationTable.unreserved:
+            return False
+        return str(reserver)
+
+    def getEdgeReserver(self, timeStep, sourceNode, targetNode):
+        # There is no edge between timesteps if sourceNode == targetNode, which reads as unreserved
+        reserver = self.reservationTable.getEdgeReserver(timeStep, sourceNode, targetNode)
+        if reserver == self.reservationTable.unreserved:
+            return False
+        return str(reserver)
+
+    def expandReservationTable(self, timeDepth):
+        # New time steps start out unreserved
+        self.reservationTable.ensureTimeStep(timeDepth+1)
+        self.timeTracked = next(self.depthCounter)
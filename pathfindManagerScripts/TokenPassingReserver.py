@@ -1,8 +1,8 @@
-import networkx as nx
 import pprint
 pp = pprint.PrettyPrinter(indent=4)
 from itertools import count
-from copy import deepcopy
+from pathfindManagerScripts.reservationTable import reservationTable
+from pathfindManagerScripts.distanceTable import distanceTable
 
 
 class TokenPassingReserver:
@@ -12,11 +12,12 @@ class TokenPassingReserver:
     def __init__(self, mapGraph):
         # Store the base graph
         self.mapGraphRef = mapGraph
+        # Number of processes the endpoint distance precompute is spread over
+        self.precomputeProcessCount = 1
+        # Where the endpoint distance table is cached, or None for the user's cache directory
+        self.distanceCacheDirectory = None
 
     def build(self):
-        self.graphStructure = nx.Graph()
-        self.graphStructure.add_nodes_from(self.mapGraphRef.nodes(data=False))
-        self.graphStructure.add_edges_from(self.mapGraphRef.edges(data=False))
         # Token Passing features a very heavy precompute step
         # All "endpoints" must be collected
         # Shortest paths from all nodes to each endpoint are then calculated and stored
@@ -38,21 +39,10 @@ class TokenPassingReserver:
                 pass
             self.V_endpoint = self.V_task + self.V_ntask
         
-        # Compute the heuristic distances from all nodes to all endpoints
-        # Only allow the use of manhattan for guiding the search
-        self.hScores = {}
-        def heuristic(u, v):
-            # Manhattan/taxicab distance is the absolute value of the difference 
-            uPos = self.mapGraphRef.nodes[u]['pos']
-            vPos = self.mapGraphRef.nodes[v]['pos']
-            heuristicDistance = abs(uPos['X']-vPos['X']) + abs(uPos['Y']-vPos['Y'])
-            return heuristicDistance
-        for sourceNode in self.mapGraphRef.nodes(data=False):
-            for targetNode in self.V_endpoint:
-                if targetNode not in self.hScores.keys():
-                    self.hScores[targetNode] = {}
-                distance = nx.astar_path_length(self.graphStructure, sourceNode, targetNode, heuristic=heuristic)
-                self.hScores[targetNode][sourceNode] = distance
+        # Compute the true distances from all nodes to all endpoints
+        # One breadth-first search per endpoint covers every node, as the graph is unweighted
+        self.hScores = distanceTable(self.mapGraphRef.graph["mapIndex"], self.V_endpoint, self.precomputeProcessCount,
+                                    cacheDirectory=self.distanceCacheDirectory)
 
         # for targetNode in self.hScores.keys():
         #     print(f"{targetNode}")
@@ -64,80 +54,57 @@ class TokenPassingReserver:
     def updateSimulationDepth(self, currentDepth):
         # The current simulation step is stored as an offset for any future calls
         self.currentDepth = currentDepth
+        # Nothing can be planned into the past, so its reservations are no longer needed
+        self.purgePastData()
 
     def purgePastData(self):
-        pass
+        # Drop reservations for time steps before the current one, capping the table at the planning horizon
+        self.reservationTable.purgePastData(self.currentDepth)
+
+    def getSearchHorizon(self, startTime=0):
+        return self.reservationTable.getSearchHorizon(self.currentDepth, startTime)
 
     def evaluateNodeEligibility(self, timeDepth, targetNode, sourceNode, agentID, ignoredAgentID=None):
-        # if agentID == 4:
-        #     print(f">>>Searching {sourceNode}->{targetNode}:T{timeDepth+self.currentDepth} for {agentID}, ignoring {ignoredAgentID}")
-        #     print(f"\t{self.reservationTable[timeDepth+self.currentDepth].nodes(data=True)['(0, 1)']}")
-        # Verifies if the node is open at a specific time
+        # Node name form of 'evaluateMoveEligibility', for the taskers
+        nodeIndex = self.reservationTable.nodeIndex
+        return self.evaluateMoveEligibility(timeDepth, nodeIndex[targetNode], nodeIndex[sourceNode], agentID, ignoredAgentID)
+
+    def evaluateMoveEligibility(self, timeDepth, targetID, sourceID, agentID, ignoredAgentID=None):
+        # Verifies if the move from sourceID to targetID is open at a specific time, taking node IDs as the searches do
         # Expands the reservation table if the request depth exceeds the table's depth
         if timeDepth + self.currentDepth >= self.timeTracked:
             self.expandReservationTable(timeDepth + self.currentDepth)
-            # print(f"New depth: {timeDepth+self.currentDepth}")
-            # print(f"{self.__sizeof__()}")
-        
+
         # If the agent is considering a "wait" move, where it does not move
-        # print(targetNode)
-        # print(sourceNode)
-        if targetNode == sourceNode:
+        if targetID == sourceID:
             # Have to check all edges leading to this node, and the future node
-            edgeReserved = False
-            for node in self.reservationTable[timeDepth+self.currentDepth][sourceNode]:
-                edgeReserved = edgeReserved or self.getEdgeState(timeDepth+self.currentDepth, sourceNode, node, agentID, ignoredAgentID)
-            nodeReserved = self.getNodeState(timeDepth+self.currentDepth+1, sourceNode, agentID, ignoredAgentID)
-        else:
-            edgeReserved = self.getEdgeState(timeDepth + self.currentDepth, sourceNode, targetNode, agentID, ignoredAgentID)
-            nodeReserved = self.getNodeState(timeDepth + self.currentDepth + 1, targetNode, agentID, ignoredAgentID)
-        if not nodeReserved and not edgeReserved:
-            # if agentID == 4:
-                # print(f"<<<{targetNode} in {timeDepth} from now ({timeDepth+self.currentDepth}) is accessible.")
-            return True
-        elif nodeReserved and not edgeReserved:
-            # if agentID == 4:
-                # print(f"<<<{targetNode} in {timeDepth} from now ({timeDepth+self.currentDepth}) is NODE BLOCKED.")
-            return False
-        elif edgeReserved and not nodeReserved:
-            # if agentID == 4:
-                # print(f"<<<{targetNode} in {timeDepth} from now ({timeDepth+self.currentDepth}) is EDGE BLOCKED")
-            return False
+            edgeReserved = self.reservationTable.isWaitBlockedByID(timeDepth+self.currentDepth, sourceID, agentID, ignoredAgentID)
         else:
-            # if agentID == 6:
-                # print(f"<<<{targetNode} in {timeDepth} from now ({timeDepth+self.currentDepth}) is EDGE+NODE BLOCKED")
-            return False
-        
+            edgeReserved = self.reservationTable.isEdgeBlockedByID(timeDepth+self.currentDepth, sourceID, targetID, agentID, ignoredAgentID)
+        # The end of other agents' paths is held as well, as in 'getNodeState'
+        nodeReserved = (self.isEndpointClaimed(self.reservationTable.mapIndex.nodeNames[targetID], agentID, ignoredAgentID)
+            or self.reservationTable.isNodeBlockedByID(timeDepth+self.currentDepth+1, targetID, agentID, ignoredAgentID))
+        return not nodeReserved and not edgeReserved
+
     def evaluateEndpointEligibility(self, timeDepth, targetNode, agentID, ignoredAgentID=None):
         # print(f"!!! Agent {agentID} reached its endpoint ({targetNode}), checking if valid...")
-        claimedEndpoints = [path[-1] for agent, path in self.reservedPaths.items() if (not agent == agentID and not agent == ignoredAgentID)]
-        # print(f"\t{claimedEndpoints}")
-        if targetNode in claimedEndpoints:
+        if self.isEndpointClaimed(targetNode, agentID, ignoredAgentID):
             # If the endpoint is already being claimed, it should automatically be rejected (this shouldn't even be able to happen)
             # if agentID == 6:
             #     print(f"\tNot valid. Try again.")
             return False
         # Endpoints need to be available all the way through the time horizon
         # print(f"Checking that endpoint for {agentID} is available from {timeDepth}-{self.timeTracked}")
-        timeStepsToCheck = range(timeDepth+self.currentDepth, self.timeTracked)
-        # print(timeStepsToCheck)
-        for depth in timeStepsToCheck:
-            nodeReserved = self.getNodeState(depth, targetNode, agentID, ignoredAgentID)
-            if nodeReserved is True:
-                # print(f"Node {targetNode} is reserved at {depth} by {self.getNodeReserver(depth, targetNode)}, have to wait")
-                return False
+        if self.reservationTable.isNodeBlockedDuring(timeDepth+self.currentDepth, self.timeTracked, targetNode, agentID, ignoredAgentID):
+            # print(f"Node {targetNode} is reserved before {self.timeTracked}, have to wait")
+            return False
         
         return True
 
     def initializeToken(self):
-        # Build the table for depth 0
-        self.reservationTable = {
-            0: deepcopy(self.graphStructure),
-        }
-
-        # Preallocate nodes as being unreserved
-        self.preallocNodes(0)
-        self.preallocEdges(0)
+        # Build the table, which holds every time step in one pair of arrays
+        # Node reservation times are tracked for the endpoint checks, which span the whole time horizon
+        self.reservationTable = reservationTable(self.mapGraphRef.graph["mapIndex"], trackNodeTimes=True)
 
         # Instantiate a counter that tracks the forward progression of time
         self.depthCounter = count()
@@ -145,6 +112,8 @@ class TokenPassingReserver:
 
         # Container for agent paths, used to check for endpoint availability
         self.reservedPaths = {}
+        # The agents whose paths end at each endpoint, kept in step with reservedPaths
+        self.endpointClaimants = {}
 
     def handlePathPlanRequest(self, requestedNodeList, agentID):
         # Reserves nodes and edges for the found path, starting from currentDepth
@@ -154,7 +123,9 @@ class TokenPassingReserver:
             # Reserve the node at the next time step
             self.reserveNode(depth+self.currentDepth+1, node, agentID)
         # Note down the path for access by other agents
+        self.releaseEndpointClaim(agentID)
         self.reservedPaths[agentID] = requestedNodeList
+        self.endpointClaimants.setdefault(requestedNodeList[-1], set()).add(agentID)
         # print(f"Added planned path, leaving \n\t{self.reservedPaths}")
 
     def handlePathRelease(self, requestedNodeList, agentID):
@@ -167,128 +138,79 @@ class TokenPassingReserver:
             # Release the node at the next time step
             self.releaseNode(depth+self.currentDepth+1, node, agentID)
             # print(f"Released {node}")
-            # pp.pprint(self.reservationTable[depth+self.currentDepth+1].nodes(data=True))
         # self.showReservationsByAgent(agentID)
         # Release the idea of a path too
         if agentID in self.reservedPaths:
+            self.releaseEndpointClaim(agentID)
             del self.reservedPaths[agentID]
         # print(f"Removed planned path, leaving \n\t{self.reservedPaths}")
 
+    def releaseEndpointClaim(self, agentID):
+        # Forget the endpoint of the agent's current path, if it has one
+        if agentID not in self.reservedPaths:
+            return
+        endpoint = self.reservedPaths[agentID][-1]
+        claimants = self.endpointClaimants[endpoint]
+        claimants.discard(agentID)
+        if not claimants:
+            del self.endpointClaimants[endpoint]
+
+    def isEndpointClaimed(self, node, agentID=None, ignoredAgentID=None):
+        # Whether the path of any agent, other than the asking agent or the agent it may ignore, ends at the node
+        claimants = self.endpointClaimants.get(node, None)
+        if not claimants:
+            return False
+        for claimant in claimants:
+            if claimant != agentID and claimant != ignoredAgentID:
+                return True
+        return False
+
     def reserveNode(self, timeStep, node, agentID):
-        self.reservationTable[timeStep].nodes[node]["Reserved"] = str(agentID)
+        self.reservationTable.reserveNode(timeStep, node, agentID)
 
     def reserveEdge(self, timeStep, sourceNode, targetNode, agentID):
-        # If the agent's plan is to wait, then all neighboring edges need to be reserved
-        if sourceNode == targetNode:
-            # for neighbor in self.reservationTable[timeStep][sourceNode]:
-            #     self.reservationTable[timeStep][sourceNode][neighbor]["Reserved"] = str(agentID)
-            pass
-        else:
-            self.reservationTable[timeStep][sourceNode][targetNode]["Reserved"] = str(agentID)
+        # If the agent's plan is to wait, there is no edge to reserve
+        self.reservationTable.reserveEdge(timeStep, sourceNode, targetNode, agentID)
 
     def releaseNode(self, timeStep, node, agentID):
         # print(f"\tRelease node: {node} @ {timeStep}")
-        # print(f"\t{self.reservationTable[timeStep].nodes[node]['Reserved']}")
-        if self.reservationTable[timeStep].nodes[node]["Reserved"] == str(agentID):
-            # print(f"\t node released")
-            self.reservationTable[timeStep].nodes[node]["Reserved"] = False
+        self.reservationTable.releaseNode(timeStep, node, agentID)
 
     def releaseEdge(self, timeStep, sourceNode, targetNode, agentID):
         # print(f"\tRelease edge: {sourceNode}->{targetNode} @ {timeStep}")
-        if sourceNode == targetNode:
-            # print(f"\t same tile, no edge release needed")
-            pass
-        else:
-            # print(f"\t{self.reservationTable[timeStep][sourceNode][targetNode]['Reserved']}")
-            if self.reservationTable[timeStep][sourceNode][targetNode]["Reserved"] == str(agentID):
-                # print(f"\t edge released")
-                self.reservationTable[timeStep][sourceNode][targetNode]["Reserved"] = False
+        self.reservationTable.releaseEdge(timeStep, sourceNode, targetNode, agentID)
 
     def getNodeState(self, timeStep, node, agentID, ignoredAgentID=None):
         # if agentID == 1:
         #     print(f"\tChecking {node}:T{timeStep} for {agentID}, ignoring {ignoredAgentID}")
-        # # # Nodes can be outright reserved:
-        # reserver = self.reservationTable[timeStep].nodes[node]["Reserved"]
-        # validReserveStates = [str(agentID), False, str(ignoredAgentID)]
-        # if reserver not in validReserveStates:
-        #     if agentID == 1:
-        #         print(f"Node blocked by {reserver}")
-        #     # Node is reserved by non-overwritable agent
-        #     return True
-        # else:
-        #     # Node is free, whether via non-reservation or overwritability
-        #     return False
-        
-        # print(f"Node: {self.reservationTable[timeStep].nodes[node]['Reserved']}; {bool(self.reservationTable[timeStep].nodes[node]['Reserved'])}")
-        # if reserver == str(agentID):
-        #     # print("Node reserved by self.")
-        #     return False
-        # elif reserver == False:
-        #     return False
-        # else:
-        #     # print("Node reserved by another.")
-        #     return True
-        
-        reserver = self.reservationTable[timeStep].nodes[node]["Reserved"]
         # In token passing, it is also assumed that the end of agent paths is reserved:
-        claimedEndpoints = [path[-1] for agent, path in self.reservedPaths.items() if (not agent == agentID and not agent == ignoredAgentID)]
-        #### ^^^^^^ needs to exclude agents own endpoint or else it cannot stay in place
-
-        validReserveStates = [str(agentID), False, str(ignoredAgentID)]
-        if node in claimedEndpoints or reserver not in validReserveStates:
-            # if agentID == 4:
-            #     print(f"Node is not available: {node in claimedEndpoints}/{reserver not in validReserveStates}")
-            # if agentID == 4 or agentID == 4:
-            #     print(node in claimedEndpoints)
-            #     print(claimedEndpoints)
-            #     print(reserver not in validReserveStates)
-            #     print(reserver)
+        # The agent's own endpoint is excluded, or else it cannot stay in place
+        # Reservations held by the agent, or the agent it may ignore, are not blocking
+        if self.isEndpointClaimed(node, agentID, ignoredAgentID) or self.reservationTable.isNodeBlocked(timeStep, node, agentID, ignoredAgentID):
             return True
-        elif not node in claimedEndpoints:
-            # if agentID == 6 or agentID == 1:
-            #     print("node endpoint is not claimed")
-            return False
-        elif reserver in validReserveStates:
-            # if agentID == 6 or agentID == 1:
-            #     print("node is not reserved")
+        else:
             return False
         
     def getNodeReserver(self, timeStep, node):
-        reserver = self.reservationTable[timeStep].nodes[node]["Reserved"]
-        # print(f"\t{reserver}")
-        # print(self.reservationTable[timeStep].nodes(data=True))
-        return reserver
+        # Reservers are reported by their ID string, or False if there is none
+        reserver = self.reservationTable.getNodeReserver(timeStep, node)
+        if reserver == self.reservationTable.unreserved:
+            return False
+        return str(reserver)
 
     def getEdgeState(self, timeStep, sourceNode, targetNode, agentID, ignoredAgentID=None):
         # if agentID == 6:
         #     print(f"\tChecking {sourceNode}->{targetNode}:T{timeStep} for {agentID}, ignoring {ignoredAgentID}")
-        reserver = self.reservationTable[timeStep][sourceNode][targetNode]["Reserved"]
-        # print(f"Edge: {self.reservationTable[timeStep][sourceNode][targetNode]['Reserved']}; {bool(self.reservationTable[timeStep][sourceNode][targetNode]['Reserved'])}")
-        validReserveStates = [str(agentID), str(ignoredAgentID), False]
-        if reserver in validReserveStates:
-            # print("Edge reserved by self.")
-            return False
-        else:
-            # if agentID == 6:
-            #     print(f"Edge reserved by {reserver}.")
-            return True
+        return self.reservationTable.isEdgeBlocked(timeStep, sourceNode, targetNode, agentID, ignoredAgentID)
         
     def getEdgeReserver(self, timeStep, sourceNode, targetNode):
-        if sourceNode == targetNode:
-            # There is no edge between timesteps
+        # There is no edge between timesteps if sourceNode == targetNode, which reads as unreserved
+        reserver = self.reservationTable.getEdgeReserver(timeStep, sourceNode, targetNode)
+        if reserver == self.reservationTable.unreserved:
             return False
-        else:
-            reserver = self.reservationTable[timeStep][sourceNode][targetNode]["Reserved"]
-        return reserver
+        return str(reserver)
 
     def expandReservationTable(self, timeDepth):
-        self.reservationTable[timeDepth+1] = deepcopy(self.graphStructure)
-        self.preallocNodes(timeDepth+1)
-        self.preallocEdges(timeDepth+1)
+        # New time steps start out unreserved
+        self.reservationTable.ensureTimeStep(timeDepth+1)
         self.timeTracked = next(self.depthCounter)
-
-    def preallocNodes(self, timeDepth):
-        nx.set_node_attributes(self.reservationTable[timeDepth], False, "Reserved")
-
-    def preallocEdges(self, timeDepth):
-        nx.set_edge_attributes(self.reservationTable[timeDepth], False, "Reserved")
\ No newline at end of file
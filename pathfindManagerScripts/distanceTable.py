@@ -0,0 +1,178 @@
+import numpy as np
+import hashlib
+import logging
+import os
+import tempfile
+from multiprocessing import Pool
+
+# Distance reported between nodes with no path connecting them
+UNREACHABLE = np.iinfo(np.int32).max
+
+def defaultCacheDirectory():
+    # Computed tables are kept between launches, as the maps rarely change
+    # They go in the user's cache rather than beside the program, which may be installed read-only or bundled
+    if os.name == "nt":
+        cacheRoot = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Local")
+    else:
+        cacheRoot = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cacheRoot, "FleetBench", "distance_cache")
+
+# Node types an agent's goal is normally one of
+ENDPOINT_TYPES = ["deposit", "pickup", "rest", "charge"]
+
+def mapEndpoints(mapGraph):
+    # Task endpoints followed by the rest, in the order Token Passing lists them, so both share one cached table
+    taskEndpoints = [node for node, nodeData in mapGraph.nodes(data=True) if nodeData["type"] in ["deposit", "pickup"]]
+    otherEndpoints = [node for node, nodeData in mapGraph.nodes(data=True) if nodeData["type"] in ["rest", "charge"]]
+    return taskEndpoints + otherEndpoints
+
+def mapContentHash(mapIndex, endpoints):
+    # Identifies a distance table by everything it depends on: the nodes, their edges, and the endpoints searched from
+    contentHash = hashlib.sha1()
+    contentHash.update("|".join(mapIndex.nodeNames).encode())
+    contentHash.update(mapIndex.adjacencyIndptr.tobytes())
+    contentHash.update(mapIndex.adjacencyIndices.tobytes())
+    contentHash.update("|".join(endpoints).encode())
+    return contentHash.hexdigest()
+
+def loadCachedDistances(cacheDirectory, cacheKey):
+    # Memory-map a previously saved table, or return None if there isn't one
+    cachePath = os.path.join(cacheDirectory, cacheKey + ".npy")
+    if not os.path.isfile(cachePath):
+        return None
+    try:
+        return np.load(cachePath, mmap_mode="r")
+    except (OSError, ValueError):
+        logging.warning(f"Distance cache file '{cachePath}' could not be read, recomputing.")
+        return None
+
+def saveCachedDistances(cacheDirectory, cacheKey, distances):
+    # Write through a uniquely named temporary file, so concurrent workers never see or clobber a partial table
+    cachePath = os.path.join(cacheDirectory, cacheKey + ".npy")
+    temporaryPath = None
+    try:
+        os.makedirs(cacheDirectory, exist_ok=True)
+        temporaryFile, temporaryPath = tempfile.mkstemp(suffix=".tmp", prefix=cacheKey, dir=cacheDirectory)
+        with os.fdopen(temporaryFile, "wb") as cacheFile:
+            np.save(cacheFile, distances)
+        os.replace(temporaryPath, cachePath)
+    except OSError:
+        logging.warning(f"Distance table could not be cached to '{cachePath}'.")
+        if temporaryPath is not None and os.path.exists(temporaryPath):
+            os.remove(temporaryPath)
+
+def breadthFirstDistances(adjacencyIndptr, adjacencyIndices, sourceID):
+    """
+        Hop counts from the source node to every node, found level by level over a CSR adjacency
+        Each level is expanded with array operations rather than one node at a time
+    """
+    numNodes = len(adjacencyIndptr) - 1
+    distances = np.full(numNodes, UNREACHABLE, dtype=np.int32)
+    distances[sourceID] = 0
+    frontier = np.array([sourceID], dtype=np.int32)
+    depth = 0
+    while frontier.size:
+        depth = depth + 1
+        # Gather the neighbors of the whole frontier at once
+        neighborStarts = adjacencyIndptr[frontier]
+        neighborCounts = adjacencyIndptr[frontier+1] - neighborStarts
+        neighborOffsets = np.arange(neighborCounts.sum()) - np.repeat(np.cumsum(neighborCounts) - neighborCounts, neighborCounts)
+        neighbors = adjacencyIndices[np.repeat(neighborStarts, neighborCounts) + neighborOffsets]
+        # Only nodes not already reached form the next level
+        frontier = np.unique(neighbors[distances[neighbors] == UNREACHABLE])
+        distances[frontier] = depth
+    return distances
+
+def breadthFirstDistanceBlock(adjacencyIndptr, adjacencyIndices, sourceIDs):
+    # Runs several searches, one row per source, so a process can be handed a batch of endpoints
+    return np.stack([breadthFirstDistances(adjacencyIndptr, adjacencyIndices, sourceID) for sourceID in sourceIDs])
+
+class distanceTable:
+    """
+        (endpoint x node) matrix of shortest path lengths on the unweighted map graph
+        Supports the same lookups as the nested dict it replaces: table[endpoint][node]
+        Tables are cached in cacheDirectory, or the user's cache directory if it is None
+    """
+    def __init__(self, mapIndex, endpoints, processCount=1, useCache=True, cacheDirectory=None):
+        self.mapIndex = mapIndex
+        self.endpoints = list(endpoints)
+        self.endpointIndex = {endpoint: row for row, endpoint in enumerate(self.endpoints)}
+
+        # Load the table from the cache if the same map and endpoints have been seen before
+        cacheKey = mapContentHash(mapIndex, self.endpoints)
+        cacheDirectory = cacheDirectory or defaultCacheDirectory()
+        if useCache:
+            cachedDistances = loadCachedDistances(cacheDirectory, cacheKey)
+            if cachedDistances is not None and cachedDistances.shape == (len(self.endpoints), mapIndex.numNodes):
+                self.distances = cachedDistances
+                return
+
+        self.distances = self.computeDistances(processCount)
+        if useCache:
+            saveCachedDistances(cacheDirectory, cacheKey, self.distances)
+
+    def computeDistances(self, processCount):
+        mapIndex = self.mapIndex
+        sourceIDs = [mapIndex.nodeID[endpoint] for endpoint in self.endpoints]
+        if processCount > 1 and len(sourceIDs) > 1:
+            # Spread the searches over worker processes in contiguous batches
+            sourceBatches = [batch for batch in np.array_split(np.array(sourceIDs), processCount) if batch.size]
+            with Pool(len(sourceBatches)) as workerPool:
+                distanceBlocks = workerPool.starmap(breadthFirstDistanceBlock,
+                    [(mapIndex.adjacencyIndptr, mapIndex.adjacencyIndices, batch) for batch in sourceBatches])
+            return np.concatenate(distanceBlocks)
+        elif sourceIDs:
+            return breadthFirstDistanceBlock(mapIndex.adjacencyIndptr, mapIndex.adjacencyIndices, sourceIDs)
+        else:
+            return np.zeros((0, mapIndex.numNodes), dtype=np.int32)
+
+    def __getitem__(self, endpoint):
+        return distanceRow(self, self.endpointIndex[endpoint])
+
+    def __contains__(self, endpoint):
+        return endpoint in self.endpointIndex
+
+    def __len__(self):
+        return len(self.endpoints)
+
+    def __iter__(self):
+        return iter(self.endpoints)
+
+    def keys(self):
+        return self.endpointIndex.keys()
+
+    def items(self):
+        return [(endpoint, self[endpoint]) for endpoint in self.endpoints]
+
+    def getDistance(self, endpoint, node):
+        return int(self.distances[self.endpointIndex[endpoint], self.mapIndex.nodeID[node]])
+
+    def getRow(self, endpoint):
+        # Distances from every node to the endpoint, as an array indexed by node ID
+        return self.distances[self.endpointIndex[endpoint]]
+
+class distanceRow:
+    """
+        Distances from every node to a single endpoint, indexed by node name
+    """
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    def __getitem__(self, node):
+        return int(self.table.distances[self.row, self.table.mapIndex.nodeID[node]])
+
+    def __contains__(self, node):
+        return node in self.table.mapIndex.nodeID
+
+    def __len__(self):
+        return self.table.mapIndex.numNodes
+
+    def __iter__(self):
+        return iter(self.table.mapIndex.nodeNames)
+
+    def keys(self):
+        return self.table.mapIndex.nodeNames
+
+    def items(self):
+        return [(node, self[node]) for node in self.table.mapIndex.nodeNames]
@@ -0,0 +1,226 @@
+import numpy as np
+from bisect import bisect_left, insort
+
+class reservationTable:
+    """
+        Array-backed store of node and edge reservations through time, shared by the reserver classes
+        Rows are time steps, columns are node or edge indices, and each cell holds the numID of the reserving agent
+        Only time steps from 'timeOffset' onward are held; older steps are purged as the simulation advances
+        Lookups take node IDs, as the space-time searches hand them over; the name forms are for the movers and taskers
+    """
+    def __init__(self, mapIndex, timeChunkSize=64, trackNodeTimes=False):
+        # Value stored in cells which have no reservation
+        self.unreserved = -1
+        # Number of time steps added to the arrays whenever they need to grow
+        self.timeChunkSize = timeChunkSize
+
+        # Columns are the node and edge IDs of the compiled map
+        # Edges are undirected, so an agent moving a->b conflicts with one moving b->a through the same entry
+        self.mapIndex = mapIndex
+        self.nodeIndex = mapIndex.nodeID
+        self.edgeIndex = mapIndex.edgeID
+        self.nodePairEdgeIndex = mapIndex.nodePairEdgeID
+        numEdges = mapIndex.numEdges
+
+        # Row 0 of the arrays holds the time step 'timeOffset'
+        self.timeOffset = 0
+
+        # Preallocate the first chunk of time as being unreserved
+        self.timeCapacity = self.timeChunkSize
+        self.nodeReservations = np.full((self.timeCapacity, len(self.nodeIndex)), self.unreserved, dtype=np.int32)
+        self.edgeReservations = np.full((self.timeCapacity, numEdges), self.unreserved, dtype=np.int32)
+
+        # Largest number of time steps held at once over the table's life
+        self.highWaterMark = self.timeCapacity
+
+        # Latest time step anything has been reserved in; releases leave it in place, so it only ever overestimates
+        self.latestReservedTime = -1
+
+        # Number of reads made of the table, for the planning statistics
+        self.lookupCount = 0
+
+        # Optionally, the sorted time steps each agent holds on each node, mirroring nodeReservations
+        # This answers whether a node is held by anybody else over a span of time without visiting every step
+        self.trackNodeTimes = trackNodeTimes
+        self.nodeReservationTimes = [{} for nodeID in range(mapIndex.numNodes)] if trackNodeTimes else None
+
+    def ensureTimeStep(self, timeStep):
+        # Grow the arrays in whole chunks until the time step fits
+        timeRow = timeStep - self.timeOffset
+        if timeRow < self.timeCapacity:
+            return
+        numChunks = (timeRow - self.timeCapacity) // self.timeChunkSize + 1
+        newRows = numChunks * self.timeChunkSize
+        self.nodeReservations = np.concatenate((self.nodeReservations,
+            np.full((newRows, self.nodeReservations.shape[1]), self.unreserved, dtype=np.int32)))
+        self.edgeReservations = np.concatenate((self.edgeReservations,
+            np.full((newRows, self.edgeReservations.shape[1]), self.unreserved, dtype=np.int32)))
+        self.timeCapacity = self.timeCapacity + newRows
+        self.highWaterMark = max(self.highWaterMark, self.timeCapacity)
+
+    def purgePastData(self, currentTime):
+        # Drop every time step before currentTime, which can no longer be planned into
+        purgedRows = currentTime - self.timeOffset
+        # Shifting the arrays is only worth it once a whole chunk has gone stale
+        if purgedRows < self.timeChunkSize:
+            return
+        if purgedRows < self.timeCapacity:
+            # Move the retained steps to the front, reusing the freed rows for future steps
+            self.nodeReservations[:-purgedRows] = self.nodeReservations[purgedRows:]
+            self.edgeReservations[:-purgedRows] = self.edgeReservations[purgedRows:]
+            self.nodeReservations[-purgedRows:] = self.unreserved
+            self.edgeReservations[-purgedRows:] = self.unreserved
+        else:
+            # Everything held is in the past
+            self.nodeReservations.fill(self.unreserved)
+            self.edgeReservations.fill(self.unreserved)
+        self.timeOffset = currentTime
+        if self.trackNodeTimes:
+            # Forget the purged steps in the node index too
+            for agentTimes in self.nodeReservationTimes:
+                for agentID in list(agentTimes):
+                    reservedTimes = agentTimes[agentID]
+                    del reservedTimes[:bisect_left(reservedTimes, currentTime)]
+                    if not reservedTimes:
+                        del agentTimes[agentID]
+
+    def getSearchHorizon(self, currentTime, startTime=0):
+        # Time depth, relative to currentTime, by which a search begun at startTime has reached every goal it can
+        # Past the latest reservation nothing is blocked, and any node can be reached within one step per node
+        return max(self.latestReservedTime - currentTime, startTime) + self.mapIndex.numNodes
+
+    def getMemoryUsage(self):
+        # Bytes currently held by the reservation arrays
+        return self.nodeReservations.nbytes + self.edgeReservations.nbytes
+
+    def getHighWaterMark(self):
+        # Largest number of time steps, and the bytes needed for them, held at once
+        rowBytes = self.nodeReservations.itemsize * (self.nodeReservations.shape[1] + self.edgeReservations.shape[1])
+        return {"timeSteps": self.highWaterMark, "bytes": self.highWaterMark * rowBytes}
+
+    def reserveNode(self, timeStep, node, agentID):
+        # The past can't be reserved
+        if timeStep < self.timeOffset:
+            return
+        self.ensureTimeStep(timeStep)
+        self.latestReservedTime = max(self.latestReservedTime, timeStep)
+        nodeIndex = self.nodeIndex[node]
+        if self.trackNodeTimes:
+            previousReserver = int(self.nodeReservations[timeStep - self.timeOffset, nodeIndex])
+            if previousReserver != agentID:
+                # The new reservation replaces any other agent's hold on the node at this time
+                if previousReserver != self.unreserved:
+                    self.removeNodeTime(nodeIndex, previousReserver, timeStep)
+                insort(self.nodeReservationTimes[nodeIndex].setdefault(agentID, []), timeStep)
+        self.nodeReservations[timeStep - self.timeOffset, nodeIndex] = agentID
+
+    def reserveEdge(self, timeStep, sourceNode, targetNode, agentID):
+        # Waiting in place does not use an edge
+        if sourceNode == targetNode or timeStep < self.timeOffset:
+            return
+        self.ensureTimeStep(timeStep)
+        self.latestReservedTime = max(self.latestReservedTime, timeStep)
+        self.edgeReservations[timeStep - self.timeOffset, self.edgeIndex[(sourceNode, targetNode)]] = agentID
+
+    def releaseNode(self, timeStep, node, agentID):
+        # Only the agent holding the reservation can release it
+        timeRow = timeStep - self.timeOffset
+        if timeRow < 0 or timeRow >= self.timeCapacity:
+            return
+        nodeIndex = self.nodeIndex[node]
+        if self.nodeReservations[timeRow, nodeIndex] == agentID:
+            self.nodeReservations[timeRow, nodeIndex] = self.unreserved
+            if self.trackNodeTimes:
+                self.removeNodeTime(nodeIndex, agentID, timeStep)
+
+    def removeNodeTime(self, nodeIndex, agentID, timeStep):
+        reservedTimes = self.nodeReservationTimes[nodeIndex][agentID]
+        del reservedTimes[bisect_left(reservedTimes, timeStep)]
+        if not reservedTimes:
+            del self.nodeReservationTimes[nodeIndex][agentID]
+
+    def releaseEdge(self, timeStep, sourceNode, targetNode, agentID):
+        timeRow = timeStep - self.timeOffset
+        if sourceNode == targetNode or timeRow < 0 or timeRow >= self.timeCapacity:
+            return
+        edgeIndex = self.edgeIndex[(sourceNode, targetNode)]
+        if self.edgeReservations[timeRow, edgeIndex] == agentID:
+            self.edgeReservations[timeRow, edgeIndex] = self.unreserved
+
+    def getNodeReserver(self, timeStep, node):
+        # Returns the numID of the reserving agent, or -1 if the node is free
+        return self.getNodeReserverByID(timeStep, self.nodeIndex[node])
+
+    def getNodeReserverByID(self, timeStep, nodeID):
+        self.lookupCount = self.lookupCount + 1
+        timeRow = timeStep - self.timeOffset
+        if timeRow < 0 or timeRow >= self.timeCapacity:
+            return self.unreserved
+        return int(self.nodeReservations[timeRow, nodeID])
+
+    def getEdgeReserver(self, timeStep, sourceNode, targetNode):
+        # Returns the numID of the reserving agent, or -1 if the edge is free
+        self.lookupCount = self.lookupCount + 1
+        timeRow = timeStep - self.timeOffset
+        if sourceNode == targetNode or timeRow < 0 or timeRow >= self.timeCapacity:
+            return self.unreserved
+        return int(self.edgeReservations[timeRow, self.edgeIndex[(sourceNode, targetNode)]])
+
+    def getEdgeReserverByID(self, timeStep, sourceID, targetID):
+        self.lookupCount = self.lookupCount + 1
+        timeRow = timeStep - self.timeOffset
+        if sourceID == targetID or timeRow < 0 or timeRow >= self.timeCapacity:
+            return self.unreserved
+        return int(self.edgeReservations[timeRow, self.nodePairEdgeIndex[(sourceID, targetID)]])
+
+    def isNodeBlocked(self, timeStep, node, agentID, ignoredAgentID=None):
+        # The node is blocked if anybody other than the agent (or the agent it may ignore) holds it
+        return self.isNodeBlockedByID(timeStep, self.nodeIndex[node], agentID, ignoredAgentID)
+
+    def isNodeBlockedByID(self, timeStep, nodeID, agentID, ignoredAgentID=None):
+        reserver = self.getNodeReserverByID(timeStep, nodeID)
+        return not (reserver == self.unreserved or reserver == agentID or reserver == ignoredAgentID)
+
+    def isNodeBlockedDuring(self, startTime, endTime, node, agentID, ignoredAgentID=None):
+        # Whether anybody other than the agent (or the agent it may ignore) holds the node at any step in [startTime, endTime)
+        # Requires the table to have been built with trackNodeTimes
+        self.lookupCount = self.lookupCount + 1
+        for reserver, reservedTimes in self.nodeReservationTimes[self.nodeIndex[node]].items():
+            if reserver == agentID or reserver == ignoredAgentID:
+                continue
+            # The earliest step held from startTime onward decides it
+            firstIndex = bisect_left(reservedTimes, startTime)
+            if firstIndex < len(reservedTimes) and reservedTimes[firstIndex] < endTime:
+                return True
+        return False
+
+    def isEdgeBlocked(self, timeStep, sourceNode, targetNode, agentID, ignoredAgentID=None):
+        reserver = self.getEdgeReserver(timeStep, sourceNode, targetNode)
+        return not (reserver == self.unreserved or reserver == agentID or reserver == ignoredAgentID)
+
+    def isEdgeBlockedByID(self, timeStep, sourceID, targetID, agentID, ignoredAgentID=None):
+        reserver = self.getEdgeReserverByID(timeStep, sourceID, targetID)
+        return not (reserver == self.unreserved or reserver == agentID or reserver == ignoredAgentID)
+
+    def isWaitBlocked(self, timeStep, node, agentID, ignoredAgentID=None):
+        # Waiting is blocked if any edge into the node is held by another agent at this time
+        return self.isWaitBlockedByID(timeStep, self.nodeIndex[node], agentID, ignoredAgentID)
+
+    def isWaitBlockedByID(self, timeStep, nodeID, agentID, ignoredAgentID=None):
+        self.lookupCount = self.lookupCount + 1
+        timeRow = timeStep - self.timeOffset
+        if timeRow < 0 or timeRow >= self.timeCapacity:
+            return False
+        reservers = self.edgeReservations[timeRow, self.mapIndex.neighborEdgeIDs[nodeID]]
+        blocked = (reservers != self.unreserved) & (reservers != agentID)
+        if ignoredAgentID is not None:
+            blocked = blocked & (reservers != ignoredAgentID)
+        return bool(blocked.any())
+
+    def getReservationsByAgent(self, agentID, startTime, endTime):
+        # Lists the (time, node) pairs reserved by the agent, for debugging
+        startRow = max(startTime - self.timeOffset, 0)
+        endRow = min(endTime - self.timeOffset, self.timeCapacity)
+        nodeNames = self.mapIndex.nodeNames
+        timeRows, nodeIndices = np.nonzero(self.nodeReservations[startRow:endRow] == agentID)
+        return [(int(timeRow) + startRow + self.timeOffset, nodeNames[nodeIndex]) for timeRow, nodeIndex in zip(timeRows, nodeIndices)]
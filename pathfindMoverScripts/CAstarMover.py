@@ -78,7 +78,7 @@ class CAstarMover:
                 # Examine neighbors to find the ideal movement for the agent
                 currentAgent = self.agentManager.agentList[agentID]
                 currentNode = currentAgent.currentNode
-                neighbors = list(self.mapGraph.neighbors(currentNode)) + [currentNode]
+                neighbors = self.mapGraph.graph["mapIndex"].nodeMoves[currentNode]
                 targetNode = currentAgent.returnTargetNode()
                 # Default distance is infinite, such that any other distance is superior
                 winnerDist = Inf
@@ -247,7 +247,7 @@ class CAstarMover:
         # print("Seeking free neighbors . . .")
         # Determine which neighboring nodes are available as-is
         validNeighbors = []
-        neighbors = list(self.mapGraph.neighbors(agentData.currentNode))
+        neighbors = self.mapGraph.graph["mapIndex"].nodeNeighbors[agentData.currentNode]
         # Checking neighbors
         for i, neighbor in enumerate(neighbors):
             valid = self.sharedInfoManager.evaluateNodeEligibility(0, neighbor, agentData.currentNode, agentData.numID)
@@ -263,7 +263,7 @@ class CAstarMover:
         # print(self.agentPriorityList)
         # Determine which neighboring nodes are possible to overwrite
         validNeighbors = []
-        neighbors = list(self.mapGraph.neighbors(agentData.currentNode))
+        neighbors = self.mapGraph.graph["mapIndex"].nodeNeighbors[agentData.currentNode]
         # If no valid free neighbors were found, then the agent needs to be willing to overwrite an agent's plan
         for i, neighbor in enumerate(neighbors):
             valid = self.sharedInfoManager.evaluateNodeOverwritability(0, neighbor, agentData.currentNode, agentData.numID, self.agentPriorityList)
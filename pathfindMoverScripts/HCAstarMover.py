@@ -78,7 +78,7 @@ class HCAstarMover:
                 # Agent is completely blocked in, unable to avoid collision via reservation table
                 # Examine neighbors to find the ideal movement for the agent
                 currentNode = self.agentManager.agentList[agentID].currentNode
-                neighbors = list(self.mapGraph.neighbors(currentNode)) + [currentNode]
+                neighbors = self.mapGraph.graph["mapIndex"].nodeMoves[currentNode]
                 targetNode = self.agentManager.agentList[agentID].returnTargetNode()
                 # Default distance is infinite, such that any other distance is superior
                 winnerDist = Inf
@@ -224,7 +224,7 @@ class HCAstarMover:
         # print("Seeking free neighbors . . .")
         # Determine which neighboring nodes are available as-is
         validNeighbors = []
-        neighbors = list(self.mapGraph.neighbors(agentData.currentNode))
+        neighbors = self.mapGraph.graph["mapIndex"].nodeNeighbors[agentData.currentNode]
         # Checking neighbors
         for i, neighbor in enumerate(neighbors):
             valid = self.sharedInfoManager.evaluateNodeEligibility(0, neighbor, agentData.currentNode, agentData.numID)
@@ -240,7 +240,7 @@ class HCAstarMover:
         # print(self.agentPriorityList)
         # Determine which neighboring nodes are possible to overwrite
         validNeighbors = []
-        neighbors = list(self.mapGraph.neighbors(agentData.currentNode))
+        neighbors = self.mapGraph.graph["mapIndex"].nodeNeighbors[agentData.currentNode]
         # If no valid free neighbors were found, then the agent needs to be willing to overwrite an agent's plan
         for i, neighbor in enumerate(neighbors):
             valid = self.sharedInfoManager.evaluateNodeOverwritability(0, neighbor, agentData.currentNode, agentData.numID, self.agentPriorityList)
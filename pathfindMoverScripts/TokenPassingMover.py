@@ -1,3 +1,4 @@
+import logging
 import networkx as nx
 
 class TokenPassingMover:
@@ -110,7 +111,7 @@ class TokenPassingMover:
         for edge, agents in edgeDict.items():
             if len(agents) > 1:
                 self.conflictFound = True
-                print("EDGE CONFLICT")
+                logging.debug("EDGE CONFLICT")
                 raise ValueError
                 # self.resolveEdgeConflict(agents[0], agents[1])
                 # print(f"New motions: {self.agentMotionDict}")
@@ -119,7 +120,7 @@ class TokenPassingMover:
         for node, agents in vertexDict.items():
             if len(agents) > 1:
                 self.conflictFound = True
-                print("VERTEX CONFLICT")
+                logging.debug("VERTEX CONFLICT")
                 raise ValueError
                 # self.resolveNodeConflict(agents)
                 # print(f"New motions: {self.agentMotionDict}")
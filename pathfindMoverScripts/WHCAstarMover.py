@@ -1,3 +1,4 @@
+import logging
 import networkx as nx
 from numpy import Inf
 
@@ -81,7 +82,7 @@ class WHCAstarMover:
                 # Agent is completely blocked in, unable to avoid collision via reservation table
                 # Examine neighbors to find the ideal movement for the agent
                 currentNode = self.agentManager.agentList[agentID].currentNode
-                neighbors = list(self.mapGraph.neighbors(currentNode)) + [currentNode]
+                neighbors = self.mapGraph.graph["mapIndex"].nodeMoves[currentNode]
                 targetNode = self.agentManager.agentList[agentID].returnTargetNode()
                 # Default distance is infinite, such that any other distance is superior
                 winnerDist = Inf
@@ -122,7 +123,7 @@ class WHCAstarMover:
         for edge, agents in edgeDict.items():
             if len(agents) > 1:
                 self.conflictFound = True
-                print("EDGE CONFLICT")
+                logging.debug("EDGE CONFLICT")
                 self.resolveEdgeConflict(agents[0], agents[1])
                 # print(f"New motions: {self.agentMotionDict}")
                 return agents
@@ -130,7 +131,7 @@ class WHCAstarMover:
         for node, agents in vertexDict.items():
             if len(agents) > 1:
                 self.conflictFound = True
-                print("VERTEX CONFLICT")
+                logging.debug("VERTEX CONFLICT")
                 self.resolveNodeConflict(agents)
                 # print(f"New motions: {self.agentMotionDict}")
                 return agents
@@ -227,7 +228,7 @@ class WHCAstarMover:
         # print("Seeking free neighbors . . .")
         # Determine which neighboring nodes are available as-is
         validNeighbors = []
-        neighbors = list(self.mapGraph.neighbors(agentData.currentNode))
+        neighbors = self.mapGraph.graph["mapIndex"].nodeNeighbors[agentData.currentNode]
         # Checking neighbors
         for i, neighbor in enumerate(neighbors):
             valid = self.sharedInfoManager.evaluateNodeEligibility(0, neighbor, agentData.currentNode, agentData.numID)
@@ -243,7 +244,7 @@ class WHCAstarMover:
         # print(self.agentPriorityList)
         # Determine which neighboring nodes are possible to overwrite
         validNeighbors = []
-        neighbors = list(self.mapGraph.neighbors(agentData.currentNode))
+        neighbors = self.mapGraph.graph["mapIndex"].nodeNeighbors[agentData.currentNode]
         # If no valid free neighbors were found, then the agent needs to be willing to overwrite an agent's plan
         for i, neighbor in enumerate(neighbors):
             valid = self.sharedInfoManager.evaluateNodeOverwritability(0, neighbor, agentData.currentNode, agentData.numID, self.agentPriorityList)
@@ -1,3 +1,4 @@
+import logging
 import networkx as nx
 from numpy import Inf
 
@@ -31,8 +32,8 @@ class defaultAgentMover:
         self.agentMotionDict[agent.numID] = desiredMove
 
     def checkAgentCollisions(self):
-        print("CHECKING AGENT COLLISIONS . . .")
-        print(self.agentMotionDict)
+        logging.debug("CHECKING AGENT COLLISIONS . . .")
+        logging.debug(self.agentMotionDict)
         vertexDict, edgeDict = self.comprehendAgentMotions()
         conflicts = self.checkForConflicts(vertexDict, edgeDict)
         # print(self.agentMotionDict)
@@ -86,14 +87,14 @@ class defaultAgentMover:
         for edge, agents in edgeDict.items():
             if len(agents) > 1:
                 self.conflictFound = True
-                print("EDGE CONFLICT")
+                logging.debug("EDGE CONFLICT")
                 # Force a replan by returning an incomplete action list
                 return ("crash", agents)
 
         for node, agents in vertexDict.items():
             if len(agents) > 1:
                 self.conflictFound = True
-                print("VERTEX CONFLICT")
+                logging.debug("VERTEX CONFLICT")
                 # Force a replan by returning an incomplete action list
                 # Higher priority agent should just move in
                 plannedPath = list(self.agentMotionDict[agents[0]])
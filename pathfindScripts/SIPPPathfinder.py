@@ -0,0 +1,267 @@
+import networkx as nx
+from heapq import heappop, heappush
+from itertools import count
+from numpy import inf
+from pathfindScripts.heuristics import getMapHeuristics
+from pathfindScripts.pathfinderBase import pathfinderBase
+import pprint
+pp = pprint.PrettyPrinter(indent=4)
+import copy
+
+class SIPPPathfinder(pathfinderBase):
+    """
+        Class which persists the state of pathfinding
+        Safe Interval Path Planning searches (node, safe interval) states rather than (node, time) pairs,
+        so a run of waits in one interval is a single expansion rather than one per time step
+    """
+    def __init__(self, numID, mapCanvas, mapGraph, sourceNode, targetNode, config, pathManager, agentData=None, simulationSettings=None):
+        # Verify that the requested nodes exist in the graph first
+        if not mapGraph.has_node(sourceNode) and not mapGraph.has_node(targetNode):
+            msg = f"Either source {sourceNode} or target {targetNode} is not in graph."
+            raise nx.NodeNotFound(msg)
+
+        # Heuristic coefficient is limited, has to be greater than 1
+        if config["heuristicCoefficient"] < 1:
+            config["heuristicCoefficient"] = 1
+
+        # If a pathfind operation can be attempted, save the inputs
+        self.numID = numID
+        self.sourceNode = sourceNode
+        self.targetNode = targetNode
+        self.heuristic = config["heuristic"]
+        self.heuristicCoefficient = config["heuristicCoefficient"]
+        self.collisionBehavior = config["agentCollisionsValue"]
+        self.mapGraphRef = mapGraph
+        self.nodeNeighbors = mapGraph.graph["mapIndex"].nodeNeighbors
+        self.mapCanvas = mapCanvas
+        self.invalid = False
+        self.pathManager = pathManager
+        self.currentStep = 1
+
+        # Heuristic accepts two nodes and calculates a "distance" estimate that must be admissible
+        # The heuristics are built once per map and shared by every pathfinder
+        self.heuristicFunc = getMapHeuristics(mapGraph).getHeuristic(self.heuristic)
+
+        # Data used for tracking pathfinder performance
+        self.searchOps = count()
+        self.expansionCount = 0
+        self.generatedCount = 0
+        self.peakOpenSetSize = 0
+
+        # Stored ideal path, which agent should follow unless not possible
+        self.plannedPath = []
+
+        # Set the start of the search up
+        self.initializeSearch()
+
+    def initializeSearch(self):
+        # States are (node, interval index) pairs, scored by the earliest time step the node can be reached in that interval
+        self.gScore = {} # gScore is the earliest arrival time at the state
+        self.cameFrom = {} # cameFrom holds the state the agent waited in, and then moved from, to reach the state
+        self.closedSet = set()
+        # Safe intervals of each node for this agent, read from the reserver once per search
+        self.safeIntervals = {}
+
+        # The openset, populated with the first state
+        # The first element in the format is the fScore, minimizing this is an objective
+        # The second element is a counter, used to break ties in the fScore
+        self.counter = count()
+        self.openSet = []
+        if self.targetNode is not None and self.sourceNode is not None:
+            sourceIntervals = self.getSafeIntervals(self.sourceNode)
+            if sourceIntervals[0][0] > 0:
+                # The agent's own node is held by another agent right now, so all it can do is leave at once
+                sourceIntervals.insert(0, (0, 1))
+            self.gScore[(self.sourceNode, 0)] = 0
+            heappush(self.openSet, (self.heuristicFunc(self.sourceNode, self.targetNode) * self.heuristicCoefficient,
+                next(self.counter), self.sourceNode, 0))
+
+    def getSafeIntervals(self, node):
+        if node not in self.safeIntervals:
+            if self.collisionBehavior == "Respected":
+                self.safeIntervals[node] = self.pathManager.getSafeIntervals(node, self.numID)
+            else:
+                # Collisions are ignored, so every node is always safe
+                self.safeIntervals[node] = [(0, inf)]
+        return self.safeIntervals[node]
+
+    def returnNextMove(self):
+        try:
+            nextNode = self.plannedPath[self.currentStep]
+            return nextNode
+        except IndexError:
+            # Path complete
+            return None
+
+    def agentTookStep(self):
+        self.currentStep = self.currentStep + 1
+
+    def __copy__(self):
+        # Used to export data about the pathfinder's current state for reinit
+        pathfinderData = {
+            "sourceNode": self.sourceNode,
+            "targetNode": self.targetNode,
+            "counter": next(self.counter),
+            "searchOps": next(self.searchOps),
+            "plannedPath": copy.deepcopy(self.plannedPath)
+        }
+        return pathfinderData
+
+    def __load__(self, pathfinderData):
+        # All fields required for this to work properly
+        self.sourceNode = pathfinderData["sourceNode"]
+        self.targetNode = pathfinderData["targetNode"]
+        self.counter = count(start=pathfinderData["counter"]-1, step=1)
+        self.searchOps = count(start=pathfinderData["searchOps"]-1, step=1)
+        self.plannedPath = copy.deepcopy(pathfinderData["plannedPath"])
+
+    def __reset__(self):
+        # Reset the pathfinder to its default state, effectively restarting the search
+        # Release any claims on the path reservation table
+        self.pathManager.handlePathRelease(self.plannedPath[self.currentStep-1:], self.numID)
+        self.currentStep = 1
+
+        # Stored ideal path, which agent should follow unless not possible
+        self.plannedPath = []
+        self.initializeSearch()
+
+        # Data used for tracking pathfinder performance
+        self.searchOps = count()
+        self.expansionCount = 0
+        self.generatedCount = 0
+        self.peakOpenSetSize = 0
+
+        # Further, flag this pathfinder as invalid
+        self.invalid = True
+
+    def reconstructPath(self, state):
+        # Walk back through the states, then replay them forward as one node per time step
+        stateChain = [state]
+        while stateChain[-1] in self.cameFrom:
+            stateChain.append(self.cameFrom[stateChain[-1]])
+        stateChain.reverse()
+        path = [self.sourceNode]
+        for parentState, childState in zip(stateChain, stateChain[1:]):
+            # Wait in the parent's node until the step before arriving, then move
+            path.extend([parentState[0]] * (self.gScore[childState] - 1 - self.gScore[parentState]))
+            path.append(childState[0])
+        return path
+
+    def findSuccessors(self, currentNode, intervalIndex):
+        # Yields the states reachable from the current state, with their earliest arrival time
+        arrivalTime = self.gScore[(currentNode, intervalIndex)]
+        # The agent can stay in the current node until its safe interval ends
+        intervalEnd = self.getSafeIntervals(currentNode)[intervalIndex][1]
+        for neighborNode in self.nodeNeighbors[currentNode]:
+            for neighborIntervalIndex, (neighborStart, neighborEnd) in enumerate(self.getSafeIntervals(neighborNode)):
+                if neighborStart > intervalEnd:
+                    # Leaving this late would mean staying in the current node past its safe interval
+                    break
+                # Earliest arrival in the neighbor's interval, moving no earlier than the step after reaching the current node
+                neighborArrival = max(arrivalTime + 1, neighborStart)
+                latestArrival = min(intervalEnd, neighborEnd - 1)
+                # Other agents crossing the edge in the opposite direction push the move back
+                while neighborArrival <= latestArrival and self.collisionBehavior == "Respected" and \
+                        self.pathManager.isEdgeBlocked(neighborArrival - 1, currentNode, neighborNode, self.numID):
+                    neighborArrival = neighborArrival + 1
+                if neighborArrival <= latestArrival:
+                    yield neighborNode, neighborIntervalIndex, neighborArrival
+
+    def getSearchStats(self):
+        return {"expanded": self.expansionCount, "generated": self.generatedCount, "peakOpenSet": self.peakOpenSetSize}
+
+    def searchStep(self):
+        # Seek the shortest path between the targetNode and agent's currentNode
+        # Account for obstacles (other agents), through the safe intervals of each node
+        # Recursively work through the queue
+        while self.openSet:
+            _, __, currentNode, intervalIndex = heappop(self.openSet)
+            if (currentNode, intervalIndex) in self.closedSet:
+                # A stale entry, superseded by an earlier arrival to the same state
+                continue
+            self.closedSet.add((currentNode, intervalIndex))
+            self.expansionCount = self.expansionCount + 1
+            if currentNode == self.targetNode:
+                # Return successfully, with the reconstructed path if the currentNode is the targetNode
+                path = self.reconstructPath((currentNode, intervalIndex))
+                if len(path) == 1:
+                    # The agent starts on its target, and has to spend a step there
+                    if self.getSafeIntervals(currentNode)[intervalIndex][1] > 1:
+                        path.append(currentNode)
+                    else:
+                        path = None
+                if path is not None:
+                    self.plannedPath = path
+                    # Update reservation table
+                    self.pathManager.handlePathPlanRequest(path, self.numID)
+                    return True
+
+            for neighborNode, neighborIntervalIndex, neighborArrival in self.findSuccessors(currentNode, intervalIndex):
+                neighborState = (neighborNode, neighborIntervalIndex)
+                # If this arrival is earlier than the currently mapped one
+                if neighborState not in self.closedSet and neighborArrival < self.gScore.get(neighborState, inf):
+                    # Then a new best path has been found to reach the neighbor state
+                    self.cameFrom[neighborState] = (currentNode, intervalIndex)
+                    self.gScore[neighborState] = neighborArrival
+                    # Calculate the fScore for the neighbor state
+                    node_fScore = neighborArrival + self.heuristicFunc(neighborNode, self.targetNode) * self.heuristicCoefficient
+                    heappush(self.openSet, (node_fScore, next(self.counter), neighborNode, neighborIntervalIndex))
+                    self.generatedCount = self.generatedCount + 1
+            self.peakOpenSetSize = max(self.peakOpenSetSize, len(self.openSet))
+            return False
+        return "wait"
+
+    def searchStepRender(self):
+        # Render the process of searching
+        # Seek the shortest path between the targetNode and agent's currentNode
+        # Account for obstacles (other agents), through the safe intervals of each node
+        while self.openSet:
+            _, __, currentNode, intervalIndex = heappop(self.openSet)
+            if (currentNode, intervalIndex) in self.closedSet:
+                # A stale entry, superseded by an earlier arrival to the same state
+                continue
+            self.closedSet.add((currentNode, intervalIndex))
+            self.expansionCount = self.expansionCount + 1
+            # Indicate tile is explored
+            self.mapCanvas.requestRender("highlight", "delete", {"highlightType": "openSet"})
+            self.mapCanvas.requestRender("highlight", "new", {"targetNodeID": currentNode, "highlightType": "pathfindHighlight", "multi": True})
+            if currentNode == self.targetNode:
+                # Return successfully, with the reconstructed path if the currentNode is the targetNode
+                path = self.reconstructPath((currentNode, intervalIndex))
+                if len(path) == 1:
+                    # The agent starts on its target, and has to spend a step there
+                    if self.getSafeIntervals(currentNode)[intervalIndex][1] > 1:
+                        path.append(currentNode)
+                    else:
+                        path = None
+                if path is not None:
+                    self.plannedPath = path
+                    self.mapCanvas.requestRender("canvasLine", "new", {"nodePath": self.plannedPath, "lineType": "pathfind"})
+                    self.pathManager.handlePathPlanRequest(path, self.numID)
+                    return True
+
+            for neighborNode, neighborIntervalIndex, neighborArrival in self.findSuccessors(currentNode, intervalIndex):
+                neighborState = (neighborNode, neighborIntervalIndex)
+                self.mapCanvas.requestRender("highlight", "new", {"targetNodeID": neighborNode, "highlightType": "openSet", "multi": True, "color": "yellow", "highlightTags": ["openSet"]})
+                # If this arrival is earlier than the currently mapped one
+                if neighborState not in self.closedSet and neighborArrival < self.gScore.get(neighborState, inf):
+                    # Then a new best path has been found to reach the neighbor state
+                    self.cameFrom[neighborState] = (currentNode, intervalIndex)
+                    self.gScore[neighborState] = neighborArrival
+                    # Calculate nodes estimated distance from the goal
+                    hScore = self.heuristicFunc(neighborNode, self.targetNode) * self.heuristicCoefficient
+                    # Calculate the fScore for the neighbor state
+                    node_fScore = neighborArrival + hScore
+                    heappush(self.openSet, (node_fScore, next(self.counter), neighborNode, neighborIntervalIndex))
+                    self.generatedCount = self.generatedCount + 1
+
+                    # Display tile scores
+                    self.mapCanvas.requestRender("text", "new", {"position": neighborNode, "text": f" g{neighborArrival}", "textType": "pathfind", "anchor": "nw"})
+                    self.mapCanvas.requestRender("text", "new", {"position": neighborNode, "text": f"h{round(hScore)} ", "textType": "pathfind", "anchor": "ne"})
+                    self.mapCanvas.requestRender("text", "new", {"position": neighborNode, "text": f"f{round(node_fScore)} ", "textType": "pathfind", "anchor": "se"})
+                    self.mapCanvas.requestRender("text", "new", {"position": neighborNode, "text": f" I{neighborIntervalIndex}", "textType": "pathfind", "anchor": "sw"})
+
+            self.mapCanvas.handleRenderQueue()
+            self.peakOpenSetSize = max(self.peakOpenSetSize, len(self.openSet))
+            return False
+        return "wait"
@@ -2,12 +2,13 @@ import networkx as nx
 from heapq import heappop, heappush
 from itertools import count
 from numpy import inf
-from numpy import sqrt
+from pathfindScripts.heuristics import getMapHeuristics
+from pathfindScripts.pathfinderBase import pathfinderBase
 import pprint
 pp = pprint.PrettyPrinter(indent=4)
 import copy
 
-class aStarPathfinder:
+class aStarPathfinder(pathfinderBase):
     """
         Class which persists the state of pathfinding
         Should contain methods for advancing the search
@@ -29,46 +30,16 @@ class aStarPathfinder:
         self.heuristicCoefficient = config["heuristicCoefficient"]
         self.collisionBehavior = config["agentCollisionsValue"]
         self.mapGraphRef = mapGraph
+        self.nodeNeighbors = mapGraph.graph["mapIndex"].nodeNeighbors
+        self.agentOccupancy = mapGraph.graph["agentOccupancy"]
         self.mapCanvas = mapCanvas
         self.invalid = False
         self.currentStep = 1
 
-        # Define the heuristic based on the input
         # Heuristic accepts two nodes and calculates a "distance" estimate that must be admissible
-        if self.heuristic == "Dijkstra":
-            def heuristic(u, v):
-                # Dijkstra's always underestimates, making it admissible, but does nothing to speed up pathfinding
-                return 0
-            self.heuristicFunc = heuristic
-        elif self.heuristic == "Manhattan":
-            def heuristic(u, v):
-                # Manhattan/taxicab distance is the absolute value of the difference 
-                uPos = self.mapGraphRef.nodes[u]['pos']
-                vPos = self.mapGraphRef.nodes[v]['pos']
-                heuristicDistance = abs(uPos['X']-vPos['X']) + abs(uPos['Y']-vPos['Y'])
-                return heuristicDistance
-            self.heuristicFunc = heuristic
-        elif self.heuristic == "Euclidean":
-            def heuristic(u, v):
-                # Euclidean/rectilinear/pythagoras distance is line length between two points
-                uPos = self.mapGraphRef.nodes[u]['pos']
-                vPos = self.mapGraphRef.nodes[v]['pos']
-                heuristicDistance = sqrt((uPos['X']-vPos['X'])**2 + (uPos['Y']-vPos['Y'])**2)
-                return heuristicDistance
-            self.heuristicFunc = heuristic
-        elif self.heuristic == "Approx. Euclidean":
-            def heuristic(u, v):
-                # An approximation of euclidean distance
-                uPos = self.mapGraphRef.nodes[u]['pos']
-                vPos = self.mapGraphRef.nodes[v]['pos']
-                delta_1 = abs(uPos['X']-vPos['X'])
-                delta_2 = abs(uPos['Y']-vPos['Y'])
-                b = max(delta_1, delta_2)
-                a = min(delta_1, delta_2)
-                heuristicDistance = b + 0.428 * a * a / b
-                return heuristicDistance
-            self.heuristicFunc = heuristic
-        
+        # The heuristics are built once per map and shared by every pathfinder
+        self.heuristicFunc = getMapHeuristics(mapGraph).getHeuristic(self.heuristic)
+
         # All edges in the graph should have a weight of "1"
         # Therefore there is no need to calculate the weights, as neighborliness is assured by .items()
         self.weight = 1
@@ -94,6 +65,9 @@ class aStarPathfinder:
 
         # Data used for tracking pathfinder performance
         self.searchOps = count()
+        self.expansionCount = 0
+        self.generatedCount = 0
+        self.peakOpenSetSize = 0
 
         # Stored ideal path, which agent should follow unless not possible
         self.plannedPath = []
@@ -172,6 +146,9 @@ class aStarPathfinder:
 
         # Data used for tracking pathfinder performance
         self.searchOps = count()
+        self.expansionCount = 0
+        self.generatedCount = 0
+        self.peakOpenSetSize = 0
 
         # Stored ideal path, which agent should follow unless not possible
         self.plannedPath = []
@@ -179,12 +156,16 @@ class aStarPathfinder:
         # Further, flag this pathfinder as invalid
         self.invalid = True
 
+    def getSearchStats(self):
+        return {"expanded": self.expansionCount, "generated": self.generatedCount, "peakOpenSet": self.peakOpenSetSize}
+
     def searchStep(self):
         # Seek the shortest path between the targetNode and agent's currentNode
         # Account for obstacles (other agents)
         # Recursively work through the queue 
         if self.openSet:
             _, __, currentNode = heappop(self.openSet)
+            self.expansionCount = self.expansionCount + 1
             if currentNode == self.targetNode:
                 # Return successfully, with the reconstructed path if the currentNode is the targetNode
                 path = [currentNode]
@@ -197,8 +178,8 @@ class aStarPathfinder:
                 self.plannedPath = path
                 return True
             
-            for neighborNode in self.mapGraphRef.neighbors(currentNode):
-                if "agent" in self.mapGraphRef.nodes(data=True)[neighborNode] and self.collisionBehavior == "Respected":
+            for neighborNode in self.nodeNeighbors[currentNode]:
+                if self.agentOccupancy.isOccupied(neighborNode) and self.collisionBehavior == "Respected":
                     # If there's an agent in the neighbor, mark it but do not evaluate as it is not traversible
                     continue
                 est_gScore = self.gScore[currentNode] + self.weight
@@ -213,9 +194,11 @@ class aStarPathfinder:
                     # If the node isn't already in the openSet, add it
                     if neighborNode not in self.fScore:
                         heappush(self.openSet, (node_fScore, next(self.counter), neighborNode))
+                        self.generatedCount = self.generatedCount + 1
                     # Update the fScore of the neighbor node
                     self.fScore[neighborNode] = node_fScore
 
+            self.peakOpenSetSize = max(self.peakOpenSetSize, len(self.openSet))
             return False
         else:
             return "wait"
@@ -228,6 +211,7 @@ class aStarPathfinder:
         # Recursively work through the queue 
         if self.openSet:
             _, __, currentNode = heappop(self.openSet)
+            self.expansionCount = self.expansionCount + 1
             # Indicate tile is explored
             self.mapCanvas.requestRender("highlight", "delete", {"highlightType": "openSet"})
             self.mapCanvas.requestRender("highlight", "new", {"targetNodeID": currentNode, "highlightType": "pathfindHighlight", "multi": True})
@@ -246,9 +230,9 @@ class aStarPathfinder:
                 # self.mapCanvas.handleRenderQueue()
                 return True
 
-            for neighborNode in self.mapGraphRef.neighbors(currentNode):
+            for neighborNode in self.nodeNeighbors[currentNode]:
                 # Indicate neighbors of currently explored tile
-                if "agent" in self.mapGraphRef.nodes(data=True)[neighborNode] and self.collisionBehavior == "Respected":
+                if self.agentOccupancy.isOccupied(neighborNode) and self.collisionBehavior == "Respected":
                     # If there's an agent in the neighbor, mark it but do not evaluate as it is not traversible
                     self.mapCanvas.requestRender("highlight", "new", {"targetNodeID": neighborNode, "highlightType": "agentHighlight", "multi": True})
                     continue
@@ -268,6 +252,7 @@ class aStarPathfinder:
                     # If the node isn't already in the openSet, add it
                     if neighborNode not in self.fScore:
                         heappush(self.openSet, (node_fScore, next(self.counter), neighborNode))
+                        self.generatedCount = self.generatedCount + 1
                     # Update the fScore of the neighbor node
                     self.fScore[neighborNode] = node_fScore
                     
@@ -278,6 +263,7 @@ class aStarPathfinder:
                     self.mapCanvas.requestRender("highlight", "new", {"targetNodeID": neighborNode, "highlightType": "pathfindHighlight", "multi": True})
 
             self.mapCanvas.handleRenderQueue()
+            self.peakOpenSetSize = max(self.peakOpenSetSize, len(self.openSet))
             return False
         else:
             return "wait"
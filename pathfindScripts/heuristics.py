@@ -0,0 +1,97 @@
+import numpy as np
+from math import sqrt
+
+def getMapHeuristics(mapGraph):
+    """
+        Returns the heuristics for the map, built once per graph and shared by every pathfinder, tasker and reserver
+    """
+    if "mapHeuristics" not in mapGraph.graph:
+        mapGraph.graph["mapHeuristics"] = mapHeuristics(mapGraph.graph["mapIndex"])
+    return mapGraph.graph["mapHeuristics"]
+
+class mapHeuristics:
+    """
+        Distance estimates between nodes, read from the coordinate arrays of the compiled map index
+        Every heuristic is available as a scalar function of two nodes, and as a batched function scoring all nodes at once
+    """
+    def __init__(self, mapIndex):
+        self.mapIndex = mapIndex
+        self.nodeID = mapIndex.nodeID
+        # Plain lists are quicker than arrays to read one element at a time
+        self.nodeX = mapIndex.nodeX.tolist()
+        self.nodeY = mapIndex.nodeY.tolist()
+
+        self.scalarHeuristics = {
+            "Dijkstra": self.dijkstra,
+            "Manhattan": self.manhattan,
+            "Euclidean": self.euclidean,
+            "Approx. Euclidean": self.approxEuclidean
+        }
+        self.batchHeuristics = {
+            "Dijkstra": self.batchDijkstra,
+            "Manhattan": self.batchManhattan,
+            "Euclidean": self.batchEuclidean,
+            "Approx. Euclidean": self.batchApproxEuclidean
+        }
+
+    def getHeuristic(self, heuristicID):
+        # Heuristic accepts two nodes and calculates a "distance" estimate that must be admissible
+        return self.scalarHeuristics[heuristicID]
+
+    def getBatchHeuristic(self, heuristicID):
+        # Heuristic accepts a node and estimates the "distance" to it from every node, as an array indexed by node ID
+        # Taskers hand over the pathfinder's scalar heuristic rather than its name, so both are accepted
+        for scalarID, scalarHeuristic in self.scalarHeuristics.items():
+            if heuristicID == scalarHeuristic:
+                heuristicID = scalarID
+                break
+        return self.batchHeuristics.get(heuristicID, None)
+
+    def dijkstra(self, u, v):
+        # Dijkstra's always underestimates, making it admissible, but does nothing to speed up pathfinding
+        return 0
+
+    def manhattan(self, u, v):
+        # Manhattan/taxicab distance is the absolute value of the difference
+        uID = self.nodeID[u]
+        vID = self.nodeID[v]
+        return abs(self.nodeX[uID]-self.nodeX[vID]) + abs(self.nodeY[uID]-self.nodeY[vID])
+
+    def euclidean(self, u, v):
+        # Euclidean/rectilinear/pythagoras distance is line length between two points
+        uID = self.nodeID[u]
+        vID = self.nodeID[v]
+        return sqrt((self.nodeX[uID]-self.nodeX[vID])**2 + (self.nodeY[uID]-self.nodeY[vID])**2)
+
+    def approxEuclidean(self, u, v):
+        # An approximation of euclidean distance
+        uID = self.nodeID[u]
+        vID = self.nodeID[v]
+        delta_1 = abs(self.nodeX[uID]-self.nodeX[vID])
+        delta_2 = abs(self.nodeY[uID]-self.nodeY[vID])
+        b = max(delta_1, delta_2)
+        a = min(delta_1, delta_2)
+        if b == 0:
+            # The nodes are the same, and the formula would divide by zero
+            return 0
+        return b + 0.428 * a * a / b
+
+    def batchDijkstra(self, v):
+        return np.zeros(self.mapIndex.numNodes, dtype=np.int32)
+
+    def batchManhattan(self, v):
+        vID = self.nodeID[v]
+        return np.abs(self.mapIndex.nodeX - self.nodeX[vID]) + np.abs(self.mapIndex.nodeY - self.nodeY[vID])
+
+    def batchEuclidean(self, v):
+        vID = self.nodeID[v]
+        return np.sqrt((self.mapIndex.nodeX - self.nodeX[vID])**2 + (self.mapIndex.nodeY - self.nodeY[vID])**2)
+
+    def batchApproxEuclidean(self, v):
+        vID = self.nodeID[v]
+        delta_1 = np.abs(self.mapIndex.nodeX - self.nodeX[vID])
+        delta_2 = np.abs(self.mapIndex.nodeY - self.nodeY[vID])
+        b = np.maximum(delta_1, delta_2)
+        a = np.minimum(delta_1, delta_2)
+        # The node itself has no distance, and would otherwise divide by zero
+        return np.where(b > 0, b + 0.428 * a * a / np.maximum(b, 1), 0)
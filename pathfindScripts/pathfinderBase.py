@@ -0,0 +1,17 @@
+class pathfinderBase:
+    """
+        Behavior shared by every pathfinder
+        Subclasses advance their search one expansion at a time with searchStep, and keep the path they find in plannedPath
+    """
+    def searchToCompletion(self, maxExpansions=None):
+        # Runs the search until it ends, without a trip through the state machine for every expansion
+        # Returns the planned path, "wait" if no path could be found, or False if maxExpansions ran out first
+        expansionCount = 0
+        while maxExpansions is None or expansionCount < maxExpansions:
+            pathStatus = self.searchStep()
+            if pathStatus is True:
+                return self.plannedPath
+            elif pathStatus == "wait":
+                return "wait"
+            expansionCount = expansionCount + 1
+        return False
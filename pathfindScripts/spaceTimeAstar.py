@@ -0,0 +1,204 @@
+from heapq import heappop, heappush
+from itertools import count
+
+def getMapSearchBuffers(mapGraph):
+    """
+        Returns the space-time search buffers for the map, built once per graph and shared by every pathfinder and tasker
+    """
+    if "mapSearchBuffers" not in mapGraph.graph:
+        mapGraph.graph["mapSearchBuffers"] = spaceTimeBuffers(mapGraph.graph["mapIndex"].numNodes)
+    return mapGraph.graph["mapSearchBuffers"]
+
+class spaceTimeBuffers:
+    """
+        The per-state lists of a space-time search, as flat lists indexed by (timeDepth - startTime) * numNodes + nodeID
+        Kept between searches and grown a block of time steps at a time as deeper states are reached
+        Only one search runs at a time, so one set of buffers serves every search on a map
+    """
+    def __init__(self, numNodes, blockDepth=32):
+        self.numNodes = numNodes
+        self.reachedBy = [] # Number of the search which last reached the state
+        self.cameFrom = [] # ID of the node the state was reached from, one time step earlier
+        self.bufferDepth = 0 # Time steps the buffers have room for
+        self.blockDepth = blockDepth
+        self.searchNumber = 0 # Number of the search currently using the buffers
+
+    def newSearch(self):
+        # Bumping the number resets the buffers without touching them
+        self.searchNumber = self.searchNumber + 1
+        return self.searchNumber
+
+    def grow(self, depthOffset):
+        # Makes room for states depthOffset time steps past startTime
+        if depthOffset < self.bufferDepth:
+            return
+        addedDepth = (depthOffset // self.blockDepth + 1) * self.blockDepth - self.bufferDepth
+        self.reachedBy.extend([0] * (addedDepth * self.numNodes))
+        self.cameFrom.extend([0] * (addedDepth * self.numNodes))
+        self.bufferDepth = self.bufferDepth + addedDepth
+
+class spaceTimeAstar:
+    """
+        A* over (node, timeDepth) states, shared by the cooperative pathfinders and the taskers' path searches
+        Callers supply the move eligibility, goal test and heuristic for each search, which stops expanding
+        at a time horizon past which every goal that can be reached would have been
+        Nodes are handled by their IDs in the compiled map index, and only the finished path is given as node names
+    """
+    def __init__(self, mapIndex, weight=1, searchBuffers=None):
+        self.nodeID = mapIndex.nodeID
+        self.nodeMoveIDs = mapIndex.nodeMoveIDs
+        self.nodeNames = mapIndex.nodeNames
+        self.numNodes = mapIndex.numNodes
+        # All edges in the graph have the same weight, so the gScore of a state grows with its time depth
+        self.weight = weight
+
+        # Every move, waiting included, costs the same weight and takes one time step,
+        # so each path to a state has the same gScore and the first one found is kept.
+        # The search then only has to know which states it has reached, and from which node,
+        # which it keeps in buffers that are usually the map's shared ones
+        self.searchBuffers = searchBuffers if searchBuffers is not None else spaceTimeBuffers(self.numNodes)
+        self.searchNumber = None # Number the buffers gave the current search
+        self.depthGScore = [0] # gScore of the states at each time depth past startTime
+        # The heap queue pulls the smallest (fScore, counter, node, timeDepth) entry, the counter breaking fScore ties
+        self.openSet = []
+        self.counter = count()
+
+        # Totals of search effort over every search run with this instance
+        self.expansionCount = 0
+        self.generatedCount = 0
+        self.peakOpenSetSize = 0
+        self.failedCount = 0 # Runs which ended without a path
+
+    def start(self, sourceID, startTime, isMoveEligible, isGoal, heuristicScore, searchHorizon=None):
+        # Begins a new search from the source node at startTime
+        # isMoveEligible(timeDepth, neighborID, currentID) and isGoal(nodeID, timeDepth) decide the search space,
+        # heuristicScore(nodeID) estimates the remaining distance, and searchHorizon(startTime) bounds the time depth
+        self.isMoveEligible = isMoveEligible
+        self.isGoal = isGoal
+        self.heuristicScore = heuristicScore
+        self.searchHorizon = searchHorizon
+        self.startTime = startTime
+        self.sourceID = sourceID
+
+        self.searchNumber = self.searchBuffers.newSearch()
+        self.openSet.clear()
+        self.counter = count()
+        self.maxTimeDepth = self.getSearchHorizon()
+
+        heappush(self.openSet, (0, next(self.counter), sourceID, startTime))
+        self.searchBuffers.grow(0)
+        self.searchBuffers.reachedBy[sourceID] = self.searchNumber
+
+    def getDepthGScore(self, depthOffset):
+        # gScore of the states depthOffset time steps past startTime, summed one move at a time as a path would be
+        depthGScore = self.depthGScore
+        while len(depthGScore) <= depthOffset:
+            depthGScore.append(depthGScore[-1] + self.weight)
+        return depthGScore[depthOffset]
+
+    def getSearchHorizon(self):
+        # Without reservations, any node that can be reached is reached within numNodes steps
+        if self.searchHorizon is None:
+            return self.startTime + self.numNodes
+        return self.searchHorizon(self.startTime)
+
+    def withinHorizon(self, timeDepth):
+        # Whether states at timeDepth may still be expanded
+        if timeDepth < self.maxTimeDepth:
+            return True
+        # Reservations made since the search began can push the horizon back
+        self.maxTimeDepth = self.getSearchHorizon()
+        return timeDepth < self.maxTimeDepth
+
+    def popState(self):
+        # Returns the best open state as (nodeID, timeDepth), or None once the open set is exhausted
+        # A state enters the open set only when first reached, so none is popped twice
+        if self.searchNumber is not None and self.searchNumber != self.searchBuffers.searchNumber:
+            # Another search has used the shared buffers since this one began, so this one starts over
+            self.start(self.sourceID, self.startTime, self.isMoveEligible, self.isGoal, self.heuristicScore, self.searchHorizon)
+        if not self.openSet:
+            return None
+        _, __, currentID, timeDepth = heappop(self.openSet)
+        self.expansionCount = self.expansionCount + 1
+        return (currentID, timeDepth)
+
+    def expandState(self, currentID, timeDepth):
+        # Adds the eligible successors of the state one time step on, including waiting in place
+        if not self.withinHorizon(timeDepth):
+            return
+        successorDepth = timeDepth + 1
+        depthOffset = successorDepth - self.startTime
+        self.searchBuffers.grow(depthOffset)
+        reachedBy = self.searchBuffers.reachedBy
+        cameFrom = self.searchBuffers.cameFrom
+        searchNumber = self.searchNumber
+        openSet = self.openSet
+        counter = self.counter
+        isMoveEligible = self.isMoveEligible
+        heuristicScore = self.heuristicScore
+        rowStart = depthOffset * self.numNodes
+        est_gScore = self.getDepthGScore(depthOffset)
+        for neighborID in self.nodeMoveIDs[currentID]:
+            if not isMoveEligible(timeDepth, neighborID, currentID):
+                continue
+            # A state reached before already has as good a path, so it is not added again
+            stateIndex = rowStart + neighborID
+            if reachedBy[stateIndex] == searchNumber:
+                continue
+            reachedBy[stateIndex] = searchNumber
+            cameFrom[stateIndex] = currentID
+            heappush(openSet, (est_gScore + heuristicScore(neighborID), next(counter), neighborID, successorDepth))
+            self.generatedCount = self.generatedCount + 1
+        self.peakOpenSetSize = max(self.peakOpenSetSize, len(openSet))
+
+    def pushSuccessor(self, currentID, timeDepth, neighborID):
+        # Adds a single successor whose eligibility the caller has checked, for searches which render each move
+        # Returns the (gScore, hScore, fScore) it was added with, or None if the state was already reached
+        depthOffset = timeDepth + 1 - self.startTime
+        self.searchBuffers.grow(depthOffset)
+        stateIndex = depthOffset * self.numNodes + neighborID
+        if self.searchBuffers.reachedBy[stateIndex] == self.searchNumber:
+            return None
+        self.searchBuffers.reachedBy[stateIndex] = self.searchNumber
+        self.searchBuffers.cameFrom[stateIndex] = currentID
+        est_gScore = self.getDepthGScore(depthOffset)
+        hScore = self.heuristicScore(neighborID)
+        node_fScore = est_gScore + hScore
+        heappush(self.openSet, (node_fScore, next(self.counter), neighborID, timeDepth+1))
+        self.generatedCount = self.generatedCount + 1
+        self.peakOpenSetSize = max(self.peakOpenSetSize, len(self.openSet))
+        return (est_gScore, hScore, node_fScore)
+
+    def getStats(self):
+        # Search effort in the form the simulation's planning statistics take it
+        return {"expanded": self.expansionCount, "generated": self.generatedCount, "peakOpenSet": self.peakOpenSetSize}
+
+    def reconstructPath(self, endID, timeDepth):
+        # Follows the best parents back from the state, returning the names of the nodes from source to endID
+        nodeNames = self.nodeNames
+        cameFrom = self.searchBuffers.cameFrom
+        numNodes = self.numNodes
+        path = [nodeNames[endID]]
+        nodeID = endID
+        # Each state was reached from the one a time step earlier, back to the source at startTime
+        for depthOffset in range(timeDepth - self.startTime, 0, -1):
+            nodeID = cameFrom[depthOffset * numNodes + nodeID]
+            path.append(nodeNames[nodeID])
+        path.reverse()
+        return path
+
+    def run(self, maxExpansions=None):
+        # Searches until a goal state is expanded, returning its path
+        # Returns False if the open set empties or maxExpansions runs out first
+        expansions = 0
+        while maxExpansions is None or expansions < maxExpansions:
+            state = self.popState()
+            if state is None:
+                break
+            currentID, timeDepth = state
+            if self.isGoal(currentID, timeDepth):
+                return self.reconstructPath(currentID, timeDepth)
+            self.expandState(currentID, timeDepth)
+            expansions = expansions + 1
+        self.failedCount = self.failedCount + 1
+        return False
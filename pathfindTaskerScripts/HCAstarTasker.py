@@ -1,13 +1,13 @@
-import random
 from heapq import heappop, heappush
 from itertools import count
 from numpy import Inf
+from pathfindTaskerScripts.taskNodeSampler import taskNodeSampler
 
 class HCAstarTasker:
     """
         Fallback method for generating and assigning tasks
     """
-    def __init__(self, pickupNodes, depositNodes, nodeWeights, validNodes, canvasRef, graphRef, infoShareManager, simAgentManager, simTaskManager, simulationSettings):
+    def __init__(self, pickupNodes, depositNodes, nodeWeights, validNodes, canvasRef, graphRef, infoShareManager, simAgentManager, simTaskManager, simulationSettings, randomGenerator):
         self.pickupNodes = pickupNodes
         self.depositNodes = depositNodes
         self.nodeWeights = nodeWeights
@@ -18,15 +18,15 @@ class HCAstarTasker:
         self.simAgentManager = simAgentManager
         self.simTaskManager = simTaskManager
         self.simulationSettings = simulationSettings
+        self.randomGenerator = randomGenerator
 
         self.processNodeList()
 
     def processNodeList(self):
-        pass
+        self.taskGenerator = taskNodeSampler.fromSettings(self.nodeWeights, self.validNodes, self.randomGenerator, self.simulationSettings)
 
     def generateTask(self, timeStamp=0):
-        pickupNode = random.choice(list(self.pickupNodes.keys()))
-        depositNode = random.choice(list(self.depositNodes.keys()))
+        pickupNode, depositNode = self.taskGenerator.drawTask()
         timeLimit = 0
         assignee = None
         taskStatus = "unassigned"
@@ -37,8 +37,9 @@ class HCAstarTasker:
         return newTaskID
     
     def selectTaskForAgent(self, currentAgent, timeStamp=0):
-        for taskID, task in self.simTaskManager.taskList.items():
-            if task.assignee is None and task.taskStatus == "unassigned":
+        for task in self.simTaskManager.getTasksWithStatus("unassigned"):
+            taskID = task.numID
+            if task.assignee is None:
                 # Task is eligible for assignment
                 self.simTaskManager.assignAgentToTask(taskID, currentAgent, timeStamp)
                 taskRef = self.simTaskManager.taskList[taskID]
@@ -80,7 +81,7 @@ class HCAstarTasker:
                 self.infoShareManager.handlePathPlanRequest(path, agentID)
                 return path
             # If not, examine successors
-            neighborNodes = list(self.graphRef.neighbors(currentNode)) + [currentNode]
+            neighborNodes = self.graphRef.graph["mapIndex"].nodeMoves[currentNode]
             for neighborNode in neighborNodes:
                 # if agentID == 1:
                     # print(f">>>Evaluate {currentNode}->{neighborNode}>>{targetNode}: {timeDepth}")
@@ -116,7 +117,7 @@ class HCAstarTasker:
         # currentAgent.pathfinder.plannedPath = self.AStar(currentAgent.currentNode, currentAgent.currentNode, 0, currentAgent.numID)
         # currentAgent.pathfinder.currentStep = 1
         # return currentAgent.currentNode
-        targetNode = random.choice([node[0] for node in self.graphRef.nodes(data=True) if node[1]["type"] in ["rest", "charge"]])
+        targetNode = self.randomGenerator.choice([node[0] for node in self.graphRef.nodes(data=True) if node[1]["type"] in ["rest", "charge"]])
 
         # print(targetNode)
         currentAgent.targetNode = targetNode
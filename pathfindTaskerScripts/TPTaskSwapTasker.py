@@ -1,16 +1,16 @@
-import random
+from pathfindScripts.spaceTimeAstar import spaceTimeAstar, getMapSearchBuffers
 from numpy import inf
 import pprint
 pp = pprint.PrettyPrinter(indent=4)
 from heapq import heappush, heappop
-from itertools import count
 from copy import deepcopy
+from pathfindTaskerScripts.taskNodeSampler import taskNodeSampler
 
 class TPTSTasker:
     """
         Fallback method for generating and assigning tasks
     """
-    def __init__(self, pickupNodes, depositNodes, nodeWeights, validNodes, canvasRef, graphRef, infoShareManager, simAgentManager, simTaskManager, simulationSettings):
+    def __init__(self, pickupNodes, depositNodes, nodeWeights, validNodes, canvasRef, graphRef, infoShareManager, simAgentManager, simTaskManager, simulationSettings, randomGenerator):
         self.pickupNodes = pickupNodes
         self.depositNodes = depositNodes
         self.nodeWeights = nodeWeights
@@ -21,15 +21,16 @@ class TPTSTasker:
         self.simAgentManager = simAgentManager
         self.simTaskManager = simTaskManager
         self.simulationSettings = simulationSettings
+        self.randomGenerator = randomGenerator
+        self.pathSearch = None
 
         self.processNodeList()
 
     def processNodeList(self):
-        pass
+        self.taskGenerator = taskNodeSampler.fromSettings(self.nodeWeights, self.validNodes, self.randomGenerator, self.simulationSettings)
 
     def generateTask(self, timeStamp=0):
-        pickupNode = random.choice(list(self.pickupNodes.keys()))
-        depositNode = random.choice(list(self.depositNodes.keys()))
+        pickupNode, depositNode = self.taskGenerator.drawTask()
         timeLimit = 0
         assignee = None
         taskStatus = "unassigned"
@@ -56,13 +57,8 @@ class TPTSTasker:
         
         # pp.pprint(self.infoShareManager.reservedPaths)
         if availableTaskSet is None:
-            availableTaskSet = []
             # Generate a list of the possible tasks (not yet executed)
-            for taskID, task in self.simTaskManager.taskList.items():
-                validStates = ["unassigned", "retrieving"]
-                if task.taskStatus in validStates:
-                    # print(f"Valid task: {taskID}")
-                    availableTaskSet.append(taskID)
+            availableTaskSet = self.simTaskManager.getTaskIDsWithStatus("unassigned", "retrieving")
 
         # For all valid tasks in the tasklist, sort by proximity
         taskHeap = []
@@ -82,20 +78,11 @@ class TPTSTasker:
             # print(f"{currentAgent.numID}:Evaluating task {nextBestTask.numID}")
             # if nextBestTaskID == 98:
             #     print(f"\t{self.infoShareManager.reservedPaths.items()}")
-            for agent, path in self.infoShareManager.reservedPaths.items():
-                if agent == currentAgent.numID:
-                    # print("\tFound own path, skipping")
-                    # Ignore the path of the current agent
-                    continue
-                elif nextBestTask.assignee is not None and nextBestTask.assignee.numID == agent:
-                    # print(f"\tFound previous assignee's ({agent}) path, skipping")
-                    # Ignore the path of the currently assigned agent (we may overwrite this)
-                    continue
-                elif nextBestTask.pickupNode == path[-1] or nextBestTask.dropoffNode == path[-1]:
-                    # print(f"\tFound reservation by another agent ({agent}), invalid task")
-                    # Another agent is going to occupy this node, so this is not a good assignment
-                    occupied = True
-                    break
+            # Ignore the path of the current agent, and of the currently assigned agent (we may overwrite this)
+            prevAssigneeID = nextBestTask.assignee.numID if nextBestTask.assignee is not None else None
+            if self.infoShareManager.isEndpointClaimed(nextBestTask.pickupNode, currentAgent.numID, prevAssigneeID) or self.infoShareManager.isEndpointClaimed(nextBestTask.dropoffNode, currentAgent.numID, prevAssigneeID):
+                # Another agent is going to occupy this node, so this is not a good assignment
+                occupied = True
             if occupied:
                 # Try a different task
                 continue
@@ -227,8 +214,7 @@ class TPTSTasker:
             # print(self.infoShareManager.V_ntask)
             for endpoint in self.infoShareManager.V_ntask:
                 # Don't use already claimed endpoints
-                claimedEndpoints = [path[-1] for agent, path in self.infoShareManager.reservedPaths.items() if (not agent == currentAgent.numID)]
-                if endpoint in claimedEndpoints:
+                if self.infoShareManager.isEndpointClaimed(endpoint, currentAgent.numID):
                     continue
                 taskDistance = self.infoShareManager.hScores[endpoint][currentAgent.currentNode]
                 if taskDistance < winner:
@@ -242,15 +228,12 @@ class TPTSTasker:
             # print(f"Agent{currentAgent.numID} planned: {newAgentPath}")
             return True
         # Agent should attempt to find a free endpoint (path2)
-        reservedEndpoints = [path[-1] for agent, path in self.infoShareManager.reservedPaths.items() if (not agent == currentAgent.numID)]
-        taskPickupPoints = [task.pickupNode for taskID, task in self.simTaskManager.taskList.items() if not task.assignee == currentAgent]
-        taskDeliveryPoints = [task.dropoffNode for taskID, task in self.simTaskManager.taskList.items() if not task.assignee == currentAgent]
-        claimedEndpoints = reservedEndpoints + taskPickupPoints + taskDeliveryPoints
-        if currentAgent.currentNode in claimedEndpoints:
+        # Task pickup and delivery points, other than those of the agent's own task, are claimed too
+        if self.infoShareManager.isEndpointClaimed(currentAgent.currentNode, currentAgent.numID) or self.simTaskManager.isTaskEndpoint(currentAgent.currentNode, currentAgent):
             # Agent is standing on a task or claimed endpoint and needs to move
             winner = inf
             for endpoint in self.infoShareManager.V_ntask:
-                if endpoint in claimedEndpoints:
+                if self.infoShareManager.isEndpointClaimed(endpoint, currentAgent.numID) or self.simTaskManager.isTaskEndpoint(endpoint, currentAgent):
                     continue
                 hDistance = self.infoShareManager.hScores[endpoint][currentAgent.currentNode]
                 if hDistance < winner:
@@ -306,71 +289,36 @@ class TPTSTasker:
             return True
         return False
 
+    def getPathSearch(self):
+        # One search is reused for every path the tasker plans, built on first use as the map index comes after the tasker
+        if self.pathSearch is None:
+            self.pathSearch = spaceTimeAstar(self.graphRef.graph["mapIndex"], searchBuffers=getMapSearchBuffers(self.graphRef))
+        return self.pathSearch
+
     def AStar(self, sourceNode, targetNode, startTime, agentID, ignoredAgent=None):
         # print(f"{agentID} seeks {sourceNode}->{targetNode} from relative T{startTime}, ignoring {ignoredAgent}")
-        weight = 1
-        gScore = {}
-        fScore = {}
-        cameFrom = {}
-        counter = count()
-        openSet = []
-        # Set the first node
-        heappush(openSet, (0, next(counter), sourceNode, startTime))
-        gScore[(sourceNode, startTime)] = 0
-        fScore[(sourceNode, startTime)] = self.infoShareManager.hScores[targetNode][sourceNode]
-        # Begin searching
-        while openSet:
-            # Get the next best node to explore
-            _, __, currentNode, timeDepth = heappop(openSet)
-            # if agentID == 4:
-            #     print(f"Exploring {currentNode} at T+{timeDepth}")
-            #     print("?")
-            # print(f"Exploring {currentNode} at T+{timeDepth}")
-            # If it is the goal
-            if currentNode == targetNode and timeDepth != 0:
-                # Reconstruct the path from best parents
-                path = [currentNode]
-                parentNode = cameFrom.get((currentNode, timeDepth), None)
-                while parentNode is not None:
-                    path.append(parentNode[0])
-                    parentNode = cameFrom.get(parentNode, None)
-                # Reverse the path to get source->target
-                path.reverse()
-                return path
-            # If not, examine successors
-            neighborNodes = list(self.graphRef.neighbors(currentNode)) + [currentNode]
-            for neighborNode in neighborNodes:
-                # if agentID == 1:
-                # print(f">>>Evaluate {currentNode}->{neighborNode}>>{targetNode}: {timeDepth}")
-                if not self.infoShareManager.evaluateNodeEligibility(timeDepth, neighborNode, currentNode, agentID, ignoredAgent) and self.simulationSettings["agentCollisionsValue"] == "Respected":
-                    # if agentID == 0:
-                        # print(f"\tBlocked...")
-                    # print(f"{agentID}: {neighborNode} Not eligible")
-                    # Node is blocked, but if its an agent we want to ignore that is fine
-                    continue
-                if neighborNode == targetNode:
-                    if not self.infoShareManager.evaluateEndpointEligibility(timeDepth, neighborNode, agentID, ignoredAgent):
-                        # print("Endpoint reserved")
-                        # Endpoint is not available to rest in
-                        continue
-                # Node g scores increase by "weight" per step
-                est_gScore = gScore[(currentNode, timeDepth)] + weight
-                # If this estimated gScore is an improvement over the existing value (default infinity for unexpanded nodes)
-                if est_gScore < gScore.get((neighborNode, timeDepth+1), inf):
-                    # Then a new best path to this node has been found
-                    cameFrom[(neighborNode, timeDepth+1)] = (currentNode, timeDepth)
-                    # Record the new gScore
-                    gScore[(neighborNode, timeDepth+1)] = est_gScore
-                    # Calculate nodes estimated distance from the goal
-                    hScore = self.infoShareManager.hScores[targetNode][neighborNode]
-                    # Calculate the fScore for the new node
-                    node_fScore = est_gScore + hScore
-                    # If the node isn't in the openSet, it should be added
-                    if (neighborNode, timeDepth+1) not in fScore:
-                        heappush(openSet, (node_fScore, next(counter), neighborNode, timeDepth+1))
-                    # Update the node's fScore
-                    fScore[(neighborNode, timeDepth+1)] = node_fScore
-        return False
+        # Paths are searched in space-time, and endpoints have to stay free once the agent rests in them
+        # The search runs on node IDs
+        pathSearch = self.getPathSearch()
+        targetID = pathSearch.nodeID[targetNode]
+        def isMoveEligible(timeDepth, neighborID, currentID):
+            if not self.infoShareManager.evaluateMoveEligibility(timeDepth, neighborID, currentID, agentID, ignoredAgent) and self.simulationSettings["agentCollisionsValue"] == "Respected":
+                # Node is blocked, but if its an agent we want to ignore that is fine
+                return False
+            if neighborID == targetID:
+                # Endpoint is not available to rest in
+                return self.infoShareManager.evaluateEndpointEligibility(timeDepth, targetNode, agentID, ignoredAgent)
+            return True
+
+        def isGoal(nodeID, timeDepth):
+            return nodeID == targetID and timeDepth != 0
+
+        targetDistances = self.infoShareManager.hScores.getRow(targetNode).tolist()
+        def heuristicScore(nodeID):
+            return targetDistances[nodeID]
+
+        pathSearch.start(pathSearch.nodeID[sourceNode], startTime, isMoveEligible, isGoal, heuristicScore, self.infoShareManager.getSearchHorizon)
+        return pathSearch.run()
 
     def handleAimlessAgent(self, currentAgent):
         # An agent is aimless if it does not have a target node (no task assigned)
@@ -385,8 +333,7 @@ class TPTSTasker:
             # print(self.infoShareManager.V_ntask)
             for endpoint in self.infoShareManager.V_ntask:
                 # Don't use already claimed endpoints
-                claimedEndpoints = [path[-1] for agent, path in self.infoShareManager.reservedPaths.items() if (not agent == currentAgent.numID)]
-                if endpoint in claimedEndpoints:
+                if self.infoShareManager.isEndpointClaimed(endpoint, currentAgent.numID):
                     continue
                 taskDistance = self.infoShareManager.hScores[endpoint][currentAgent.currentNode]
                 if taskDistance < winner:
@@ -400,15 +347,12 @@ class TPTSTasker:
             # print(f"Agent{currentAgent.numID} planned: {newAgentPath}")
             return True
         # Agent should attempt to find a free endpoint (path2)
-        reservedEndpoints = [path[-1] for agent, path in self.infoShareManager.reservedPaths.items() if (not agent == currentAgent.numID)]
-        taskPickupPoints = [task.pickupNode for taskID, task in self.simTaskManager.taskList.items() if not task.assignee == currentAgent]
-        taskDeliveryPoints = [task.dropoffNode for taskID, task in self.simTaskManager.taskList.items() if not task.assignee == currentAgent]
-        claimedEndpoints = reservedEndpoints + taskPickupPoints + taskDeliveryPoints
-        if currentAgent.currentNode in claimedEndpoints:
+        # Task pickup and delivery points, other than those of the agent's own task, are claimed too
+        if self.infoShareManager.isEndpointClaimed(currentAgent.currentNode, currentAgent.numID) or self.simTaskManager.isTaskEndpoint(currentAgent.currentNode, currentAgent):
             # Agent is standing on a task or claimed endpoint and needs to move
             winner = inf
             for endpoint in self.infoShareManager.V_ntask:
-                if endpoint in claimedEndpoints:
+                if self.infoShareManager.isEndpointClaimed(endpoint, currentAgent.numID) or self.simTaskManager.isTaskEndpoint(endpoint, currentAgent):
                     continue
                 hDistance = self.infoShareManager.hScores[endpoint][currentAgent.currentNode]
                 if hDistance < winner:
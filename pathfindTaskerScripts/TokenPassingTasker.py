@@ -1,14 +1,13 @@
-import random
+from pathfindScripts.spaceTimeAstar import spaceTimeAstar, getMapSearchBuffers
 from numpy import inf
-from heapq import heappush, heappop
-from itertools import count
 from copy import deepcopy
+from pathfindTaskerScripts.taskNodeSampler import taskNodeSampler
 
 class TokenPassingTasker:
     """
         Fallback method for generating and assigning tasks
     """
-    def __init__(self, pickupNodes, depositNodes, nodeWeights, validNodes, canvasRef, graphRef, infoShareManager, simAgentManager, simTaskManager, simulationSettings):
+    def __init__(self, pickupNodes, depositNodes, nodeWeights, validNodes, canvasRef, graphRef, infoShareManager, simAgentManager, simTaskManager, simulationSettings, randomGenerator):
         self.pickupNodes = pickupNodes
         self.depositNodes = depositNodes
         self.nodeWeights = nodeWeights
@@ -19,15 +18,16 @@ class TokenPassingTasker:
         self.simAgentManager = simAgentManager
         self.simTaskManager = simTaskManager
         self.simulationSettings = simulationSettings
+        self.randomGenerator = randomGenerator
+        self.pathSearch = None
 
         self.processNodeList()
 
     def processNodeList(self):
-        pass
+        self.taskGenerator = taskNodeSampler.fromSettings(self.nodeWeights, self.validNodes, self.randomGenerator, self.simulationSettings)
 
     def generateTask(self, timeStamp=0):
-        pickupNode = random.choice(list(self.pickupNodes.keys()))
-        depositNode = random.choice(list(self.depositNodes.keys()))
+        pickupNode, depositNode = self.taskGenerator.drawTask()
         timeLimit = 0
         assignee = None
         taskStatus = "unassigned"
@@ -37,69 +37,40 @@ class TokenPassingTasker:
             timeStamp=timeStamp)
         return newTaskID
     
+    def getPathSearch(self):
+        # One search is reused for every path the tasker plans, built on first use as the map index comes after the tasker
+        if self.pathSearch is None:
+            self.pathSearch = spaceTimeAstar(self.graphRef.graph["mapIndex"], searchBuffers=getMapSearchBuffers(self.graphRef))
+        return self.pathSearch
+
     def AStar(self, sourceNode, targetNode, startTime, agentID, ignoredAgent=None):
         # print(f"{agentID} seeks {sourceNode}->{targetNode} from relative T{startTime}, ignoring {ignoredAgent}")
         # if sourceNode == targetNode:
         #     # Trivial path
         #     path = [sourceNode, targetNode]
         #     return path
-        weight = 1
-        gScore = {}
-        fScore = {}
-        cameFrom = {}
-        counter = count()
-        openSet = []
-        # Set the first node
-        heappush(openSet, (0, next(counter), sourceNode, startTime))
-        gScore[(sourceNode, startTime)] = 0
-        fScore[(sourceNode, startTime)] = self.infoShareManager.hScores[targetNode][sourceNode]
-        # Begin searching
-        while openSet:
-            # Get the next best node to explore
-            _, __, currentNode, timeDepth = heappop(openSet)
-            # print(f"Exploring {currentNode} at T+{timeDepth}")
-            # If it is the goal
-            if currentNode == targetNode and timeDepth != 0:
-                # Reconstruct the path from best parents
-                path = [currentNode]
-                parentNode = cameFrom.get((currentNode, timeDepth), None)
-                while parentNode is not None:
-                    path.append(parentNode[0])
-                    parentNode = cameFrom.get(parentNode, None)
-                # Reverse the path to get source->target
-                path.reverse()
-                return path
-            # If not, examine successors
-            neighborNodes = list(self.graphRef.neighbors(currentNode)) + [currentNode]
-            for neighborNode in neighborNodes:
-                # print(f">>>Evaluate {currentNode}->{neighborNode}>>{targetNode}: {timeDepth}")
-                if not self.infoShareManager.evaluateNodeEligibility(timeDepth, neighborNode, currentNode, agentID, ignoredAgent) and self.simulationSettings["agentCollisionsValue"] == "Respected":
-                    # print("Not eligible")
-                    # Node is blocked, but if its an agent we want to ignore that is fine
-                    continue
-                if neighborNode == targetNode:
-                    if not self.infoShareManager.evaluateEndpointEligibility(timeDepth, neighborNode, agentID, ignoredAgent):
-                        # print("Endpoint reserved")
-                        # Endpoint is not available to rest in
-                        continue
-                # Node g scores increase by "weight" per step
-                est_gScore = gScore[(currentNode, timeDepth)] + weight
-                # If this estimated gScore is an improvement over the existing value (default infinity for unexpanded nodes)
-                if est_gScore < gScore.get((neighborNode, timeDepth+1), inf):
-                    # Then a new best path to this node has been found
-                    cameFrom[(neighborNode, timeDepth+1)] = (currentNode, timeDepth)
-                    # Record the new gScore
-                    gScore[(neighborNode, timeDepth+1)] = est_gScore
-                    # Calculate nodes estimated distance from the goal
-                    hScore = self.infoShareManager.hScores[targetNode][neighborNode]
-                    # Calculate the fScore for the new node
-                    node_fScore = est_gScore + hScore
-                    # If the node isn't in the openSet, it should be added
-                    if (neighborNode, timeDepth+1) not in fScore:
-                        heappush(openSet, (node_fScore, next(counter), neighborNode, timeDepth+1))
-                    # Update the node's fScore
-                    fScore[(neighborNode, timeDepth+1)] = node_fScore
-        return False
+        # Paths are searched in space-time, and endpoints have to stay free once the agent rests in them
+        # The search runs on node IDs
+        pathSearch = self.getPathSearch()
+        targetID = pathSearch.nodeID[targetNode]
+        def isMoveEligible(timeDepth, neighborID, currentID):
+            if not self.infoShareManager.evaluateMoveEligibility(timeDepth, neighborID, currentID, agentID, ignoredAgent) and self.simulationSettings["agentCollisionsValue"] == "Respected":
+                # Node is blocked, but if its an agent we want to ignore that is fine
+                return False
+            if neighborID == targetID:
+                # Endpoint is not available to rest in
+                return self.infoShareManager.evaluateEndpointEligibility(timeDepth, targetNode, agentID, ignoredAgent)
+            return True
+
+        def isGoal(nodeID, timeDepth):
+            return nodeID == targetID and timeDepth != 0
+
+        targetDistances = self.infoShareManager.hScores.getRow(targetNode).tolist()
+        def heuristicScore(nodeID):
+            return targetDistances[nodeID]
+
+        pathSearch.start(pathSearch.nodeID[sourceNode], startTime, isMoveEligible, isGoal, heuristicScore, self.infoShareManager.getSearchHorizon)
+        return pathSearch.run()
 
     def selectTaskForAgent(self, currentAgent, timeStamp=0):
         validTasks = []
@@ -114,7 +85,6 @@ class TokenPassingTasker:
         #             claimedEndpoints.append(task.pickupNode)
         #             claimedEndpoints.append(task.dropoffNode) # An agent will be here at some point
         # ^ over-reserves
-        claimedEndpoints = [path[-1] for agent, path in self.infoShareManager.reservedPaths.items()]
         #  if (not agent == currentAgent.numID)
         # print(f"Finding new task for {currentAgent.numID}")
         # print(f"\tAvoid: \n\t{claimedEndpoints}")
@@ -122,12 +92,12 @@ class TokenPassingTasker:
         # An agent can reach sj1 of a task 1 that has a gj equal to that of task 2 after an agent reaches sj2
         # The agent reaching sj2 will then claim gj, and then the agent reaching sj1 cannot find a path to gj
 
-        for taskID, task in self.simTaskManager.taskList.items():
-            if task.assignee is None and task.taskStatus == "unassigned":
+        for task in self.simTaskManager.getTasksWithStatus("unassigned"):
+            if task.assignee is None:
                 # Task is eligible for assignment
                 # print(f"\tIs task '{taskID}' node sj {task.pickupNode} or gj {task.dropoffNode} in...")
                 # print(f"\t...{claimedEndpoints}")
-                if task.pickupNode in claimedEndpoints or task.dropoffNode in claimedEndpoints:
+                if self.infoShareManager.isEndpointClaimed(task.pickupNode) or self.infoShareManager.isEndpointClaimed(task.dropoffNode):
                     # Task endpoint is already claimed, so this task is invalid right now
                     # print(">>>yes, not valid")
                     continue
@@ -165,10 +135,9 @@ class TokenPassingTasker:
             # Agent is not in an endpoint, needs to move to neareset one
             winner = inf
             # print(self.infoShareManager.V_ntask)
-            # Don't use already claimed endpoints
-            claimedEndpoints = [path[-1] for agent, path in self.infoShareManager.reservedPaths.items() if (not agent == currentAgent.numID)]
             for endpoint in self.infoShareManager.V_ntask:
-                if endpoint in claimedEndpoints:
+                # Don't use already claimed endpoints
+                if self.infoShareManager.isEndpointClaimed(endpoint, currentAgent.numID):
                     continue
                 taskDistance = self.infoShareManager.hScores[endpoint][currentAgent.currentNode]
                 if taskDistance < winner:
@@ -181,16 +150,15 @@ class TokenPassingTasker:
             currentAgent.pathfinder.currentStep = 1
             # print(f"Agent{currentAgent.numID} planned: {newAgentPath}")
             return True
-        for taskID, task in self.simTaskManager.taskList.items():
-            if (task.dropoffNode == currentAgent.currentNode or task.pickupNode == currentAgent.currentNode) and task.taskStatus != "completed":
+        for task in self.simTaskManager.getTasksWithStatus("unassigned", "retrieving", "pickedUp"):
+            if task.dropoffNode == currentAgent.currentNode or task.pickupNode == currentAgent.currentNode:
                 # print(f"Agent is standing on an active task ({taskID}:{task.pickupNode}-{task.dropoffNode})endpoint, need to move")
                 # The agent is standing on an active task's deposit or pickup node, blocking other agents from ever getting there
                 # Find the nearest non-task endpoint
                 winner = inf
                 for endpoint in self.infoShareManager.V_ntask:
                     # Don't use already claimed endpoints
-                    claimedEndpoints = [path[-1] for agent, path in self.infoShareManager.reservedPaths.items() if (not agent == currentAgent.numID)]
-                    if endpoint in claimedEndpoints:
+                    if self.infoShareManager.isEndpointClaimed(endpoint, currentAgent.numID):
                         continue
                     taskDistance = self.infoShareManager.hScores[endpoint][currentAgent.currentNode]
                     if taskDistance < winner:
@@ -1,13 +1,11 @@
-import random
-from heapq import heappop, heappush
-from itertools import count
-from numpy import Inf
+from pathfindScripts.spaceTimeAstar import spaceTimeAstar, getMapSearchBuffers
+from pathfindTaskerScripts.taskNodeSampler import taskNodeSampler
 
 class defaultTasker:
     """
         Fallback method for generating and assigning tasks
     """
-    def __init__(self, pickupNodes, depositNodes, nodeWeights, validNodes, canvasRef, graphRef, infoShareManager, simAgentManager, simTaskManager, simulationSettings):
+    def __init__(self, pickupNodes, depositNodes, nodeWeights, validNodes, canvasRef, graphRef, infoShareManager, simAgentManager, simTaskManager, simulationSettings, randomGenerator):
         self.pickupNodes = pickupNodes
         self.depositNodes = depositNodes
         self.nodeWeights = nodeWeights
@@ -18,15 +16,16 @@ class defaultTasker:
         self.simAgentManager = simAgentManager
         self.simTaskManager = simTaskManager
         self.simulationSettings = simulationSettings
+        self.randomGenerator = randomGenerator
+        self.pathSearch = None
 
         self.processNodeList()
 
     def processNodeList(self):
-        pass
+        self.taskGenerator = taskNodeSampler.fromSettings(self.nodeWeights, self.validNodes, self.randomGenerator, self.simulationSettings)
 
     def generateTask(self, timeStamp=0):
-        pickupNode = random.choice(list(self.pickupNodes.keys()))
-        depositNode = random.choice(list(self.depositNodes.keys()))
+        pickupNode, depositNode = self.taskGenerator.drawTask()
         timeLimit = 0
         assignee = None
         taskStatus = "unassigned"
@@ -37,8 +36,9 @@ class defaultTasker:
         return newTaskID
     
     def selectTaskForAgent(self, currentAgent, timeStamp=0):
-        for taskID, task in self.simTaskManager.taskList.items():
-            if task.assignee is None and task.taskStatus == "unassigned":
+        for task in self.simTaskManager.getTasksWithStatus("unassigned"):
+            taskID = task.numID
+            if task.assignee is None:
                 # Task is eligible for assignment
                 self.simTaskManager.assignAgentToTask(taskID, currentAgent, timeStamp)
                 taskRef = self.simTaskManager.taskList[taskID]
@@ -50,55 +50,30 @@ class defaultTasker:
         # There were no suitable tasks
         return None
 
+    def getPathSearch(self):
+        # One search is reused for every path the tasker plans, built on first use as the map index comes after the tasker
+        if self.pathSearch is None:
+            self.pathSearch = spaceTimeAstar(self.graphRef.graph["mapIndex"], searchBuffers=getMapSearchBuffers(self.graphRef))
+        return self.pathSearch
+
     def AStar(self, sourceNode, targetNode, startTime, agentID, ignoredAgent=None):
         # print(f"{agentID} seeks {sourceNode}->{targetNode} from relative T{startTime}, ignoring {ignoredAgent}")
-        weight = 1
-        gScore = {}
-        fScore = {}
-        cameFrom = {}
-        counter = count()
-        openSet = []
-        # Set the first node
-        heappush(openSet, (0, next(counter), sourceNode, startTime))
-        gScore[(sourceNode, startTime)] = 0
-        fScore[(sourceNode, startTime)] = self.simAgentManager.agentList[agentID].pathfinder.heuristicFunc(sourceNode, targetNode)
-        # Begin searching
-        while openSet:
-            # Get the next best node to explore
-            _, __, currentNode, timeDepth = heappop(openSet)
-            # print(f"Exploring {currentNode} at T+{timeDepth}>>{targetNode}")
-            # If it is the goal
-            if currentNode == targetNode and timeDepth != 0:
-                # Reconstruct the path from best parents
-                path = [currentNode]
-                parentNode = cameFrom.get((currentNode, timeDepth), None)
-                while parentNode is not None:
-                    path.append(parentNode[0])
-                    parentNode = cameFrom.get(parentNode, None)
-                # Reverse the path to get source->target
-                path.reverse()
-                return path
-            # If not, examine successors
-            neighborNodes = list(self.graphRef.neighbors(currentNode)) + [currentNode]
-            for neighborNode in neighborNodes:
-                # Node g scores increase by "weight" per step
-                est_gScore = gScore[(currentNode, timeDepth)] + weight
-                # If this estimated gScore is an improvement over the existing value (default infinity for unexpanded nodes)
-                if est_gScore < gScore.get((neighborNode, timeDepth+1), Inf):
-                    # Then a new best path to this node has been found
-                    cameFrom[(neighborNode, timeDepth+1)] = (currentNode, timeDepth)
-                    # Record the new gScore
-                    gScore[(neighborNode, timeDepth+1)] = est_gScore
-                    # Calculate nodes estimated distance from the goal
-                    hScore = self.simAgentManager.agentList[agentID].pathfinder.heuristicFunc(neighborNode, targetNode)
-                    # Calculate the fScore for the new node
-                    node_fScore = est_gScore + hScore
-                    # If the node isn't in the openSet, it should be added
-                    if (neighborNode, timeDepth+1) not in fScore:
-                        heappush(openSet, (node_fScore, next(counter), neighborNode, timeDepth+1))
-                    # Update the node's fScore
-                    fScore[(neighborNode, timeDepth+1)] = node_fScore
-        return False
+        # Without a reservation table to consult, every move is open and only the heuristic guides the search
+        heuristicFunc = self.simAgentManager.agentList[agentID].pathfinder.heuristicFunc
+        # The search runs on node IDs
+        pathSearch = self.getPathSearch()
+        targetID = pathSearch.nodeID[targetNode]
+        def isMoveEligible(timeDepth, neighborID, currentID):
+            return True
+
+        def isGoal(nodeID, timeDepth):
+            return nodeID == targetID and timeDepth != 0
+
+        def heuristicScore(nodeID):
+            return heuristicFunc(pathSearch.nodeNames[nodeID], targetNode)
+
+        pathSearch.start(pathSearch.nodeID[sourceNode], startTime, isMoveEligible, isGoal, heuristicScore)
+        return pathSearch.run()
 
     def handleAimlessAgent(self, currentAgent):
         # Default behavior for agents with no objective is to wait in place
@@ -0,0 +1,93 @@
+import numpy as np
+
+# Triggers which generate a task whenever an agent needs or finishes one, drawing often enough to be worth batching
+blockGenerationTriggers = ["ondemand", "completed"]
+
+class aliasTable:
+    """
+        Vose's alias method over a fixed set of weighted items
+        Built once in linear time, after which each draw costs one bucket pick and one comparison
+    """
+    def __init__(self, items, weights):
+        self.items = list(items)
+        itemCount = len(self.items)
+        weights = np.asarray(weights, dtype=float)
+        if itemCount == 0 or not np.all(np.isfinite(weights)) or np.any(weights < 0) or weights.sum() <= 0:
+            raise ValueError("An alias table needs at least one item, and non-negative weights with a positive total.")
+
+        # Scale the weights so the mean bucket holds exactly 1
+        scaledWeights = weights * itemCount / weights.sum()
+        self.acceptProbability = np.ones(itemCount)
+        self.alias = np.arange(itemCount)
+        smallBuckets = [index for index in range(itemCount) if scaledWeights[index] < 1]
+        largeBuckets = [index for index in range(itemCount) if scaledWeights[index] >= 1]
+        while smallBuckets and largeBuckets:
+            # Top up an underfull bucket with the excess of an overfull one
+            smallIndex = smallBuckets.pop()
+            largeIndex = largeBuckets[-1]
+            self.acceptProbability[smallIndex] = scaledWeights[smallIndex]
+            self.alias[smallIndex] = largeIndex
+            scaledWeights[largeIndex] = scaledWeights[largeIndex] + scaledWeights[smallIndex] - 1
+            if scaledWeights[largeIndex] < 1:
+                smallBuckets.append(largeBuckets.pop())
+        # Whatever remains is full, give or take rounding
+
+    def drawIndices(self, randomGenerator, size):
+        # Draws size item indices at once from the run's random stream
+        buckets = randomGenerator.integerBlock(len(self.items), size)
+        accepted = randomGenerator.randomBlock(size) < self.acceptProbability[buckets]
+        return np.where(accepted, buckets, self.alias[buckets])
+
+class taskNodeSampler:
+    """
+        Draws the pickup and dropoff nodes of generated tasks by their configured weights
+        Only nodes marked available, with a positive weight, are drawn
+        Nodes are drawn in blocks of blockSize tasks, handed out one at a time until the block runs out
+    """
+    def __init__(self, nodeWeights, validNodes, randomGenerator, blockSize=1):
+        self.randomGenerator = randomGenerator
+        self.blockSize = blockSize
+        self.nodeTables = {}
+        for nodeType in ["pickup", "dropoff"]:
+            nodeOptions = [node for node, available in validNodes[nodeType].items() if available and nodeWeights[nodeType].get(node, 1) > 0]
+            if nodeOptions:
+                self.nodeTables[nodeType] = aliasTable(nodeOptions, [nodeWeights[nodeType].get(node, 1) for node in nodeOptions])
+            else:
+                # Scheduled runs never generate tasks, so a map without such nodes only fails if a task is asked for
+                self.nodeTables[nodeType] = None
+        self.taskBlock = []
+        self.blockPosition = 0
+
+    @classmethod
+    def fromSettings(cls, nodeWeights, validNodes, randomGenerator, simulationSettings, blockSize=256):
+        # Builds a sampler which only batches its draws for the triggers that generate tasks continually
+        if simulationSettings["taskGenerationAsAvailableTrigger"] not in blockGenerationTriggers:
+            blockSize = 1
+        return cls(nodeWeights, validNodes, randomGenerator, blockSize)
+
+    def drawTasks(self, taskCount):
+        # Returns taskCount (pickupNode, dropoffNode) pairs, drawn together
+        nodeDraws = []
+        for nodeType in ["pickup", "dropoff"]:
+            nodeTable = self.nodeTables[nodeType]
+            if nodeTable is None:
+                raise ValueError(f"No {nodeType} nodes are available to generate tasks with.")
+            nodeDraws.append([nodeTable.items[index] for index in nodeTable.drawIndices(self.randomGenerator, taskCount)])
+        return list(zip(*nodeDraws))
+
+    def drawTask(self):
+        # Returns the next (pickupNode, dropoffNode) pair, drawing another block once the current one is used up
+        if self.blockPosition >= len(self.taskBlock):
+            self.taskBlock = self.drawTasks(self.blockSize)
+            self.blockPosition = 0
+        task = self.taskBlock[self.blockPosition]
+        self.blockPosition = self.blockPosition + 1
+        return task
+
+    def getState(self):
+        # The undrawn part of the block, which a restored simulation state must hand out again
+        return self.taskBlock[self.blockPosition:]
+
+    def setState(self, samplerState):
+        self.taskBlock = list(samplerState)
+        self.blockPosition = 0
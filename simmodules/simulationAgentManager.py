@@ -210,14 +210,12 @@ class simAgentClass:
             if action == "pickup" and self.taskStatus == "retrieving":
                 # Update task status fields
                 self.taskStatus = "pickedUp"
-                self.currentTask.taskStatus = "pickedUp"
+                self.parent.parent.simTaskManager.setTaskStatus(self.currentTask, "pickedUp")
                 self.currentTask.serviceStartTime = timeStamp
                 result = "pickedUp"
             elif action == "dropoff" and self.taskStatus == "pickedUp":
                 self.taskStatus = "unassigned"
-                self.currentTask.taskStatus = "completed"
-                self.currentTask.serviceCompleteTime = timeStamp
-                self.currentTask.assignee = None
+                self.parent.parent.simTaskManager.completeTask(self.currentTask, timeStamp)
                 self.currentTask = None
                 self.targetNode = None
                 result = "completed"
@@ -285,16 +283,18 @@ class simAgentClass:
         # print(f"Moving agent '{self.ID}' to node '{targetNode}'")
         # self.mainViewRef.simCanvas.requestRender("agent", "move", {"agentNumID": self.numID, "sourceNodeID": self.currentNode, "targetNodeID": targetNode})
         # self.mainViewRef.simCanvas.handleRenderQueue()
+        # Translate between names and positions through the compiled map index
+        mapIndex = self.parent.parent.simGraphData.simMapIndex
         if isinstance(targetNode, str):
             self.currentNode = targetNode    # String
-            self.position = eval(targetNode) # Tuple
+            self.position = mapIndex.getNodePosition(targetNode) # Tuple
         elif isinstance(targetNode, tuple):
             self.position = targetNode
-            self.currentNode = f"({targetNode[0]}, {targetNode[1]})"
+            self.currentNode = mapIndex.getPositionName(targetNode)
         else:
             logging.error(f"Received invalid targetNode type: {type(targetNode)}")
             raise TypeError
 
-        # Update the mapgraph with the new location
-        self.parent.parent.simGraphData.updateAgentLocations(self.parent.agentList)
+        # Update the occupancy index with the new location
+        self.parent.parent.simGraphData.updateAgentLocation(self)
         self.parent.parent.parent.simulationWindow.simDataView.updateAgentTreeView()
\ No newline at end of file
@@ -10,7 +10,6 @@ import numpy as np
 import itertools
 import modules.tk_extensions as tk_e
 import csv
-import random
 
 from collections import Counter
 
@@ -21,6 +20,9 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolb
 from matplotlib.figure import Figure
 from pathlib import Path
 import os
+from simmodules.simulationRunSpec import RUN_SPEC_VERSION, runSpecError, validateRunSpec, saveRunSpec
+from simmodules.simulationRandomGenerator import simRandomGenerator
+from pathfindTaskerScripts.taskNodeSampler import taskNodeSampler
 
 class simulationConfigManager(tk.Toplevel):
     # Window for managing the state of the simulation configuration
@@ -65,6 +67,9 @@ class simulationConfigManager(tk.Toplevel):
         # Simulation start button
         self.simulationLaunch = tk.Button(self, text="Launch Simulation", command=self.launchSimulation)
         self.simulationLaunch.grid(row=1, column=0)
+        # Saves the configuration as a run spec file, which headless runs and sweeps can load
+        self.simulationSaveSpec = tk.Button(self, text="Save Run Spec", command=self.saveSimulationRunSpec)
+        self.simulationSaveSpec.grid(row=2, column=0)
 
     def precalculateTaskGenerationTabInformation(self):
         # Retrieving information useful to the user about the simulation map
@@ -80,18 +85,9 @@ class simulationConfigManager(tk.Toplevel):
                 nodeTypeDict['deposit'].remove(dropoffNode)
 
         if len(nodeTypeDict['pickup'])>0 and len(nodeTypeDict['deposit'])>0:
-            dictOfOptimalTaskPaths = self.parent.mapData.generateAllTaskShortestPaths(nodeTypeDict['pickup'], nodeTypeDict['deposit'])
-            optimalTaskPaths = list()
-            for pickupNode, dropoffPaths in dictOfOptimalTaskPaths.items():
-                for dropoffNode, path in dropoffPaths.items():
-                    optimalTaskPaths.append(path)
-                    # print(f"{pickupNode}->{dropoffNode}: {path}")
-
-            # Calculate the lengths of each path
+            # Calculate the lengths of each optimal path
             # Note that this is inclusive, so that amount of steps it takes to actually complete these tasks is len-1
-            optimalTaskPathLengths = list()
-            for path in optimalTaskPaths:
-                optimalTaskPathLengths.append(len(path))
+            optimalTaskPathLengths = self.parent.mapData.generateAllTaskShortestPathLengths(nodeTypeDict['pickup'], nodeTypeDict['deposit'])
 
             # Calculating relevant statistics about optimal paths for use in the GUI
             self.taskPathLengthCountDict = Counter(optimalTaskPathLengths)          # Count of the number of tasks (value) with a specific length (key)
@@ -110,6 +106,7 @@ class simulationConfigManager(tk.Toplevel):
             "Multi-Agent Cooperative A* (CA*)": "mapf",
             "Hierarchical A* with RRA* (HCA*)": "mapf",
             "Windowed HCA* (WHCA*)": "mapf",
+            "Safe Interval Path Planning (SIPP)": "mapf",
             "Token Passing with A* (TP)": "mapf",
             "TP with Task Swaps (TPTS)": "mapf"
         }
@@ -132,11 +129,19 @@ class simulationConfigManager(tk.Toplevel):
         ### HCA* MAPF Suboptions
         self.MAPFHCAstarHeuristic = tk.StringVar()
         self.MAPFHCAstarHeuristicCoefficient = tk.IntVar()
+        self.MAPFHCAstarDistanceCache = tk.BooleanVar()
+        self.MAPFHCAstarRRABatchMode = tk.BooleanVar()
 
         ### WHCA* MAPF Suboptions
         self.MAPFWHCAstarHeuristic = tk.StringVar()
         self.MAPFWHCAstarHeuristicCoefficient = tk.IntVar()
         self.MAPFWHCAstarWindowSize = tk.IntVar()
+        self.MAPFWHCAstarDistanceCache = tk.BooleanVar()
+        self.MAPFWHCAstarRRABatchMode = tk.BooleanVar()
+
+        ### SIPP MAPF Suboptions
+        self.MAPFSIPPHeuristic = tk.StringVar()
+        self.MAPFSIPPHeuristicCoefficient = tk.IntVar()
 
         ### TP MAPD Suboptions
         self.MAPFTPHeuristic = tk.StringVar()
@@ -283,6 +288,7 @@ class simulationConfigManager(tk.Toplevel):
     def buildTaskGenerationPage(self):
         self.tasksAreScheduled = False
         self.taskSchedule = None
+        self.taskScheduleStreaming = tk.BooleanVar(value=False)
         # Remove all child widgets
         for child in self.taskGenerationFrame.winfo_children():
             child.destroy()
@@ -331,7 +337,8 @@ class simulationConfigManager(tk.Toplevel):
         with open(fid, 'r') as inp:
             # Extract all the data
             reader = csv.reader(inp)
-            data = list(reader)
+            # Only the rows shown in the preview are needed, the simulation reads the schedule itself
+            data = list(itertools.islice(reader, 102))
         
         # Row one should contain specific headers if it is a valid file
         columnNames = ["PickupNode", "DropoffNode", "TimeLimit", "ReleaseTime", "Name"]
@@ -402,6 +409,12 @@ class simulationConfigManager(tk.Toplevel):
             command=self.buildTaskGenerationPage, text="Use Live Task Generation")
         self.taskGenerationReturnButton.grid(row=3, column=0)
 
+        # Very large schedules can be read from disk as the simulation runs, rather than all at once
+        self.taskScheduleStreamingCheckbutton = tk.Checkbutton(self.taskGenerationFrame,
+            text="Stream schedule from disk (must be ordered by release time)", variable=self.taskScheduleStreaming,
+            onvalue=True, offvalue=False)
+        self.taskScheduleStreamingCheckbutton.grid(row=3, column=1)
+
     def generateTaskScheduleOptions(self):
         # Remove all child widgets
         for child in self.taskStatisticsFrame.winfo_children():
@@ -485,19 +498,19 @@ class simulationConfigManager(tk.Toplevel):
         tasksGenEvery = self.taskGenerateEvery.get()
         tasksPerBatch = self.tasksPerGenerate.get()
         scheduleLength = self.taskScheduleLength.get()
+        # Drawn from the session's seed, so the same options always write the same schedule
+        scheduleRandomGenerator = simRandomGenerator(self.parent.randomGenerator.randomGeneratorState.currentSeed)
         with open(fid, 'w', newline="") as csvfile:
             # Write the header row
             taskScheduler = csv.writer(csvfile, delimiter=",", quotechar='"', quoting=csv.QUOTE_NONNUMERIC)
             taskScheduler.writerow(["PickupNode", "DropoffNode", "TimeLimit", "ReleaseTime", "Name"])
-            nodeAvailability = [[node for node, value in nodeDict.items() if value.get() == 1] for key, nodeDict in self.nodeAvailableVarDict.items()]
-            nodeWeights = [[eval(value.get()) for node, value in nodeDict.items() if node in nodeAvailability[0] or node in nodeAvailability[1]] for key, nodeDict in self.nodeWeightVarDict.items()]
-            # pp.pprint(nodeAvailability)
-            # pp.pprint(nodeWeights)
+            nodeAvailability = {nodeType: {node: value.get() for node, value in nodeDict.items()} for nodeType, nodeDict in self.nodeAvailableVarDict.items()}
+            nodeWeights = {nodeType: {node: eval(value.get()) for node, value in nodeDict.items()} for nodeType, nodeDict in self.nodeWeightVarDict.items()}
+            # The simulation's own task generator, so schedules are drawn by the same weights as generated tasks
+            scheduleTaskGenerator = taskNodeSampler(nodeWeights, nodeAvailability, scheduleRandomGenerator)
             while currentStep*tasksGenEvery < scheduleLength:
                 # Generate another batch of tasks
-                for i in range(1, tasksPerBatch+1):
-                    taskPickupNode = random.choices(population=nodeAvailability[0], weights=nodeWeights[0], k=1)[0]
-                    taskDropoffNode = random.choices(population=nodeAvailability[1], weights=nodeWeights[1], k=1)[0]
+                for taskPickupNode, taskDropoffNode in scheduleTaskGenerator.drawTasks(tasksPerBatch):
                     taskTimeLimit = 0
                     taskReleaseTime = currentStep*tasksGenEvery
                     taskName = next(taskCount)
@@ -930,6 +943,10 @@ class simulationConfigManager(tk.Toplevel):
         self.renderEndSimStep = tk.BooleanVar()
         self.renderEndSimStepTime = tk.IntVar()
 
+        # Fast-forward through unrendered states, only updating the UI at the given interval
+        self.renderFastForward = tk.BooleanVar()
+        self.renderFastForwardTime = tk.IntVar()
+
         # UI Definition Dict
         # Sorcery
         cwd = Path(__file__).parent
@@ -1006,7 +1023,7 @@ class simulationConfigManager(tk.Toplevel):
         """
             Packages the current simulation configuration for saving
         """
-        dataPackage = {}
+        dataPackage = {"runSpecVersion": RUN_SPEC_VERSION}
         # Needs work for handling branched options (nested)
         ### Algorithm Options
         dataPackage["algorithmSelection"] = self.algorithmChoice.get()
@@ -1027,11 +1044,19 @@ class simulationConfigManager(tk.Toplevel):
         dataPackage["HCAstarPathfinderConfig"] = {}
         dataPackage["HCAstarPathfinderConfig"]["algorithmMAPFHCAstarHeuristic"] = self.MAPFHCAstarHeuristic.get()
         dataPackage["HCAstarPathfinderConfig"]["algorithmMAPFHCAstarHeuristicCoefficient"] = self.MAPFHCAstarHeuristicCoefficient.get()
+        dataPackage["HCAstarPathfinderConfig"]["algorithmMAPFHCAstarDistanceCache"] = self.MAPFHCAstarDistanceCache.get()
+        dataPackage["HCAstarPathfinderConfig"]["algorithmMAPFHCAstarRRABatchMode"] = self.MAPFHCAstarRRABatchMode.get()
         # WHCA*
         dataPackage["WHCAstarPathfinderConfig"] = {}
         dataPackage["WHCAstarPathfinderConfig"]["algorithmMAPFWHCAstarHeuristic"] = self.MAPFWHCAstarHeuristic.get()
         dataPackage["WHCAstarPathfinderConfig"]["algorithmMAPFWHCAstarHeuristicCoefficient"] = self.MAPFWHCAstarHeuristicCoefficient.get()
         dataPackage["WHCAstarPathfinderConfig"]["algorithmMAPFWHCAstarWindowSize"] = self.MAPFWHCAstarWindowSize.get()
+        dataPackage["WHCAstarPathfinderConfig"]["algorithmMAPFWHCAstarDistanceCache"] = self.MAPFWHCAstarDistanceCache.get()
+        dataPackage["WHCAstarPathfinderConfig"]["algorithmMAPFWHCAstarRRABatchMode"] = self.MAPFWHCAstarRRABatchMode.get()
+        # SIPP
+        dataPackage["SIPPPathfinderConfig"] = {}
+        dataPackage["SIPPPathfinderConfig"]["algorithmMAPFSIPPHeuristic"] = self.MAPFSIPPHeuristic.get()
+        dataPackage["SIPPPathfinderConfig"]["algorithmMAPFSIPPHeuristicCoefficient"] = self.MAPFSIPPHeuristicCoefficient.get()
         # TP
         dataPackage["TPPathfinderConfig"] = {}
         dataPackage["TPPathfinderConfig"]["algorithmMAPFTPHeuristic"] = self.MAPFTPHeuristic.get()
@@ -1077,18 +1102,26 @@ class simulationConfigManager(tk.Toplevel):
         dataPackage["taskGenerationFixedRateCustomInterval"] = self.taskFixedRateCustomIntervalValue.get()
         dataPackage["taskGenerationFixedRateCustomTasksPerInterval"] = self.taskFixedRateCustomTasksPerIntervalValue.get()
         dataPackage["taskGenerationFixedRateCustomTaskDistribution"] = self.taskFixedRateCustomTaskBatchingStrategyValue.get()
-        dataPackage["taskGenerationFixedRateMeanTasksPerAgent"] = round(self.meanOptimalTaskPathLength)
-        dataPackage["taskGenerationFixedRateMaxTasksPerAgent"] = self.maximumOptimalPathLength
-        dataPackage["taskGenerationFixedRateMinTasksPerAgent"] = self.minimumOptimalPathLength
-        dataPackage["taskGenerationFixedRateMedianTasksPerAgent"] = self.medianOptimalTaskPathLength
+        # The path length statistics are numpy values, which are converted so the package can be saved
+        dataPackage["taskGenerationFixedRateMeanTasksPerAgent"] = int(round(self.meanOptimalTaskPathLength))
+        dataPackage["taskGenerationFixedRateMaxTasksPerAgent"] = int(self.maximumOptimalPathLength)
+        dataPackage["taskGenerationFixedRateMinTasksPerAgent"] = int(self.minimumOptimalPathLength)
+        dataPackage["taskGenerationFixedRateMedianTasksPerAgent"] = float(self.medianOptimalTaskPathLength)
         dataPackage["taskGenerationAsAvailableDelayTime"] = self.taskAsAvailableDelayValue.get()
         dataPackage["taskGenerationAsAvailableTrigger"] = self.agentAvailabilityTriggerDict[self.taskAsAvailableTriggerStringvar.get()]
         dataPackage["tasksAreScheduled"] = self.tasksAreScheduled
         dataPackage["taskScheduleFile"] = self.taskSchedule
+        dataPackage["taskScheduleStreaming"] = self.taskScheduleStreaming.get()
+        # Generated tasks are drawn from the session's seed
+        dataPackage["randomSeed"] = self.parent.randomGenerator.randomGeneratorState.currentSeed
+        dataPackage["randomRunIndex"] = 0
 
         ### Node selection options
-        dataPackage["taskNodeWeightDict"] = self.nodeWeightVarDict
-        dataPackage["taskNodeAvailableDict"] = self.nodeAvailableVarDict
+        # Weights are typed as expressions, read the same way as for the task statistics
+        dataPackage["taskNodeWeightDict"] = {nodeType: {node: eval(value.get()) for node, value in nodeDict.items()}
+                                             for nodeType, nodeDict in self.nodeWeightVarDict.items()}
+        dataPackage["taskNodeAvailableDict"] = {nodeType: {node: value.get() for node, value in nodeDict.items()}
+                                                for nodeType, nodeDict in self.nodeAvailableVarDict.items()}
 
         ### Display Options
         # Headless mode checkbutton
@@ -1115,6 +1148,8 @@ class simulationConfigManager(tk.Toplevel):
         dataPackage["renderCheckAgentQueueTime"] = self.renderCheckAgentQueueTime.get()
         dataPackage["renderEndSimStep"] = self.renderEndSimStep.get()
         dataPackage["renderEndSimStepTime"] = self.renderEndSimStepTime.get()
+        dataPackage["renderFastForward"] = self.renderFastForward.get()
+        dataPackage["renderFastForwardTime"] = self.renderFastForwardTime.get()
 
         ### Simulation end statements
         dataPackage["simulationEndConditions"] = {}
@@ -1126,10 +1161,30 @@ class simulationConfigManager(tk.Toplevel):
 
         return dataPackage
     
+    def packageRunSpec(self):
+        # The configuration as a checked run spec, or None after telling the user what is wrong with it
+        try:
+            return validateRunSpec(self.packageSimulationConfiguration())
+        except (runSpecError, tk.TclError, SyntaxError, NameError) as error:
+            messagebox.showerror(title="Invalid Configuration", message=str(error), parent=self)
+            return None
+
     def launchSimulation(self):
-        simulationSettings = self.packageSimulationConfiguration()
+        simulationSettings = self.packageRunSpec()
+        if simulationSettings is None:
+            return
         self.parent.launchSimulator(simulationSettings)
 
+    def saveSimulationRunSpec(self):
+        simulationSettings = self.packageRunSpec()
+        if simulationSettings is None:
+            return
+        fid = filedialog.asksaveasfilename(title="Save Run Spec", defaultextension=".json",
+            filetypes=[("Run Spec", "*.json")], parent=self)
+        if not fid:
+            return
+        saveRunSpec(simulationSettings, fid)
+
 class simulationConfigurationState:
     # Holds the current state of the simulation config
     def __init__(self, parent):
@@ -1,5 +1,6 @@
 import tkinter as tk
 from tkinter import ttk
+from tkinter import filedialog
 import logging
 
 class simControlPanel(tk.Frame):
@@ -42,6 +43,7 @@ class simControlPanel(tk.Frame):
         self.sep1 = ttk.Separator(self, orient=tk.HORIZONTAL)
         self.sep1.grid(row=1, column=0, columnspan=self.grid_size()[0], pady=4, sticky="ew")
         self.buildStateSelectorUI()
+        self.buildProfilerUI()
 
     def buildSimulationControlUI(self):
         logging.debug("Simulation Control Panel UI elements building . . .")
@@ -159,6 +161,28 @@ class simControlPanel(tk.Frame):
                 command=lambda selectedState = self.stateSelectorValue, stateOptions = self.stateSelectorMenu: self.simulationGotoSpecificState(selectedState.get()) if str(selectedState.get()) in stateOptions["value"] else print(stateOptions["value"]))
         self.stateSelectorButton.grid(row=2, column=3)
     
+    def buildProfilerUI(self):
+        # Build a containing frame to use a fresh grid
+        self.profilerFrame = tk.Frame(self)
+        self.profilerFrame.grid(row=3, column=0, columnspan=self.grid_size()[0], sticky=tk.E+tk.W)
+
+        # Timing of the FSM states can be switched on and off while the simulation runs
+        stateProfiler = self.simulationProcess.simProcessor.stateProfiler
+        self.profileStatesValue = tk.BooleanVar(value=stateProfiler.enabled)
+        self.profileStatesCheckbutton = tk.Checkbutton(self.profilerFrame, text="Time Simulation States",
+            variable=self.profileStatesValue, command=lambda: stateProfiler.setEnabled(self.profileStatesValue.get()))
+        self.profileStatesCheckbutton.grid(row=0, column=1)
+
+        # Save the timings taken so far
+        self.exportProfileButton = tk.Button(self.profilerFrame, text="Export Timings", command=self.exportStateProfile)
+        self.exportProfileButton.grid(row=0, column=2)
+
+    def exportStateProfile(self):
+        fid = filedialog.asksaveasfilename(initialfile="stateTimings.csv", filetypes=[("CSV", "*.csv"), ("JSON", "*.json")])
+        if fid:
+            self.simulationProcess.simProcessor.stateProfiler.export(fid)
+            logging.info(f"State timings exported to '{fid}'.")
+
     def updateStateSelectionChoices(self, choices):
         self.stateSelectorMenu["value"] = choices
 
@@ -0,0 +1,360 @@
+import json
+import logging
+import pickle
+import time
+from copy import deepcopy
+from modules.agentManager import agentColorList
+from simmodules.simulationProcess import simulationProcess
+from simmodules.simulationRunSpec import RUN_SPEC_VERSION, algorithmTypes, renderedStateNames, loadRunSpec
+
+class headlessVariable:
+    """
+        Stand-in for the tkinter variables the simulation writes to when no window is attached
+    """
+    def __init__(self, value=None):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+class headlessLabel:
+    """
+        Stand-in for tkinter labels which are only ever reconfigured by the simulation
+    """
+    def __init__(self, text=""):
+        self.text = text
+
+    def configure(self, **kwargs):
+        self.text = kwargs.get("text", self.text)
+
+class headlessTreeView:
+    """
+        Stand-in for ttk treeviews, which never hold any rows when headless
+    """
+    def get_children(self):
+        return []
+
+    def delete(self, row):
+        pass
+
+class headlessCanvas:
+    """
+        Null observer for the simulation canvas
+        Accepts the same render requests as the simulation canvas but discards them, so pathfinders, movers and taskers
+        can issue requests without any knowledge of whether a window is attached
+    """
+    def __init__(self):
+        self.renderQueue = []
+        self.currentClickedAgent = None
+
+    def requestRender(self, renderType, renderAction, renderData):
+        # Nothing will ever draw the request, so don't bother queueing it
+        pass
+
+    def handleRenderQueue(self):
+        self.renderQueue = []
+
+    def setCanvasDimensions(self, tileWidth, tileHeight):
+        pass
+
+    def ingestGraphData(self, graphRef):
+        pass
+
+    def ingestAgentData(self, agentManagerRef):
+        pass
+
+    def renderGraphState(self):
+        pass
+
+    def renderAgents(self):
+        pass
+
+class headlessMainView:
+    def __init__(self):
+        self.simCanvas = headlessCanvas()
+
+class headlessStepView:
+    def __init__(self):
+        self.simStatusTextValue = headlessVariable("Waiting . . .")
+        self.simStepCountTextValue = headlessVariable(0)
+        self.simStepRateTextValue = headlessVariable("-")
+
+class headlessScoreView:
+    def __init__(self):
+        self.scoreAlgorithmText = headlessLabel("Algo")
+        self.taskCompletionValue = headlessVariable("0")
+        self.serviceTimeValue = headlessVariable("0")
+        self.normServiceTimeValue = headlessVariable("0")
+        self.runTimeValue = headlessVariable("0")
+        self.normrunTimeValue = headlessVariable("0")
+        self.lifeTimeValue = headlessVariable("0")
+        self.serviceabilityValue = headlessVariable("0")
+        self.conflictCountValue = headlessVariable("0")
+        self.pathfindFailCountValue = headlessVariable("0")
+        self.planCountValue = headlessVariable("0")
+        self.meanExpandedValue = headlessVariable("-")
+        self.meanPlanTimeValue = headlessVariable("-")
+
+class headlessDataView:
+    def __init__(self):
+        self.agentTreeView = headlessTreeView()
+        self.taskTreeView = headlessTreeView()
+
+    def updateAgentTreeView(self):
+        pass
+
+    def updateTaskTreeView(self):
+        pass
+
+class headlessControlPanel:
+    def updateStateSelectionChoices(self, stateIDList):
+        pass
+
+class headlessSimulationWindow:
+    """
+        Null observer standing in for 'simulationWindow'
+        Exposes the same view members the simulation classes write into, none of which are attached to Tk
+    """
+    def __init__(self, parent):
+        self.parent = parent
+        self.simMainView = headlessMainView()
+        self.simStepView = headlessStepView()
+        self.simScoreView = headlessScoreView()
+        self.simDataView = headlessDataView()
+        self.simControlPanel = headlessControlPanel()
+
+class headlessSessionData:
+    """
+        Exposes the contents of a saved session file the same way the main window's data classes do
+        The pickled session holds the packaged form of each data class, which older sessions saved with fewer fields;
+        agents and tasks are rebuilt as the editor would rebuild them on opening the session, then packaged again
+    """
+    def __init__(self, sessionData):
+        self.mapData = headlessPackage(sessionData["mapDataClass"], "packageMapData")
+        self.agentManager = headlessPackage(normalizeAgentData(sessionData["agentManager"]), "packageAgentData")
+        self.taskManager = headlessPackage(normalizeTaskData(sessionData["taskManager"]), "packageTaskData")
+        self.randomGeneratorData = sessionData.get("randomGenerator", {})
+        self.simulationConfigWindow = None
+
+    def after(self, delay, callback):
+        # The headless engine never schedules states through an event loop
+        return None
+
+    def after_cancel(self, timerID):
+        pass
+
+def normalizeAgentData(agentData):
+    # Mirrors 'commandBar.openSession' followed by 'agentManager.packageAgentData'
+    # Agents are numbered in the order they were saved, and colored by that number as 'createNewAgent' does
+    normalizedData = {}
+    for numID, agent in enumerate(agentData.values()):
+        normalizedData[numID] = {
+            "ID": agent["ID"],
+            "position": agent["position"],
+            "orientation": agent["orientation"],
+            "className": agent["className"],
+            "currentTask": agent.get("currentTask", None),
+            "taskStatus": agent.get("taskStatus", "unassigned"),
+            "renderColor": agentColorList[numID % len(agentColorList)]
+        }
+    return normalizedData
+
+def normalizeTaskData(taskData):
+    # Mirrors 'commandBar.openSession' followed by 'taskManager.packageTaskData'
+    normalizedData = {}
+    for numID, task in enumerate(taskData.values()):
+        normalizedData[numID] = {
+            "name": task["name"],
+            "pickupPosition": task["pickupPosition"],
+            "dropoffPosition": task["dropoffPosition"],
+            "timeLimit": task["timeLimit"],
+            "assignee": task.get("assignee", None),
+            "taskStatus": task.get("taskStatus", "unassigned")
+        }
+    return normalizedData
+
+class headlessPackage:
+    def __init__(self, dataPackage, packageMethodName):
+        self.dataPackage = dataPackage
+        setattr(self, packageMethodName, self.packageData)
+
+    def packageData(self):
+        # Hand out copies so the simulation can't modify the session's own data
+        return deepcopy(self.dataPackage)
+
+class headlessSimulationManager:
+    """
+        Runs the simulation FSM without a window
+        Plays the role of 'simulationManager' in main.py for the simulation classes, with null observers in place of the window
+    """
+    def __init__(self, sessionData, simulationSettings):
+        if isinstance(sessionData, str):
+            # Load a saved session file
+            with open(sessionData, 'rb') as inp:
+                sessionData = pickle.load(inp)
+        self.parent = headlessSessionData(sessionData)
+
+        if isinstance(simulationSettings, str):
+            # Load a saved run spec file
+            simulationSettings = loadRunSpec(simulationSettings)
+
+        # Nothing can be displayed, so no state is rendered
+        simulationSettings = dict(simulationSettings)
+        for settingName in simulationSettings:
+            if settingName.startswith("render") and not settingName.endswith("Time"):
+                simulationSettings[settingName] = False
+        # Nor played back, so no snapshots of the simulation state are taken
+        simulationSettings["stateSaveIncrement"] = 0
+
+        # Display classes
+        self.simulationWindow = headlessSimulationWindow(self)
+
+        # Information classes
+        self.simulationProcess = simulationProcess(self, simulationSettings)
+
+        self.buildReferences()
+        logging.info("Headless simulation built.")
+
+    def buildReferences(self):
+        self.simulationProcess.buildReferences()
+
+    def runSimulation(self, maxSteps=None):
+        """
+            Drive the FSM in a plain loop until the simulation ends, errors, or maxSteps have been completed
+            Returns the packaged results of the simulation
+        """
+        simProcessor = self.simulationProcess.simProcessor
+        # States are called directly instead of being scheduled
+        simProcessor.doNextStep = False
+        runStartTime = time.perf_counter()
+        stateID = simProcessor.simulationStateID
+        while stateID is not None:
+            simProcessor.simulateStep(stateID)
+            if simProcessor.currentState in ["endSimulation", "simulationErrorState"]:
+                break
+            if maxSteps is not None and simProcessor.currentState == "endSimStep" and simProcessor.stepCompleted + 1 >= maxSteps:
+                break
+            stateID = simProcessor.simulationStateID
+        runTime = time.perf_counter() - runStartTime
+        if simProcessor.simulationSettings["tasksAreScheduled"]:
+            # The run may have stopped before the schedule was read through
+            simProcessor.taskSchedule.closeFile()
+        if simProcessor.currentState != "endSimulation":
+            # The end state, which would have written them, was not reached
+            simProcessor.exportStateProfile()
+        if simProcessor.currentState == "simulationErrorState":
+            # Results of a run cut short would pass for those of a finished one
+            raise RuntimeError(f"Simulation reached an error state after {simProcessor.stepCompleted} steps:\n{simProcessor.tb}")
+        logging.info(f"Headless simulation finished after {runTime} seconds.")
+
+        simulationResults = simProcessor.packageSimulationResults()
+        simulationResults["wallTime"] = runTime
+        # Report the throughput over the whole run
+        simulationResults["stepsPerSecond"] = (simProcessor.stepCompleted + 1) / runTime
+        return simulationResults
+
+def buildHeadlessSimulationSettings(sessionData, algorithmSelection, **kwargs):
+    """
+        Build a simulation settings dict matching 'simulationConfigManager.packageSimulationConfiguration' without the config window
+        Values not given as keyword arguments take the config window's defaults
+    """
+    if isinstance(sessionData, str):
+        with open(sessionData, 'rb') as inp:
+            sessionData = pickle.load(inp)
+
+    heuristic = kwargs.pop("heuristic", "Dijkstra")
+    heuristicCoefficient = kwargs.pop("heuristicCoefficient", 1)
+    windowSize = kwargs.pop("windowSize", 5)
+    # HCA* and WHCA* run RRA* for their heuristic unless told to read true distances from the cache
+    useDistanceCache = kwargs.pop("useDistanceCache", False)
+    # RRA* searches the whole map for a goal at once, rather than only as far as each lookup needs
+    RRAbatchMode = kwargs.pop("RRAbatchMode", False)
+
+    # Every pickup and deposit node is available with equal weight
+    taskNodeWeightDict = {"pickup": {}, "dropoff": {}}
+    taskNodeAvailableDict = {"pickup": {}, "dropoff": {}}
+    for node in sessionData["mapDataClass"]:
+        if 'mapDimensions' in node:
+            continue
+        nodeName = f"({node['nodePosition']['X']}, {node['nodePosition']['Y']})"
+        if node["nodeType"] == "pickup":
+            taskNodeWeightDict["pickup"][nodeName] = 1
+            taskNodeAvailableDict["pickup"][nodeName] = True
+        elif node["nodeType"] == "deposit":
+            taskNodeWeightDict["dropoff"][nodeName] = 1
+            taskNodeAvailableDict["dropoff"][nodeName] = True
+
+    simulationSettings = {
+        "runSpecVersion": RUN_SPEC_VERSION,
+        "algorithmSelection": algorithmSelection,
+        "algorithmType": algorithmTypes[algorithmSelection],
+        "aStarPathfinderConfig": {"algorithmSAPFAStarHeuristic": heuristic,
+                                  "algorithmSAPFAStarHeuristicCoefficient": heuristicCoefficient},
+        "LRAstarPathfinderConfig": {"algorithmMAPFLRAstarHeuristic": heuristic,
+                                    "algorithmMAPFLRAstarHeuristicCoefficient": heuristicCoefficient},
+        "CAstarPathfinderConfig": {"algorithmMAPFCAstarHeuristic": heuristic,
+                                   "algorithmMAPFCAstarHeuristicCoefficient": heuristicCoefficient},
+        "HCAstarPathfinderConfig": {"algorithmMAPFHCAstarHeuristic": heuristic,
+                                    "algorithmMAPFHCAstarHeuristicCoefficient": heuristicCoefficient,
+                                    "algorithmMAPFHCAstarDistanceCache": useDistanceCache,
+                                    "algorithmMAPFHCAstarRRABatchMode": RRAbatchMode},
+        "WHCAstarPathfinderConfig": {"algorithmMAPFWHCAstarHeuristic": heuristic,
+                                     "algorithmMAPFWHCAstarHeuristicCoefficient": heuristicCoefficient,
+                                     "algorithmMAPFWHCAstarWindowSize": windowSize,
+                                     "algorithmMAPFWHCAstarDistanceCache": useDistanceCache,
+                                     "algorithmMAPFWHCAstarRRABatchMode": RRAbatchMode},
+        "SIPPPathfinderConfig": {"algorithmMAPFSIPPHeuristic": heuristic,
+                                 "algorithmMAPFSIPPHeuristicCoefficient": heuristicCoefficient},
+        "TPPathfinderConfig": {"algorithmMAPFTPHeuristic": heuristic,
+                               "algorithmMAPFTPHeuristicCoefficient": heuristicCoefficient},
+        "TPTSPathfinderConfig": {"algorithmMAPDTPHeuristic": heuristic,
+                                 "algorithmMAPDTPHeuristicCoefficient": heuristicCoefficient},
+        "agentCollisionsValue": "Respected",
+        "agentMiscOptionTaskInteractCostValue": "No cost for pickup/dropoff",
+        "taskGenerationAsAvailableTrigger": "completed",
+        "tasksAreScheduled": False,
+        "taskScheduleFile": None,
+        "taskScheduleStreaming": False,
+        "taskNodeWeightDict": taskNodeWeightDict,
+        "taskNodeAvailableDict": taskNodeAvailableDict,
+        "profileSimulationStates": False,
+        "stateProfileFile": None,
+        # Sessions saved without a seed use the editor's default one; replications differ only in their run index
+        "randomSeed": sessionData.get("randomGenerator", {}).get("currentSeed", 123456789),
+        "randomRunIndex": 0,
+        "simulationEndConditions": {
+            "simulationEndOnTaskCount": False,
+            "simulationEndTaskCount": 1,
+            "simulationEndOnStepCount": False,
+            "simulationEndStepCount": 1,
+            "simulationEndOnSchedule": False
+        }
+    }
+    # Nothing is rendered
+    for stateName in renderedStateNames:
+        simulationSettings["render" + stateName] = False
+        simulationSettings["render" + stateName + "Time"] = 0
+    simulationSettings["renderSimulationPlayback"] = False
+
+    # Apply any requested overrides
+    simulationEndConditions = kwargs.pop("simulationEndConditions", {})
+    simulationSettings["simulationEndConditions"].update(simulationEndConditions)
+    simulationSettings.update(kwargs)
+    return simulationSettings
+
+def writeSimulationSummary(simulationResults, fid):
+    # Save the packaged results, planning statistics included, as JSON for other tools to read
+    with open(fid, 'w') as out:
+        json.dump(simulationResults, out, indent=4)
+    logging.info(f"Simulation summary written to '{fid}'.")
+
+def runHeadlessSimulation(sessionData, simulationSettings, maxSteps=None, summaryFile=None):
+    # Convenience wrapper, building and running a headless simulation in one call
+    simulationManager = headlessSimulationManager(sessionData, simulationSettings)
+    simulationResults = simulationManager.runSimulation(maxSteps)
+    if summaryFile is not None:
+        writeSimulationSummary(simulationResults, summaryFile)
+    return simulationResults
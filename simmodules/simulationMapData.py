@@ -1,4 +1,5 @@
 import networkx as nx
+import numpy as np
 import logging
 import pprint
 pp = pprint.PrettyPrinter(indent=4)
@@ -100,6 +101,15 @@ class simGraphManager:
                         logging.debug(f". . . . .  E: {candidateE}, edge connection added.")
         logging.info("New simulation mapData edges loaded.")
 
+        # Compile the integer index of the graph, shared by everything which works on node IDs
+        self.simMapIndex = simMapIndex(self.simMapGraph)
+        self.simMapGraph.graph["mapIndex"] = self.simMapIndex
+        logging.info("Simulation map index compiled.")
+
+        # Track which agent is on each node, filled in as agents are created
+        self.simAgentOccupancy = simAgentOccupancy(self.simMapIndex)
+        self.simMapGraph.graph["agentOccupancy"] = self.simAgentOccupancy
+
         # Update simulation mainView canvas size
         logging.info("All new simulation mapData finished loading.")
 
@@ -107,21 +117,151 @@ class simGraphManager:
         self.parent.parent.simulationWindow.simMainView.simCanvas.ingestGraphData(self.simMapGraph)
 
     def updateAgentLocations(self, agentList):
-        logging.debug("Updating agent locations in the simulation mapGraph . . .")
-
-        # Remove all agents from the graph
-        for node in self.simMapGraph.nodes(data=True):
-            if 'agent' in self.simMapGraph.nodes.data()[node[0]]:
-                logging.debug(f"Remove agent '{self.simMapGraph.nodes.data()[node[0]]['agent'].ID}:{self.simMapGraph.nodes.data()[node[0]]['agent'].numID}' from simulation node '{node[0]}'.")
-                del self.simMapGraph.nodes.data()[node[0]]['agent']
-            else:
-                pass
-
-        # Insert agents from the agent list back into the graph
-        for agent in agentList:
-            agentPosition = agentList[agent].position
-            targetNode = f"({agentPosition[0]}, {agentPosition[1]})"
-            self.simMapGraph.nodes[targetNode]['agent'] = agentList[agent]
-            logging.debug(f"Inserted agent '{agentList[agent].ID}:{agent}' into simulation mapGraph node '{targetNode}'.")
-
-        logging.info("Agent data in simulation mapGraph updated.")
\ No newline at end of file
+        # Rebuild the occupancy index from scratch, needed only when every agent may have changed at once
+        logging.debug("Updating agent locations in the simulation agent occupancy index . . .")
+        self.simAgentOccupancy.rebuild(agentList)
+        logging.info("Agent data in simulation agent occupancy index updated.")
+
+    def updateAgentLocation(self, agent):
+        # Record a single agent's new node in the occupancy index
+        self.simAgentOccupancy.placeAgent(agent.numID, agent.currentNode)
+        logging.debug(f"Placed agent '{agent.ID}:{agent.numID}' at simulation node '{agent.currentNode}'.")
+
+class simMapIndex:
+    """
+        Compiled form of the simulation graph, giving every node a dense integer ID
+        Node names like "(3, 4)" are only needed at the UI and file boundaries, everything else can use the IDs
+    """
+    def __init__(self, mapGraph):
+        # Node IDs follow the graph's node order
+        self.nodeNames = list(mapGraph.nodes(data=False))
+        self.nodeID = {nodeName: nodeID for nodeID, nodeName in enumerate(self.nodeNames)}
+        self.numNodes = len(self.nodeNames)
+
+        # Coordinate arrays, indexed by node ID
+        self.nodeX = np.array([mapGraph.nodes[nodeName]['pos']['X'] for nodeName in self.nodeNames], dtype=np.int32)
+        self.nodeY = np.array([mapGraph.nodes[nodeName]['pos']['Y'] for nodeName in self.nodeNames], dtype=np.int32)
+
+        # Translation between node names and position tuples, replacing string building and eval()
+        self.nodePositions = {nodeName: (int(self.nodeX[nodeID]), int(self.nodeY[nodeID])) for nodeID, nodeName in enumerate(self.nodeNames)}
+        self.positionNames = {nodePosition: nodeName for nodeName, nodePosition in self.nodePositions.items()}
+
+        # Edge IDs, where both directions of an edge share an ID, by node names and by node IDs
+        self.edgeID = {}
+        self.nodePairEdgeID = {}
+        for edgeIndex, (sourceNode, targetNode) in enumerate(mapGraph.edges(data=False)):
+            self.edgeID[(sourceNode, targetNode)] = edgeIndex
+            self.edgeID[(targetNode, sourceNode)] = edgeIndex
+            self.nodePairEdgeID[(self.nodeID[sourceNode], self.nodeID[targetNode])] = edgeIndex
+            self.nodePairEdgeID[(self.nodeID[targetNode], self.nodeID[sourceNode])] = edgeIndex
+        self.numEdges = mapGraph.number_of_edges()
+
+        # Neighbors of each node by ID, along with the IDs of the edges leading to them
+        self.neighborIDs = []
+        self.neighborEdgeIDs = []
+        for nodeName in self.nodeNames:
+            self.neighborIDs.append([self.nodeID[neighbor] for neighbor in mapGraph[nodeName]])
+            self.neighborEdgeIDs.append(np.array([self.edgeID[(nodeName, neighbor)] for neighbor in mapGraph[nodeName]], dtype=np.intp))
+
+        # Compressed sparse row adjacency: the neighbors of node i are adjacencyIndices[adjacencyIndptr[i]:adjacencyIndptr[i+1]]
+        self.adjacencyIndptr = np.zeros(self.numNodes+1, dtype=np.int32)
+        self.adjacencyIndptr[1:] = np.cumsum([len(neighbors) for neighbors in self.neighborIDs])
+        self.adjacencyIndices = np.array([neighbor for neighbors in self.neighborIDs for neighbor in neighbors], dtype=np.int32)
+
+        # Moves available from each node in the same form: its neighbors, followed by the node itself for waiting in place
+        self.moveIndptr = self.adjacencyIndptr + np.arange(self.numNodes+1, dtype=np.int32)
+        self.moveIndices = np.array([moveID for nodeID, neighbors in enumerate(self.neighborIDs) for moveID in neighbors + [nodeID]], dtype=np.int32)
+        self.moveIndptr.flags.writeable = False
+        self.moveIndices.flags.writeable = False
+
+        # The space-time searches read the moves of one node at a time, which plain lists of IDs serve quickest
+        self.nodeMoveIDs = [self.moveIndices[self.moveIndptr[nodeID]:self.moveIndptr[nodeID+1]].tolist() for nodeID in range(self.numNodes)]
+
+        # Movers and the single-agent searches work with node names, so the moves are also kept as tuples of names
+        self.nodeMoves = {}
+        self.nodeNeighbors = {}
+        for nodeID, nodeName in enumerate(self.nodeNames):
+            moveNames = tuple(self.nodeNames[moveID] for moveID in self.nodeMoveIDs[nodeID])
+            self.nodeMoves[nodeName] = moveNames
+            self.nodeNeighbors[nodeName] = moveNames[:-1]
+
+    def getNodeID(self, nodeName):
+        return self.nodeID[nodeName]
+
+    def getNodeName(self, nodeID):
+        return self.nodeNames[nodeID]
+
+    def getNodePosition(self, nodeName):
+        # Position tuple of a named node
+        return self.nodePositions[nodeName]
+
+    def getPositionName(self, nodePosition):
+        # Name of the node at a position tuple
+        return self.positionNames[tuple(nodePosition)]
+
+class simAgentOccupancy:
+    """
+        Index of which agent stands on each node of the simulation map, updated one move at a time
+        Replaces storing agents in the node data, which had to be cleared and refilled across the whole graph after every move
+    """
+    def __init__(self, mapIndex):
+        self.mapIndex = mapIndex
+        # Value stored for nodes with no agent
+        self.unoccupied = -1
+        # Agent numID on each node ID
+        self.nodeOccupant = np.full(mapIndex.numNodes, self.unoccupied, dtype=np.int32)
+        # Number of agents on each node ID, which exceeds 1 only after a collision
+        self.nodeAgentCount = np.zeros(mapIndex.numNodes, dtype=np.int32)
+        # Node ID of each agent numID
+        self.agentNodeID = {}
+        # Reference to the agent objects, for callers wanting more than the numID
+        self.agentList = {}
+
+    def rebuild(self, agentList):
+        # Reset the index to the current positions of every agent
+        self.nodeOccupant.fill(self.unoccupied)
+        self.nodeAgentCount.fill(0)
+        self.agentNodeID = {}
+        self.agentList = agentList
+        for agentNumID in agentList:
+            self.placeAgent(agentNumID, agentList[agentNumID].currentNode)
+
+    def placeAgent(self, agentNumID, nodeName):
+        # Move the agent off its previous node, if it had one, and onto the new node
+        nodeID = self.mapIndex.nodeID[nodeName]
+        previousNodeID = self.agentNodeID.get(agentNumID, None)
+        if previousNodeID == nodeID:
+            return
+        if previousNodeID is not None:
+            self.removeFromNode(agentNumID, previousNodeID)
+        self.agentNodeID[agentNumID] = nodeID
+        self.nodeAgentCount[nodeID] = self.nodeAgentCount[nodeID] + 1
+        # Where agents have collided, the node reports the last of them in agent list order
+        if self.nodeOccupant[nodeID] == self.unoccupied or agentNumID > self.nodeOccupant[nodeID]:
+            self.nodeOccupant[nodeID] = agentNumID
+
+    def removeFromNode(self, agentNumID, nodeID):
+        self.nodeAgentCount[nodeID] = self.nodeAgentCount[nodeID] - 1
+        if self.nodeAgentCount[nodeID] == 0:
+            self.nodeOccupant[nodeID] = self.unoccupied
+        elif self.nodeOccupant[nodeID] == agentNumID:
+            # Another agent shares the node, rare enough to find by searching
+            self.nodeOccupant[nodeID] = max(otherNumID for otherNumID, otherNodeID in self.agentNodeID.items()
+                if otherNodeID == nodeID and otherNumID != agentNumID)
+
+    def getOccupantID(self, nodeName):
+        # numID of the agent on the node, or -1 if there is none
+        return int(self.nodeOccupant[self.mapIndex.nodeID[nodeName]])
+
+    def isOccupied(self, nodeName):
+        return self.nodeOccupant[self.mapIndex.nodeID[nodeName]] != self.unoccupied
+
+    def getAgentAtNode(self, nodeName):
+        # The agent object on the node, or None if there is none
+        occupantID = self.getOccupantID(nodeName)
+        if occupantID == self.unoccupied:
+            return None
+        return self.agentList[occupantID]
+
+    def getAgentNode(self, agentNumID):
+        return self.mapIndex.nodeNames[self.agentNodeID[agentNumID]]
@@ -0,0 +1,269 @@
+import csv
+import json
+import time
+from collections import Counter
+from math import ceil
+
+class runningStatistic:
+    """
+        Summary of a stream of values, updated one value at a time
+        Keeps a running sum for the mean, Welford's recurrence for the variance, and a histogram of the values for percentiles
+        Task times are whole numbers of steps, so the histogram stays small however long the simulation runs
+    """
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        # Welford's running mean and sum of squared deviations
+        self.runningMean = 0.0
+        self.sumSquaredDeviations = 0.0
+        self.histogram = Counter()
+
+    def add(self, value):
+        self.count = self.count + 1
+        self.total = self.total + value
+        delta = value - self.runningMean
+        self.runningMean = self.runningMean + delta / self.count
+        self.sumSquaredDeviations = self.sumSquaredDeviations + delta * (value - self.runningMean)
+        self.histogram[value] += 1
+
+    def getMean(self):
+        # The plain sum is exact for whole numbers, so the mean matches summing the values afresh
+        if self.count == 0:
+            return None
+        return self.total / self.count
+
+    def getVariance(self):
+        # Population variance of the values seen so far
+        if self.count == 0:
+            return None
+        return self.sumSquaredDeviations / self.count
+
+    def getMinimum(self):
+        if self.count == 0:
+            return None
+        return min(self.histogram)
+
+    def getMaximum(self):
+        if self.count == 0:
+            return None
+        return max(self.histogram)
+
+    def getPercentile(self, percentile):
+        # Nearest-rank percentile, read from the histogram
+        if self.count == 0:
+            return None
+        targetRank = max(1, ceil(percentile / 100 * self.count))
+        seenCount = 0
+        for value in sorted(self.histogram):
+            seenCount = seenCount + self.histogram[value]
+            if seenCount >= targetRank:
+                return value
+
+class simTaskMetrics:
+    """
+        Running statistics of the times taken by completed tasks, updated as each task completes
+    """
+    # Percentiles reported in the simulation results
+    reportedPercentiles = [50, 90, 99]
+
+    def __init__(self):
+        self.statistics = {
+            "runTime": runningStatistic(),
+            "serviceTime": runningStatistic(),
+            "lifeTime": runningStatistic(),
+            "serviceability": runningStatistic(),
+            "minimumTime": runningStatistic()
+        }
+
+    def recordCompletedTask(self, task):
+        # Time from pickup to delivery
+        self.statistics["runTime"].add(task.serviceCompleteTime - task.serviceStartTime)
+        # Time from assignment to delivery
+        self.statistics["serviceTime"].add(task.serviceCompleteTime - task.serviceAssignTime)
+        # Time from creation to delivery
+        self.statistics["lifeTime"].add(task.serviceCompleteTime - task.createTime)
+        # Time from assignment to pickup
+        self.statistics["serviceability"].add(task.serviceStartTime - task.serviceAssignTime)
+        # Shortest possible time from pickup to delivery
+        self.statistics["minimumTime"].add(task.optimalServiceTime)
+
+    def getCompletedCount(self):
+        return self.statistics["runTime"].count
+
+    def getMeanStats(self):
+        # Means of the task times, as displayed in the score view
+        meanRunTime = self.statistics["runTime"].getMean()
+        meanServiceTime = self.statistics["serviceTime"].getMean()
+        meanMinimumTime = self.statistics["minimumTime"].getMean()
+        return {
+            "meanServiceTime": meanServiceTime,
+            "meanNormServiceTime": meanServiceTime-meanMinimumTime,
+            "meanRunTime": meanRunTime,
+            "meanNormRunTime": meanRunTime-meanMinimumTime,
+            "meanLifeTime": self.statistics["lifeTime"].getMean(),
+            "meanServiceability": self.statistics["serviceability"].getMean()
+        }
+
+    def getDistributionStats(self):
+        # Spread of each task time, which the means alone hide
+        distributionStats = {}
+        for statisticName, statistic in self.statistics.items():
+            distributionStats[statisticName] = {"variance": statistic.getVariance()}
+            for percentile in self.reportedPercentiles:
+                distributionStats[statisticName][f"p{percentile}"] = statistic.getPercentile(percentile)
+        return distributionStats
+
+class simPlanMetrics:
+    """
+        Search effort spent on each plan an agent requests, totalled for the run, per agent and per simulation step
+        A plan ends with the path being found, the search being cut off at its window, or the agent being told to wait
+    """
+    planOutcomes = ["found", "windowCut", "wait"]
+
+    def __init__(self):
+        self.totals = self.newTotals()
+        self.agentTotals = {}
+        self.stepTotals = {}
+        # Expansions per plan, a whole number, so its histogram stays small
+        self.expansionStatistic = runningStatistic()
+
+    def newTotals(self):
+        totals = {"plans": 0, "expanded": 0, "generated": 0, "reservationLookups": 0, "wallTime": 0.0, "peakOpenSet": 0}
+        for outcome in self.planOutcomes:
+            totals[outcome] = 0
+        return totals
+
+    def addToTotals(self, totals, searchStats, reservationLookups, wallTime, outcome):
+        totals["plans"] = totals["plans"] + 1
+        totals["expanded"] = totals["expanded"] + searchStats["expanded"]
+        totals["generated"] = totals["generated"] + searchStats["generated"]
+        totals["reservationLookups"] = totals["reservationLookups"] + reservationLookups
+        totals["wallTime"] = totals["wallTime"] + wallTime
+        # The open set peak is the largest seen by any one plan, rather than a sum
+        totals["peakOpenSet"] = max(totals["peakOpenSet"], searchStats["peakOpenSet"])
+        totals[outcome] = totals[outcome] + 1
+
+    def recordPlan(self, agentID, step, searchStats, reservationLookups, wallTime, outcome):
+        # searchStats is the pathfinder's getSearchStats(), wallTime is in seconds
+        if agentID not in self.agentTotals:
+            self.agentTotals[agentID] = self.newTotals()
+        if step not in self.stepTotals:
+            self.stepTotals[step] = self.newTotals()
+        for totals in [self.totals, self.agentTotals[agentID], self.stepTotals[step]]:
+            self.addToTotals(totals, searchStats, reservationLookups, wallTime, outcome)
+        self.expansionStatistic.add(searchStats["expanded"])
+
+    def getPlanCount(self):
+        return self.totals["plans"]
+
+    def getMeanStats(self):
+        # Per plan means, as displayed in the score view
+        planCount = self.totals["plans"]
+        if planCount == 0:
+            return {"meanExpanded": None, "meanWallTime": None}
+        return {
+            "meanExpanded": self.totals["expanded"] / planCount,
+            "meanWallTime": self.totals["wallTime"] / planCount
+        }
+
+    def getSummary(self):
+        # Everything recorded, in a form which can be written straight out as JSON
+        expansionPercentiles = {}
+        for percentile in simTaskMetrics.reportedPercentiles:
+            expansionPercentiles[f"p{percentile}"] = self.expansionStatistic.getPercentile(percentile)
+        return {
+            "totals": dict(self.totals),
+            "expansionsPerPlan": expansionPercentiles,
+            "perAgent": {str(agentID): dict(totals) for agentID, totals in self.agentTotals.items()},
+            "perStep": {str(step): dict(totals) for step, totals in self.stepTotals.items()}
+        }
+
+class simStateProfiler:
+    """
+        Wall time spent in each state of the simulation FSM, and in each simulation step
+        Durations are held in whole microseconds, so each state's histogram stays small however long the run
+        Nothing is timed while the profiler is disabled, and it can be switched on or off between states
+    """
+    # Column order of the exported .csv
+    csvColumns = ["scope", "name", "count", "totalTime", "minTime", "maxTime", "meanTime", "p95Time"]
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.stateStatistics = {}
+        # Per simulation step, the wall time spent in each state during it and the number of states run
+        self.stepTimes = {}
+        self.stepStateCounts = Counter()
+
+    def setEnabled(self, enabled):
+        self.enabled = enabled
+
+    def startTimer(self):
+        return time.perf_counter()
+
+    def recordTime(self, timedName, step, startTime):
+        # Adds the time since startTime to the named entry, and to the step it ran in
+        duration = round((time.perf_counter() - startTime) * 1e6)
+        if timedName not in self.stateStatistics:
+            self.stateStatistics[timedName] = runningStatistic()
+        self.stateStatistics[timedName].add(duration)
+        stepTimes = self.stepTimes.setdefault(step, {})
+        stepTimes[timedName] = stepTimes.get(timedName, 0) + duration
+
+    def recordState(self, stateID, step, startTime):
+        self.recordTime(stateID, step, startTime)
+        self.stepStateCounts[step] += 1
+
+    def recordRender(self, step, startTime):
+        # Drawing after each state is timed under its own name, and not counted as a state
+        self.recordTime("renderState", step, startTime)
+
+    def hasData(self):
+        return bool(self.stateStatistics)
+
+    def getStateSummary(self, statistic):
+        # Times are reported in seconds
+        return {
+            "count": statistic.count,
+            "totalTime": statistic.total / 1e6,
+            "minTime": statistic.getMinimum() / 1e6,
+            "maxTime": statistic.getMaximum() / 1e6,
+            "meanTime": statistic.getMean() / 1e6,
+            "p95Time": statistic.getPercentile(95) / 1e6
+        }
+
+    def getStepSummary(self, step):
+        stepTimes = self.stepTimes[step]
+        return {
+            "count": self.stepStateCounts[step],
+            "totalTime": sum(stepTimes.values()) / 1e6,
+            "stateTimes": {stateID: duration / 1e6 for stateID, duration in stepTimes.items()}
+        }
+
+    def getSummary(self):
+        return {
+            "states": {stateID: self.getStateSummary(statistic) for stateID, statistic in self.stateStatistics.items()},
+            "steps": {str(step): self.getStepSummary(step) for step in self.stepTimes}
+        }
+
+    def writeCSV(self, fid):
+        # One row per state, followed by one row per step holding the step's total time
+        with open(fid, 'w', newline="") as out:
+            writer = csv.writer(out)
+            writer.writerow(self.csvColumns)
+            for stateID, statistic in self.stateStatistics.items():
+                stateSummary = self.getStateSummary(statistic)
+                writer.writerow(["state", stateID] + [stateSummary[column] for column in self.csvColumns[2:]])
+            for step in self.stepTimes:
+                stepSummary = self.getStepSummary(step)
+                writer.writerow(["step", step, stepSummary["count"], stepSummary["totalTime"], "", "", "", ""])
+
+    def writeJSON(self, fid):
+        with open(fid, 'w') as out:
+            json.dump(self.getSummary(), out, indent=4)
+
+    def export(self, fid):
+        # The file's extension picks the format
+        if fid.lower().endswith(".csv"):
+            self.writeCSV(fid)
+        else:
+            self.writeJSON(fid)
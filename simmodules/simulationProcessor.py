@@ -2,18 +2,19 @@ import pprint
 pp = pprint.PrettyPrinter(indent=4)
 import logging
 import time
-import random
 from pathfindScripts.aStar import aStarPathfinder
 from pathfindScripts.LRAstarPathfinder import LRAstarPathfinder
 from pathfindScripts.CAstarPathfinder import CAstarPathfinder
 from pathfindScripts.HCAstarPathfinder import HCAstarPathfinder
 from pathfindScripts.WHCAstarPathfinder import WHCAstarPathfinder
 from pathfindScripts.TokenPassingPathfinder import TokenPassingPathfinder
+from pathfindScripts.SIPPPathfinder import SIPPPathfinder
 from pathfindMoverScripts.LRAstarMover import LRAstarMover
 from pathfindManagerScripts.CAstarReserver import CAstarReserver
 from pathfindManagerScripts.HCAstarReserver import HCAstarReserver
 from pathfindManagerScripts.WHCAstarReserver import WHCAstarReserver
 from pathfindManagerScripts.TokenPassingReserver import TokenPassingReserver
+from pathfindManagerScripts.SIPPReserver import SIPPReserver
 from pathfindMoverScripts.CAstarMover import CAstarMover
 from pathfindMoverScripts.HCAstarMover import HCAstarMover
 from pathfindMoverScripts.WHCAstarMover import WHCAstarMover
@@ -26,6 +27,10 @@ from pathfindTaskerScripts.WHCAstarTasker import WHCAstarTasker
 from pathfindTaskerScripts.TokenPassingTasker import TokenPassingTasker
 from pathfindTaskerScripts.TPTaskSwapTasker import TPTSTasker
 from copy import deepcopy
+from simmodules.simulationTaskSchedule import simTaskSchedule
+from simmodules.simulationMetrics import simPlanMetrics, simStateProfiler
+from simmodules.simulationRunSpec import validateRunSpec
+from simmodules.simulationRandomGenerator import simRandomGenerator
 import sys
 import traceback
 import csv
@@ -34,6 +39,8 @@ import os
 class simProcessor:
     def __init__(self, parent, simulationSettings):
         self.parent = parent
+        # Settings are checked, and defaults filled in, before anything reads them
+        simulationSettings = validateRunSpec(simulationSettings)
         self.simulationSettings = simulationSettings
 
         # Map states to actions
@@ -118,7 +125,8 @@ class simProcessor:
         self.requestedStateID = None
         self.agentGenerator = None
         self.doNextStep = True
-        self.SIMULATION_STATE_SAVE_INCREMENT = 1
+        self.simulationUpdateTimer = None
+        self.SIMULATION_STATE_SAVE_INCREMENT = simulationSettings["stateSaveIncrement"]
 
         # Acquire state information references
         self.simGraphDataRef = self.parent.simGraphData
@@ -138,6 +146,7 @@ class simProcessor:
             "Multi-Agent Cooperative A* (CA*)": (CAstarPathfinder, CAstarReserver, CAstarMover, CAstarTasker),
             "Hierarchical A* with RRA* (HCA*)": (HCAstarPathfinder, HCAstarReserver, HCAstarMover, HCAstarTasker),
             "Windowed HCA* (WHCA*)": (WHCAstarPathfinder, WHCAstarReserver, WHCAstarMover, WHCAstarTasker),
+            "Safe Interval Path Planning (SIPP)": (SIPPPathfinder, SIPPReserver, CAstarMover, CAstarTasker),
             "Token Passing with A* (TP)": (TokenPassingPathfinder, TokenPassingReserver, TokenPassingMover, TokenPassingTasker),
             "TP with Task Swaps (TPTS)": (TokenPassingPathfinder, TokenPassingReserver, TokenPassingMover, TPTSTasker)
         }
@@ -153,12 +162,22 @@ class simProcessor:
             "Windowed HCA* (WHCA*)": {"heuristic": simulationSettings["WHCAstarPathfinderConfig"]["algorithmMAPFWHCAstarHeuristic"],
                                       "heuristicCoefficient": simulationSettings["WHCAstarPathfinderConfig"]["algorithmMAPFWHCAstarHeuristicCoefficient"],
                                       "windowSize": simulationSettings["WHCAstarPathfinderConfig"]["algorithmMAPFWHCAstarWindowSize"]},
+            "Safe Interval Path Planning (SIPP)": {"heuristic": simulationSettings["SIPPPathfinderConfig"]["algorithmMAPFSIPPHeuristic"],
+                                                   "heuristicCoefficient": simulationSettings["SIPPPathfinderConfig"]["algorithmMAPFSIPPHeuristicCoefficient"]},
             "Token Passing with A* (TP)": {"heuristic": simulationSettings["TPPathfinderConfig"]["algorithmMAPFTPHeuristic"],
                                            "heuristicCoefficient": simulationSettings["TPPathfinderConfig"]["algorithmMAPFTPHeuristicCoefficient"]},
             "TP with Task Swaps (TPTS)": {"heuristic": simulationSettings["TPTSPathfinderConfig"]["algorithmMAPDTPHeuristic"],
                                           "heuristicCoefficient": simulationSettings["TPTSPathfinderConfig"]["algorithmMAPDTPHeuristicCoefficient"]}
         }
 
+        # Options of the shared information managers, applied once they are built
+        reserverConfigDict = {
+            "Hierarchical A* with RRA* (HCA*)": {"useDistanceCache": simulationSettings["HCAstarPathfinderConfig"]["algorithmMAPFHCAstarDistanceCache"],
+                                                 "RRAbatchMode": simulationSettings["HCAstarPathfinderConfig"]["algorithmMAPFHCAstarRRABatchMode"]},
+            "Windowed HCA* (WHCA*)": {"useDistanceCache": simulationSettings["WHCAstarPathfinderConfig"]["algorithmMAPFWHCAstarDistanceCache"],
+                                      "RRAbatchMode": simulationSettings["WHCAstarPathfinderConfig"]["algorithmMAPFWHCAstarRRABatchMode"]}
+        }
+
         # Call option's pathfinder class
         self.agentCollisionBehavior = self.simulationSettings["agentCollisionsValue"]
         self.agentActionAlgorithm = algorithmDict[self.algorithmSelection][0]
@@ -169,9 +188,17 @@ class simProcessor:
         infoShareManager = algorithmDict[self.algorithmSelection][1]
         if infoShareManager is not None:
             self.infoShareManager = infoShareManager(self.simGraph)
+            if hasattr(self.infoShareManager, "distanceCacheDirectory"):
+                # Distance tables are cached where the run spec says, so concurrent runs can be kept apart
+                self.infoShareManager.distanceCacheDirectory = simulationSettings["distanceCacheDirectory"]
+            for settingName, settingValue in reserverConfigDict.get(self.algorithmSelection, {}).items():
+                setattr(self.infoShareManager, settingName, settingValue)
         else:
             self.infoShareManager = None
 
+        # Every random draw of the run comes from its own stream, so replications can share a process
+        self.simRandomGenerator = simRandomGenerator(simulationSettings["randomSeed"], simulationSettings["randomRunIndex"])
+
         # Call option's tasker scripts
         simulationTasker = algorithmDict[self.algorithmSelection][3]
         if simulationTasker is not None:
@@ -179,13 +206,15 @@ class simProcessor:
                                                      self.simulationSettings["taskNodeAvailableDict"]["dropoff"],
                                                      self.simulationSettings["taskNodeWeightDict"],
                                                      self.simulationSettings["taskNodeAvailableDict"],
-                                                     self.simCanvasRef, self.simGraph, self.infoShareManager, self.simAgentManagerRef, self.simTaskManagerRef, self.simulationSettings)
+                                                     self.simCanvasRef, self.simGraph, self.infoShareManager, self.simAgentManagerRef, self.simTaskManagerRef, self.simulationSettings,
+                                                     self.simRandomGenerator)
         else:
             self.simulationTasker = defaultTasker(self.simulationSettings["taskNodeAvailableDict"]["pickup"],                 
                                                   self.simulationSettings["taskNodeAvailableDict"]["dropoff"],
                                                   self.simulationSettings["taskNodeWeightDict"],
                                                   self.simulationSettings["taskNodeAvailableDict"],
-                                                  self.simCanvasRef, self.simGraph, self.infoShareManager, self.simAgentManagerRef, self.simTaskManagerRef, self.simulationSettings)
+                                                  self.simCanvasRef, self.simGraph, self.infoShareManager, self.simAgentManagerRef, self.simTaskManagerRef, self.simulationSettings,
+                                                  self.simRandomGenerator)
 
         # Call option's agent movement manager
         agentMovementManager = algorithmDict[self.algorithmSelection][2]
@@ -199,6 +228,12 @@ class simProcessor:
         self.stepCompleted = 0
         self.conflicts = 0
         self.pathfindFailures = 0
+        self.simulationStats = {}
+
+        # Search effort of each plan, and the parts of the plan being searched which the pathfinder does not count
+        self.planMetrics = simPlanMetrics()
+        self.planSearchTime = 0.0
+        self.planLookupCount = 0
         simEndTriggerData = simulationSettings["simulationEndConditions"]
         # pp.pprint(simulationSettings["simulationEndConditions"])
         endOnTaskCount = simEndTriggerData["simulationEndOnTaskCount"]
@@ -217,16 +252,19 @@ class simProcessor:
         self.stateHistoryManager = simProcessStateHandler(self)
 
         # Profiling
-        self.stateStartTime = time.perf_counter()
-        self.loopStartTime = time.perf_counter()
-        self.resetIterablesCounter = 0
-        self.taskGenerationCounter = 0
-        self.selectAgentCounter = 0
-        self.executeAgentActionCounter = 0
-        self.renderGraphStateCounter = 0
-        self.incrementStepCounterCounter = 0
+        # Wall time of each FSM state and of each step, timed only while the profiler is enabled
+        self.stateProfiler = simStateProfiler(simulationSettings["profileSimulationStates"])
+        # Where the timings are written at the end of the run, as .csv or .json by extension
+        self.stateProfileFile = simulationSettings["stateProfileFile"]
         self.currentState = "newSimStep"
         self.persistRenders = False
+
+        # Fast-forward execution of unrendered states
+        self.fastForward = simulationSettings["renderFastForward"]
+        self.fastForwardYieldTime = simulationSettings["renderFastForwardTime"] / 1000
+        self.stepRateStartTime = time.perf_counter()
+        self.stepRateStepCount = 0
+        self.stepsPerSecond = 0
         
     def simulationStopTicking(self):
         self.parent.parent.parent.after_cancel(self.simulationUpdateTimer)
@@ -250,13 +288,8 @@ class simProcessor:
             # Load the schedule
             fid = self.simulationSettings["taskScheduleFile"]
             fidID = str(os.path.basename(fid))
-            with open(fid, 'r') as inp:
-                # Extract all the data
-                reader = csv.reader(inp)
-                self.taskSchedule = list(reader)
-                # Ignore the first row of the schedule
-                self.taskSchedule.pop(0)
-                # pp.pprint(self.taskSchedule)
+            # Parsed once into release order, or read from disk as the simulation reaches each release
+            self.taskSchedule = simTaskSchedule(fid, self.simulationSettings["taskScheduleStreaming"])
         # pp.pprint(self.simGraph.edges('(1, 0)'))
         # pp.pprint(self.simGraph.nodes())
         # import networkx as nx
@@ -278,11 +311,27 @@ class simProcessor:
                 Render the new state
                 - Update statistics
         """
+        nextStateID = self.executeState(stateID)
+
+        # Call the next state
+        if self.doNextStep:
+            self.simulationStateMachineNextStep(nextStateID)
+
+        
+        ### Generate new tasks
+        ### Calculate/execute agent moves
+            # Charge expenditures
+            # Agent states/goals update
+        ### Execute task interactions if applicable
+        ### Verify task states
+
+    def executeState(self, stateID):
         # Profiling
-        # self.stateEndTime = time.perf_counter()
-        # print(f"State {self.currentState} lasted: {self.stateEndTime - self.stateStartTime}")
-        # self.stateStartTime = time.perf_counter()
-        # print(f"State {self.currentState} passed")
+        profileState = self.stateProfiler.enabled
+        if profileState:
+            # endSimStep advances the step count, so the step the state belongs to is read before it runs
+            profiledStep = self.parent.parent.simulationWindow.simStepView.simStepCountTextValue.get()
+            stateStartTime = self.stateProfiler.startTimer()
         # Track the new current state
         self.currentState = stateID
         
@@ -291,16 +340,17 @@ class simProcessor:
         targetLabelText.set(self.simulationStateMachineMap[stateID]["stateLabel"])
 
         # Enact the state
-        
-        # self.stateTimerStart = time.perf_counter()
         try:
             self.simulationStateMachineMap[stateID]["exec"]()
         except:
-            self.tb = traceback.format_exc()
-            print(self.tb)
+            if stateID != "simulationErrorState":
+                # Keep the traceback of what went wrong, not of the error state which stops the simulation
+                self.tb = traceback.format_exc()
+                logging.error(self.tb)
             self.requestedStateID = "simulationErrorState"
-        # self.stateTimerEnd = time.perf_counter()
-        # print(f"State {self.currentState} function time: {self.stateTimerEnd-self.stateTimerStart}")
+        if profileState:
+            self.stateProfiler.recordState(stateID, profiledStep, stateStartTime)
+            renderStartTime = self.stateProfiler.startTimer()
 
         # Trigger the next state machine update
         self.previousStateID = stateID
@@ -326,18 +376,10 @@ class simProcessor:
             self.simCanvasRef.requestRender("text", "clear", {})
             self.simCanvasRef.handleRenderQueue()
             self.persistRenders = False
+        if profileState:
+            self.stateProfiler.recordRender(profiledStep, renderStartTime)
 
-        # Call the next state
-        if self.doNextStep:
-            self.simulationStateMachineNextStep(nextStateID)
-
-        
-        ### Generate new tasks
-        ### Calculate/execute agent moves
-            # Charge expenditures
-            # Agent states/goals update
-        ### Execute task interactions if applicable
-        ### Verify task states
+        return nextStateID
 
     def simulationStateMachineNextStep(self, stateID=None):
         # If a specific state is called for, use it
@@ -350,9 +392,6 @@ class simProcessor:
             
             # If so, get the render duration
             frameDelay = self.simulationStateMachineMap[self.currentState]["stateRenderDuration"]
-            if frameDelay == "":
-                # Use the default value
-                frameDelay = 300
             # Trigger state machine update after the specified duration
             self.simulationUpdateTimer = self.parent.parent.parent.after(frameDelay, 
                 lambda stateID=stateID: self.simulateStep(stateID))
@@ -361,34 +400,70 @@ class simProcessor:
             # Empty the render queue
             self.simCanvasRef.renderQueue = []
             # Use after so that the UI doesn't lock up while doing this
-            self.simulationUpdateTimer = self.parent.parent.parent.after(0, 
-                lambda stateID=stateID: self.simulateStep(stateID))
+            if self.fastForward:
+                # Run as many states as fit in the UI update interval before handing control back
+                self.simulationUpdateTimer = self.parent.parent.parent.after(0, 
+                    lambda stateID=stateID: self.fastForwardStates(stateID))
+            else:
+                self.simulationUpdateTimer = self.parent.parent.parent.after(0, 
+                    lambda stateID=stateID: self.simulateStep(stateID))
+
+    def fastForwardStates(self, stateID):
+        # Execute unrendered states back to back in a plain loop, yielding to the UI once the time budget is spent
+        # Stops early if a state needs to be displayed, so its render duration is respected
+        yieldTime = time.perf_counter() + self.fastForwardYieldTime
+        while True:
+            stateID = self.executeState(stateID)
+            if not self.doNextStep or stateID is None:
+                # Playback was stopped by the state
+                return
+            if self.simulationStateMachineMap[self.currentState]["renderStateBool"]:
+                break
+            if time.perf_counter() >= yieldTime:
+                break
+        self.simulationStateMachineNextStep(stateID)
+
+    def updateStepRate(self):
+        # Measure the simulation's throughput over windows of at least a second
+        self.stepRateStepCount = self.stepRateStepCount + 1
+        currentTime = time.perf_counter()
+        elapsedTime = currentTime - self.stepRateStartTime
+        if elapsedTime >= 1:
+            self.stepsPerSecond = self.stepRateStepCount / elapsedTime
+            self.stepRateStepCount = 0
+            self.stepRateStartTime = currentTime
+            targetLabelText = self.parent.parent.simulationWindow.simStepView.simStepRateTextValue
+            targetLabelText.set(f"{self.stepsPerSecond:.1f}")
             
     def newSimStep(self):
         self.persistRenders = False
-        # Profiling
-        # self.loopEndTime = time.perf_counter()
-        # print(f"Total loop time: {self.loopEndTime - self.loopStartTime}")
-        # print("====== NEW LOOP =======")
-        # self.loopStartTime = time.perf_counter()
         # Certain objects need to be reset on new steps
         # These objects cause loopbacks in the FSM
         # Prepare for a new step
         # First, save the current state if it is the right time
         targetLabelText = self.parent.parent.simulationWindow.simStepView.simStepCountTextValue
         stepID = targetLabelText.get()
-        if stepID % self.SIMULATION_STATE_SAVE_INCREMENT == 0:
-            # pass
-            print(f"Saved simulation state for step {stepID}")
+        if self.SIMULATION_STATE_SAVE_INCREMENT and stepID % self.SIMULATION_STATE_SAVE_INCREMENT == 0:
+            logging.debug(f"Saved simulation state for step {stepID}")
             self.stateHistoryManager.copyCurrentState(stepID)
         # The list of agents needs to be reset for this step
         # print(f"Creating a new list of agents for step {stepID}")
 
         # Process the agent list, shifting agents who just completed a 
         # self.agentQueue = (agent for agent in self.simAgentManagerRef.agentList.keys())
+
+        # Bring in scheduled tasks whose release times have been met, once for the whole step
+        if self.simulationSettings["tasksAreScheduled"]:
+            self.releaseScheduledTasks()
         self.requestedStateID = "selectAgent"
         return
 
+    def releaseScheduledTasks(self):
+        # Use the task schedule, bringing in new tasks as their release times are met
+        for task in self.taskSchedule.releaseTasks(self.stepCompleted):
+            self.simTaskManagerRef.createNewTask(pickupNode=task.pickupNode, 
+                dropoffNode=task.dropoffNode, timeLimit=task.timeLimit, taskName=task.name, timeStamp=task.releaseTime)
+
     def selectAgent(self):
         self.persistRenders = True
         # Select an agent, keeping in mind there may be a queue of agents
@@ -427,26 +502,6 @@ class simProcessor:
 
     def taskAssignment(self):
         self.persistRenders = True
-        if self.simulationSettings["tasksAreScheduled"]:
-            # Use the task schedule, bringing in new tasks as their release times are met
-            tasksToPop = []
-            for i, task in enumerate(self.taskSchedule):
-                # print(task)
-                # print(f"{eval(task[3])} vs {self.stepCompleted}")
-                if eval(task[3]) <= self.stepCompleted:
-                    tasksToPop.append(i)
-                    # The task can be brought in
-                    pickupNode = task[0]
-                    dropoffNode = task[1]
-                    timeLimit = eval(task[2])
-                    creationTime = eval(task[3])
-                    name = task[4]
-                    # print(name)
-                    self.simTaskManagerRef.createNewTask(pickupNode=pickupNode, 
-                        dropoffNode=dropoffNode, timeLimit=timeLimit, taskName=name, timeStamp=creationTime)
-            # Pop the tasks
-            for index in sorted(tasksToPop, reverse=True):
-                self.taskSchedule.pop(index)
         # Assign tasks if agent needs a task
         # Assign a new task if the task status is "unassigned"
         # Or generate a new task if there are not, and generation on demand is enabled
@@ -457,7 +512,9 @@ class simProcessor:
             # print(f"Agent {self.currentAgent.ID} needs a new task.")
             # self.generateTask()
             # print("=============================================")
+            taskerPlanningStart = self.startTaskerPlanning()
             taskSelect = self.simulationTasker.selectTaskForAgent(self.currentAgent, timeStamp=self.stepCompleted)
+            self.recordTaskerPlanning(taskerPlanningStart)
             # print(f"\t {self.currentAgent.numID} wound up with:{taskSelect} on T{self.stepCompleted}")
             if type(taskSelect) is not int and taskSelect is not True:
                 # If there are no tasks meeting the criterion, check if a task can be generated
@@ -555,7 +612,9 @@ class simProcessor:
             # Agent doesn't currently have a target
             # agentTargetNode = self.currentAgent.currentNode
             # print(f"Agent is aimless...")
+            taskerPlanningStart = self.startTaskerPlanning()
             agentTargetNode = self.simulationTasker.handleAimlessAgent(self.currentAgent)
+            self.recordTaskerPlanning(taskerPlanningStart)
             # print(f"{self.currentAgent.ID} has target: {agentTargetNode}")
             # self.currentAgent.pathfinder = self.agentActionAlgorithm(self.currentAgent.numID, self.simCanvasRef, self.simGraph, self.currentAgent.currentNode, self.currentAgent.currentNode, self.agentActionAlgorithm, self.infoShareManager)
         if self.currentAgent.pathfinder is None or self.currentAgent.pathfinder.invalid == True:
@@ -581,7 +640,7 @@ class simProcessor:
                 self.currentAgent.actionTaken = True
                 self.requestedStateID = "checkAgentQueue"
             else:
-                print("action invalid")
+                logging.debug("action invalid")
                 self.conflicts = self.conflicts + 1
                 self.requestedStateID = "agentPlanMove"
             return
@@ -599,7 +658,7 @@ class simProcessor:
             conflicts = self.agentMovementManager.checkAgentCollisions()
             # print(f"Conflicts: {conflicts}")
             if isinstance(conflicts, dict):
-                print("HAD CONFLICTS")
+                logging.debug("HAD CONFLICTS")
                 # Did not resolve, do new planning
                 self.conflicts = self.conflicts + 1
                 self.agentQueue = conflicts["agents"]
@@ -618,10 +677,23 @@ class simProcessor:
         self.persistRenders = True
         # For speed, only use the rendered version of the pathfinder if the frame is being rendered
         # print(f"Agent {self.currentAgent.ID} searching for path... {self.currentAgent.currentNode}->{self.currentAgent.pathfinder.targetNode}")
+        reservationTable = getattr(self.infoShareManager, "reservationTable", None)
+        lookupsBefore = reservationTable.lookupCount if reservationTable is not None else 0
+        searchStartTime = time.perf_counter()
         if self.simulationStateMachineMap["agentPathfind"]["renderStateBool"]:
             pathStatus = self.currentAgent.pathfinder.searchStepRender()
         else:
-            pathStatus = self.currentAgent.pathfinder.searchStep()
+            # Nothing is shown between expansions, so the whole search runs in this one state
+            pathStatus = self.currentAgent.pathfinder.searchToCompletion()
+            if pathStatus is not False and pathStatus != "wait":
+                # The found path is already held by the pathfinder
+                pathStatus = True
+        # A rendered search spans many visits to this state, so its time and lookups are summed until the plan ends
+        self.planSearchTime = self.planSearchTime + time.perf_counter() - searchStartTime
+        if reservationTable is not None:
+            self.planLookupCount = self.planLookupCount + reservationTable.lookupCount - lookupsBefore
+        if pathStatus is not False:
+            self.recordPlan(pathStatus)
 
         if pathStatus == False:
             # print(f"\t...did not finish on this iteration.")
@@ -646,6 +718,47 @@ class simProcessor:
             self.requestedStateID = "checkAgentQueue"
             # print(f"!!! {self.agentQueue}")
 
+    def recordPlan(self, pathStatus):
+        # Called when the current agent's search ends, before a failed pathfinder is reset
+        pathfinder = self.currentAgent.pathfinder
+        if pathStatus == "wait":
+            outcome = "wait"
+        elif pathfinder.plannedPath and pathfinder.plannedPath[-1] != pathfinder.targetNode:
+            # Windowed searches stop short of the target once the window is filled
+            outcome = "windowCut"
+        else:
+            outcome = "found"
+        self.planMetrics.recordPlan(self.currentAgent.numID, self.stepCompleted, pathfinder.getSearchStats(),
+            self.planLookupCount, self.planSearchTime, outcome)
+        self.planSearchTime = 0.0
+        self.planLookupCount = 0
+
+    def startTaskerPlanning(self):
+        # Taskers which search for paths themselves, as TP and TPTS do, keep the totals of one path search for the run
+        # Their plans are read as the change in those totals over a call to the tasker
+        pathSearch = getattr(self.simulationTasker, "pathSearch", None)
+        reservationTable = getattr(self.infoShareManager, "reservationTable", None)
+        searchStats = pathSearch.getStats() if pathSearch is not None else {"expanded": 0, "generated": 0, "peakOpenSet": 0}
+        failedCount = pathSearch.failedCount if pathSearch is not None else 0
+        lookupCount = reservationTable.lookupCount if reservationTable is not None else 0
+        return (searchStats, failedCount, lookupCount, time.perf_counter())
+
+    def recordTaskerPlanning(self, taskerPlanningStart):
+        searchStatsBefore, failedCountBefore, lookupCountBefore, startTime = taskerPlanningStart
+        wallTime = time.perf_counter() - startTime
+        pathSearch = getattr(self.simulationTasker, "pathSearch", None)
+        if pathSearch is None or pathSearch.expansionCount == searchStatsBefore["expanded"]:
+            # No path was searched for during the call
+            return
+        reservationTable = getattr(self.infoShareManager, "reservationTable", None)
+        lookupCount = reservationTable.lookupCount - lookupCountBefore if reservationTable is not None else 0
+        searchStats = pathSearch.getStats()
+        searchStats["expanded"] = searchStats["expanded"] - searchStatsBefore["expanded"]
+        searchStats["generated"] = searchStats["generated"] - searchStatsBefore["generated"]
+        # Every search made in the call is counted as one plan for the current agent, which waits if any of them failed
+        outcome = "wait" if pathSearch.failedCount > failedCountBefore else "found"
+        self.planMetrics.recordPlan(self.currentAgent.numID, self.stepCompleted, searchStats, lookupCount, wallTime, outcome)
+
     def checkAgentQueue(self):
         self.persistRenders = False
         # Check the current queue
@@ -671,7 +784,7 @@ class simProcessor:
         return
 
     def simulationError(self):
-        print(f"Simulation reached an error.")
+        logging.error("Simulation reached an error.")
         self.doNextStep = False
         raise Exception("Simulation reached an error state")
     
@@ -687,9 +800,9 @@ class simProcessor:
         # print("CHECKING END CONDITIONS . . .")
         if self.simulationSettings["tasksAreScheduled"]:
             # If using a task schedule
-            if len(self.taskSchedule) == 0:
+            if not self.taskSchedule.hasRemainingTasks():
                 # If there are no more tasks to be released
-                if any(task.taskStatus != "completed" for task in self.simTaskManagerRef.taskList.values()):
+                if len(self.simTaskManagerRef.taskList) > self.simTaskManagerRef.countTasksWithStatus("completed"):
                     # And there are tasks left to complete
                     self.scheduleCompleted = False
                 else:
@@ -711,6 +824,7 @@ class simProcessor:
                     pass
                     # print(f"\t{conditionType} not met: {currentValue} vs {triggerValue}")
         targetLabelText.set(self.stepCompleted + 1)
+        self.updateStepRate()
 
         # print(stepCompleted)
         if self.infoShareManager is not None:
@@ -735,40 +849,19 @@ class simProcessor:
         taskCompletedLabelText = self.parent.parent.simulationWindow.simScoreView.taskCompletionValue
         taskCompletedLabelText.set(self.tasksCompleted)
 
-        # Service time
-        completedTasks = [task for task in self.simTaskManagerRef.taskList.values() if task.taskStatus == "completed"]
-        if len(completedTasks) > 0:
-            taskRunTimes = []
-            taskServiceTimes = []
-            taskLifeTimes = []
-            taskServiceabilityRatings = []
-            taskMinimumTimes = []
-            for task in completedTasks:
-                taskRunTime = task.serviceCompleteTime - task.serviceStartTime
-                taskRunTimes.append(taskRunTime)
-                taskServiceTime = task.serviceCompleteTime - task.serviceAssignTime
-                taskServiceTimes.append(taskServiceTime)
-                taskLifeTime = task.serviceCompleteTime - task.createTime
-                taskLifeTimes.append(taskLifeTime)
-                taskServiceability = task.serviceStartTime - task.serviceAssignTime
-                taskServiceabilityRatings.append(taskServiceability)
-                taskMinimumTime = task.optimalServiceTime
-                taskMinimumTimes.append(taskMinimumTime)
-
-            # Calculate the means
-            meanRunTime = sum(taskRunTimes)/len(taskRunTimes)
-            meanServiceTime = sum(taskServiceTimes)/len(taskServiceTimes)
-            meanLifeTime = sum(taskLifeTimes)/len(taskLifeTimes)
-            meanTaskServiceability = sum(taskServiceabilityRatings)/len(taskServiceabilityRatings)
-            meanMinimumTime = sum(taskMinimumTimes)/len(taskMinimumTimes)
+        # Service time, kept up to date by the task manager as each task completes
+        completedTaskMetrics = self.simTaskManagerRef.completedTaskMetrics
+        if completedTaskMetrics.getCompletedCount() > 0:
+            self.simulationStats = completedTaskMetrics.getMeanStats()
 
             # Update displays
-            self.parent.parent.simulationWindow.simScoreView.serviceTimeValue.set(round(meanServiceTime, 2))
-            self.parent.parent.simulationWindow.simScoreView.normServiceTimeValue.set(round(meanServiceTime-meanMinimumTime, 2))
-            self.parent.parent.simulationWindow.simScoreView.runTimeValue.set(round(meanRunTime, 2))
-            self.parent.parent.simulationWindow.simScoreView.normrunTimeValue.set(round(meanRunTime-meanMinimumTime, 2))
-            self.parent.parent.simulationWindow.simScoreView.lifeTimeValue.set(round(meanLifeTime, 2))
-            self.parent.parent.simulationWindow.simScoreView.serviceabilityValue.set(round(meanTaskServiceability, 2))
+            scoreView = self.parent.parent.simulationWindow.simScoreView
+            scoreView.serviceTimeValue.set(round(self.simulationStats["meanServiceTime"], 2))
+            scoreView.normServiceTimeValue.set(round(self.simulationStats["meanNormServiceTime"], 2))
+            scoreView.runTimeValue.set(round(self.simulationStats["meanRunTime"], 2))
+            scoreView.normrunTimeValue.set(round(self.simulationStats["meanNormRunTime"], 2))
+            scoreView.lifeTimeValue.set(round(self.simulationStats["meanLifeTime"], 2))
+            scoreView.serviceabilityValue.set(round(self.simulationStats["meanServiceability"], 2))
 
         # Conflict count
         conflictCountLabelText = self.parent.parent.simulationWindow.simScoreView.conflictCountValue
@@ -778,11 +871,56 @@ class simProcessor:
         pathfindFailureCountText = self.parent.parent.simulationWindow.simScoreView.pathfindFailCountValue
         pathfindFailureCountText.set(self.pathfindFailures)
 
+        # Planning effort
+        scoreView = self.parent.parent.simulationWindow.simScoreView
+        scoreView.planCountValue.set(self.planMetrics.getPlanCount())
+        if self.planMetrics.getPlanCount() > 0:
+            planStats = self.planMetrics.getMeanStats()
+            scoreView.meanExpandedValue.set(round(planStats["meanExpanded"], 2))
+            scoreView.meanPlanTimeValue.set(round(planStats["meanWallTime"]*1000, 3))
+
+    def packageSimulationResults(self):
+        # Collect the scores of the simulation in its current state
+        simulationResults = {
+            "algorithmSelection": self.algorithmSelection,
+            "stepCompleted": self.stepCompleted,
+            "tasksCompleted": self.tasksCompleted,
+            "conflicts": self.conflicts,
+            "pathfindFailures": self.pathfindFailures,
+            "stepsPerSecond": self.stepsPerSecond,
+            "scheduleCompleted": self.scheduleCompleted,
+            "endState": self.currentState
+        }
+        simulationResults.update(self.simulationStats)
+        # Variance and percentiles of each task time
+        simulationResults["taskTimeDistributions"] = self.simTaskManagerRef.completedTaskMetrics.getDistributionStats()
+        # Search effort of every plan, totalled per agent and per step
+        simulationResults["planningStats"] = self.planMetrics.getSummary()
+        # Time spent in each FSM state, if the profiler was used
+        if self.stateProfiler.hasData():
+            simulationResults["stateTimings"] = self.stateProfiler.getSummary()
+        # Peak size of the reservation table, for algorithms which keep one
+        if self.infoShareManager is not None and hasattr(self.infoShareManager, "reservationTable"):
+            simulationResults["reservationHighWaterMark"] = self.infoShareManager.reservationTable.getHighWaterMark()
+        return simulationResults
+
     def endSimulation(self):
-        print(f"Simulation reached its end goal state.")
+        logging.info(f"Simulation reached its end goal state.")
+        if self.infoShareManager is not None and hasattr(self.infoShareManager, "reservationTable"):
+            logging.info(f"Reservation table high-water mark: {self.infoShareManager.reservationTable.getHighWaterMark()}")
+        if self.simulationSettings["tasksAreScheduled"]:
+            # Release a streamed schedule's file handle
+            self.taskSchedule.closeFile()
+        self.exportStateProfile()
         self.doNextStep = False
         self.simulationStopTicking()
 
+    def exportStateProfile(self):
+        # Write out the state timings, if any were taken and a file was given for them
+        if self.stateProfileFile and self.stateProfiler.hasData():
+            self.stateProfiler.export(self.stateProfileFile)
+            logging.info(f"State timings written to '{self.stateProfileFile}'.")
+
     def generateTask(self):
         # Kwargs for generating a task
         # Packaged taskData: {'name': 'task1', 'pickupPosition': (0, 1), 'dropoffPosition': (4, 8), 'timeLimit': 0, 'assignee': 0}
@@ -792,8 +930,8 @@ class simProcessor:
         # pickupNodes = self.simulationSettings["taskNodeAvailableDict"]["pickup"]
         # dropoffNodes = self.simulationSettings["taskNodeAvailableDict"]["dropoff"]
         
-        # pickupNode = random.choice(list(pickupNodes.keys()))
-        # dropoffNode = random.choice(list(dropoffNodes.keys()))
+        # pickupNode = self.simRandomGenerator.choice(list(pickupNodes.keys()))
+        # dropoffNode = self.simRandomGenerator.choice(list(dropoffNodes.keys()))
         # timeLimit = 0
         # assignee = None
         # taskStatus = "unassigned"
@@ -821,6 +959,8 @@ class simProcessStateHandler:
     """
     def __init__(self, parent):
         self.parent = parent
+        # Only the latest snapshots are kept if there is a limit, so long runs don't hold every step's state
+        self.stateSaveLimit = parent.simulationSettings["stateSaveLimit"]
 
         self.saveStateList =  {}
 
@@ -835,6 +975,12 @@ class simProcessStateHandler:
         taskData = self.parent.simTaskManagerRef.packageTaskData()
         self.saveStateList[stepID]["taskData"] = taskData
         # pp.pprint(self.saveStateList[stepID]["taskData"])
+        # Restoring the random stream's position replays the same draws after the state is loaded
+        self.saveStateList[stepID]["randomState"] = self.parent.simRandomGenerator.getState()
+        # Tasks drawn ahead of time, but not yet generated, are part of that position
+        self.saveStateList[stepID]["taskGeneratorState"] = self.parent.simulationTasker.taskGenerator.getState()
+        while self.stateSaveLimit and len(self.saveStateList) > self.stateSaveLimit:
+            del self.saveStateList[min(self.saveStateList)]
         self.savedStateIDList = list(self.saveStateList.keys())
         self.parent.parent.parent.simulationWindow.simControlPanel.updateStateSelectionChoices(self.savedStateIDList)
 
@@ -851,6 +997,8 @@ class simProcessStateHandler:
             targetLabelText.set(stateID)    
             self.parent.simAgentManagerRef.loadSavedSimState(stateData["agentData"])
             self.parent.simTaskManagerRef.loadSavedSimState(stateData["taskData"])
+            self.parent.simRandomGenerator.setState(stateData["randomState"])
+            self.parent.simulationTasker.taskGenerator.setState(stateData["taskGeneratorState"])
             self.parent.simCanvasRef.renderAgents()
 
             # After loading, reset the statemachine's state to be the start of a step
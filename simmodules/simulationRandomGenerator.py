@@ -0,0 +1,67 @@
+import logging
+import random
+from hashlib import sha512
+from numpy.random import SeedSequence, default_rng
+
+class simRandomGenerator:
+    """
+        Random stream owned by a single simulation run, so runs sharing a process cannot disturb each other's draws
+        Run 0 of a master seed draws exactly as the global 'random' module seeded with it did;
+        every other run index draws from its own stream spawned from the master seed
+        Batches of draws come from a NumPy generator spawned alongside, with its own stream
+    """
+    def __init__(self, masterSeed, runIndex=0):
+        self.masterSeed = masterSeed
+        self.runIndex = runIndex
+        self.generator = random.Random(self.deriveRunSeed(masterSeed, runIndex))
+        self.numpyGenerator = default_rng(self.getRunSeedSequence(masterSeed, runIndex).spawn(1)[0])
+        logging.debug(f"Simulation random stream built for run {runIndex} of seed {masterSeed}.")
+
+    @staticmethod
+    def getRunSeedSequence(masterSeed, runIndex):
+        # SeedSequence spreads neighbouring run indices into unrelated streams
+        if masterSeed is None:
+            # A seed of None draws from the system's entropy, and is not repeatable
+            return SeedSequence()
+        if isinstance(masterSeed, int):
+            seedEntropy = abs(masterSeed)
+        else:
+            # String seeds, as the editor's seed entry gives, are hashed much as 'random.seed' does
+            seedEntropy = int.from_bytes(sha512(str(masterSeed).encode()).digest(), "big")
+        return SeedSequence(seedEntropy, spawn_key=(runIndex,))
+
+    @classmethod
+    def deriveRunSeed(cls, masterSeed, runIndex):
+        if runIndex == 0 or masterSeed is None:
+            return masterSeed
+        return int.from_bytes(cls.getRunSeedSequence(masterSeed, runIndex).generate_state(8).tobytes(), "little")
+
+    def choice(self, sequence):
+        return self.generator.choice(sequence)
+
+    def choices(self, population, weights=None, k=1):
+        return self.generator.choices(population, weights=weights, k=k)
+
+    def random(self):
+        return self.generator.random()
+
+    def randomBlock(self, size):
+        # An array of size floats in [0, 1), drawn in one call
+        return self.numpyGenerator.random(size)
+
+    def integerBlock(self, high, size):
+        # An array of size integers in [0, high), drawn in one call
+        return self.numpyGenerator.integers(high, size=size)
+
+    def getState(self):
+        # The generators' positions in their streams, saved with each simulation state snapshot
+        return (self.generator.getstate(), self.numpyGenerator.bit_generator.state)
+
+    def setState(self, generatorState):
+        pythonState, numpyState = generatorState
+        self.generator.setstate(pythonState)
+        self.numpyGenerator.bit_generator.state = numpyState
+
+    def packageRandomGeneratorData(self):
+        # Enough to rebuild the stream from its start
+        return {"masterSeed": self.masterSeed, "runIndex": self.runIndex}
@@ -0,0 +1,200 @@
+import json
+import logging
+from copy import deepcopy
+from numbers import Number
+
+# Bumped whenever a setting is renamed or changes meaning, so older spec files can be recognised
+RUN_SPEC_VERSION = 1
+
+# Selectable algorithms and the kind of problem each one solves
+algorithmTypes = {
+    "Single-agent A*": "sapf",
+    "Multi-Agent A* (LRA*)": "mapf",
+    "Multi-Agent Cooperative A* (CA*)": "mapf",
+    "Hierarchical A* with RRA* (HCA*)": "mapf",
+    "Windowed HCA* (WHCA*)": "mapf",
+    "Safe Interval Path Planning (SIPP)": "mapf",
+    "Token Passing with A* (TP)": "mapf",
+    "TP with Task Swaps (TPTS)": "mapf"
+}
+
+# FSM states whose rendering can be switched on, named as in their 'render<State>' settings
+renderedStateNames = ["NewSimStep", "AgentSelect", "TaskAssignment", "AgentActionSelection", "TaskInteraction",
+                      "AgentPlanMove", "AgentMovement", "AgentPathfind", "CheckAgentQueue", "EndSimStep"]
+
+# Marks settings which have no default and must be given
+requiredSetting = object()
+
+# Setting name: (type, default) for each setting the simulation reads
+# A type of None accepts None as well as strings, for optional file names, and Number accepts ints and floats
+runSpecFields = {
+    "algorithmSelection": (str, requiredSetting),
+    "agentCollisionsValue": (str, "Respected"),
+    "agentMiscOptionTaskInteractCostValue": (str, "No cost for pickup/dropoff"),
+    "taskGenerationAsAvailableTrigger": (str, "completed"),
+    "tasksAreScheduled": (bool, False),
+    "taskScheduleFile": (None, None),
+    "taskScheduleStreaming": (bool, False),
+    "renderSimulationPlayback": (bool, False),
+    "renderFastForward": (bool, True),
+    "renderFastForwardTime": (int, 20),
+    "profileSimulationStates": (bool, False),
+    "stateProfileFile": (None, None),
+    "randomRunIndex": (int, 0),
+    "distanceCacheDirectory": (None, None),
+    # Steps between the snapshots kept for playback, 0 taking none, and how many of the latest to keep, 0 keeping all
+    "stateSaveIncrement": (int, 1),
+    "stateSaveLimit": (int, 0)
+}
+for stateName in renderedStateNames:
+    runSpecFields["render" + stateName] = (bool, False)
+    runSpecFields["render" + stateName + "Time"] = (int, 300)
+
+# The pathfinder config of each algorithm: config name: {setting name: (type, default)}
+pathfinderConfigFields = {
+    "aStarPathfinderConfig": {"algorithmSAPFAStarHeuristic": (str, "Dijkstra"), "algorithmSAPFAStarHeuristicCoefficient": (Number, 1)},
+    "LRAstarPathfinderConfig": {"algorithmMAPFLRAstarHeuristic": (str, "Dijkstra"), "algorithmMAPFLRAstarHeuristicCoefficient": (Number, 1)},
+    "CAstarPathfinderConfig": {"algorithmMAPFCAstarHeuristic": (str, "Dijkstra"), "algorithmMAPFCAstarHeuristicCoefficient": (Number, 1)},
+    "HCAstarPathfinderConfig": {"algorithmMAPFHCAstarHeuristic": (str, "Dijkstra"), "algorithmMAPFHCAstarHeuristicCoefficient": (Number, 1),
+                                "algorithmMAPFHCAstarDistanceCache": (bool, False), "algorithmMAPFHCAstarRRABatchMode": (bool, False)},
+    "WHCAstarPathfinderConfig": {"algorithmMAPFWHCAstarHeuristic": (str, "Dijkstra"), "algorithmMAPFWHCAstarHeuristicCoefficient": (Number, 1),
+                                 "algorithmMAPFWHCAstarWindowSize": (int, 5), "algorithmMAPFWHCAstarDistanceCache": (bool, False),
+                                 "algorithmMAPFWHCAstarRRABatchMode": (bool, False)},
+    "SIPPPathfinderConfig": {"algorithmMAPFSIPPHeuristic": (str, "Dijkstra"), "algorithmMAPFSIPPHeuristicCoefficient": (Number, 1)},
+    "TPPathfinderConfig": {"algorithmMAPFTPHeuristic": (str, "Dijkstra"), "algorithmMAPFTPHeuristicCoefficient": (Number, 1)},
+    "TPTSPathfinderConfig": {"algorithmMAPDTPHeuristic": (str, "Dijkstra"), "algorithmMAPDTPHeuristicCoefficient": (Number, 1)}
+}
+
+simulationEndFields = {
+    "simulationEndOnTaskCount": (bool, False),
+    "simulationEndTaskCount": (int, 1),
+    "simulationEndOnStepCount": (bool, False),
+    "simulationEndStepCount": (int, 1),
+    "simulationEndOnSchedule": (bool, False)
+}
+
+class runSpecError(ValueError):
+    """
+        Raised when a run spec is missing a setting, or holds a value that cannot be read as the setting's type
+    """
+    pass
+
+def coerceSetting(settingName, value, settingType):
+    # Reads the value as the setting's type, accepting the strings and 0/1 integers that Tk variables hand back
+    if settingType is None:
+        if value is None or isinstance(value, str):
+            return value
+    elif settingType is bool:
+        if isinstance(value, bool):
+            return value
+        if value in (0, 1):
+            return bool(value)
+    elif settingType is str:
+        if isinstance(value, str):
+            return value
+    elif isinstance(value, str):
+        try:
+            if settingType is Number:
+                # Whole numbers stay integers, as the config window's spinboxes give them
+                return float(value) if any(character in value for character in ".eE") else int(value)
+            return settingType(value)
+        except ValueError:
+            pass
+    elif settingType is Number and isinstance(value, Number) and not isinstance(value, bool):
+        return value
+    elif isinstance(value, Number) and not isinstance(value, bool):
+        if settingType is int and int(value) != value:
+            raise runSpecError(f"Setting '{settingName}' must be a whole number, not {value!r}.")
+        return settingType(value)
+    typeName = {None: "a string or None", Number: "a number"}.get(settingType, getattr(settingType, "__name__", str(settingType)))
+    raise runSpecError(f"Setting '{settingName}' must be {typeName}, not {value!r}.")
+
+def validateFields(settings, fieldSpecs, settingPath=""):
+    # Fills in defaults and coerces each known setting of the dict in place
+    for settingName, (settingType, default) in fieldSpecs.items():
+        fullName = settingPath + settingName
+        value = settings.get(settingName, default)
+        if value is requiredSetting:
+            raise runSpecError(f"Setting '{fullName}' is required.")
+        if settingType is int and value == "":
+            # An emptied entry box asks for the default
+            value = default
+        settings[settingName] = coerceSetting(fullName, value, settingType)
+
+def validateNodeDict(settings, settingName, settingType):
+    # Node dicts map "pickup" and "dropoff" to {node name: value}
+    nodeDicts = settings.get(settingName, {"pickup": {}, "dropoff": {}})
+    if not isinstance(nodeDicts, dict):
+        raise runSpecError(f"Setting '{settingName}' must be a dict of pickup and dropoff nodes.")
+    validatedDicts = {}
+    for nodeType in ["pickup", "dropoff"]:
+        validatedDicts[nodeType] = {}
+        for nodeName, value in nodeDicts.get(nodeType, {}).items():
+            validatedDicts[nodeType][nodeName] = coerceSetting(f"{settingName}.{nodeType}.{nodeName}", value, settingType)
+    settings[settingName] = validatedDicts
+
+def checkSerializable(value, settingName):
+    # Anything left unchecked, such as the config window's unused options, must still be plain data
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            checkSerializable(item, settingName)
+        return
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if not isinstance(key, str):
+                raise runSpecError(f"Setting '{settingName}' has the non-string key {key!r}.")
+            checkSerializable(item, f"{settingName}.{key}")
+        return
+    raise runSpecError(f"Setting '{settingName}' holds {type(value).__name__}, which cannot be saved as JSON.")
+
+def validateRunSpec(runSpec):
+    """
+        Checks a run spec, returning a copy with every setting the simulation reads present and of its type
+        Raises runSpecError for missing settings, values of the wrong type, and specs newer than this version reads
+    """
+    if not isinstance(runSpec, dict):
+        raise runSpecError("A run spec must be a dict of settings.")
+    specVersion = runSpec.get("runSpecVersion", RUN_SPEC_VERSION)
+    if not isinstance(specVersion, int) or specVersion > RUN_SPEC_VERSION:
+        raise runSpecError(f"Run spec version {specVersion!r} is not supported; version {RUN_SPEC_VERSION} or older is expected.")
+    checkSerializable(runSpec, "runSpec")
+    runSpec = deepcopy(runSpec)
+    runSpec["runSpecVersion"] = RUN_SPEC_VERSION
+
+    validateFields(runSpec, runSpecFields)
+    if runSpec["algorithmSelection"] not in algorithmTypes:
+        raise runSpecError(f"Unknown algorithm '{runSpec['algorithmSelection']}'; expected one of {list(algorithmTypes)}.")
+    runSpec["algorithmType"] = algorithmTypes[runSpec["algorithmSelection"]]
+    if runSpec["tasksAreScheduled"] and not runSpec["taskScheduleFile"]:
+        raise runSpecError("Setting 'taskScheduleFile' is required when tasks are scheduled.")
+    # The master seed is a number or a word, as the editor's seed entry allows, or None for an unrepeatable run
+    runSpec.setdefault("randomSeed", None)
+    if isinstance(runSpec["randomSeed"], bool) or not isinstance(runSpec["randomSeed"], (int, str, type(None))):
+        raise runSpecError(f"Setting 'randomSeed' must be an integer, a string or None, not {runSpec['randomSeed']!r}.")
+    if runSpec["randomRunIndex"] < 0:
+        raise runSpecError(f"Setting 'randomRunIndex' must not be negative, not {runSpec['randomRunIndex']}.")
+    for settingName in ["stateSaveIncrement", "stateSaveLimit"]:
+        if runSpec[settingName] < 0:
+            raise runSpecError(f"Setting '{settingName}' must not be negative, not {runSpec[settingName]}.")
+
+    for configName, configFields in pathfinderConfigFields.items():
+        pathfinderConfig = runSpec.setdefault(configName, {})
+        validateFields(pathfinderConfig, configFields, configName + ".")
+    validateFields(runSpec.setdefault("simulationEndConditions", {}), simulationEndFields, "simulationEndConditions.")
+
+    validateNodeDict(runSpec, "taskNodeWeightDict", Number)
+    validateNodeDict(runSpec, "taskNodeAvailableDict", bool)
+    return runSpec
+
+def saveRunSpec(runSpec, fid):
+    with open(fid, 'w') as out:
+        json.dump(validateRunSpec(runSpec), out, indent=4)
+    logging.info(f"Run spec saved to '{fid}'.")
+
+def loadRunSpec(fid):
+    with open(fid, 'r') as inp:
+        runSpec = json.load(inp)
+    logging.info(f"Run spec loaded from '{fid}'.")
+    return validateRunSpec(runSpec)
@@ -80,6 +80,30 @@ class simScoreView(tk.Frame):
         self.pathfindFailCountText = tk.Label(self.flatStatsFrame, font=(tkfont.nametofont("TkDefaultFont"), 8, "bold"), textvariable=self.pathfindFailCountValue)
         self.pathfindFailCountText.grid(row=1, column=3, sticky=tk.W)
 
+        # Plans searched for
+        self.planCountLabel = tk.Label(self.flatStatsFrame, text="Plans Searched:", font=(tkfont.nametofont("TkDefaultFont"), 8, "bold"))
+        self.planCountLabel.grid(row=2, column=0, sticky=tk.E)
+        # Dynamic text needs a stringvar
+        self.planCountValue = tk.StringVar(value="0")
+        self.planCountText = tk.Label(self.flatStatsFrame, font=(tkfont.nametofont("TkDefaultFont"), 8, "bold"), textvariable=self.planCountValue)
+        self.planCountText.grid(row=2, column=1, sticky=tk.W)
+
+        # Mean nodes expanded per plan
+        self.meanExpandedLabel = tk.Label(self.flatStatsFrame, text="Expanded/Plan:", font=(tkfont.nametofont("TkDefaultFont"), 8, "bold"))
+        self.meanExpandedLabel.grid(row=2, column=2, sticky=tk.E)
+        # Dynamic text needs a stringvar
+        self.meanExpandedValue = tk.StringVar(value="-")
+        self.meanExpandedText = tk.Label(self.flatStatsFrame, font=(tkfont.nametofont("TkDefaultFont"), 8, "bold"), textvariable=self.meanExpandedValue)
+        self.meanExpandedText.grid(row=2, column=3, sticky=tk.W)
+
+        # Mean wall time per plan, in milliseconds
+        self.meanPlanTimeLabel = tk.Label(self.flatStatsFrame, text="Plan Time (ms):", font=(tkfont.nametofont("TkDefaultFont"), 8, "bold"))
+        self.meanPlanTimeLabel.grid(row=3, column=0, sticky=tk.E)
+        # Dynamic text needs a stringvar
+        self.meanPlanTimeValue = tk.StringVar(value="-")
+        self.meanPlanTimeText = tk.Label(self.flatStatsFrame, font=(tkfont.nametofont("TkDefaultFont"), 8, "bold"), textvariable=self.meanPlanTimeValue)
+        self.meanPlanTimeText.grid(row=3, column=1, sticky=tk.W)
+
         ### Table items
         
         # Headers
@@ -0,0 +1,34 @@
+import argparse
+import logging
+import os
+import sys
+from simmodules.simulationRunSpec import algorithmTypes
+from simmodules.simulationSweep import runSweep
+
+def smokeRunSessions(sessionDirectory="save_files", maxSteps=20, runTimeout=60, workerCount=None):
+    """
+        Runs every saved session in the directory headless for a few steps with each algorithm
+        Returns the sweep's results table, in which sessions the simulation cannot load or run stand out by their status
+    """
+    sessionFiles = [os.path.join(sessionDirectory, sessionName) for sessionName in sorted(os.listdir(sessionDirectory))]
+    return runSweep({
+        "sessions": sessionFiles,
+        "algorithms": list(algorithmTypes),
+        "maxSteps": maxSteps,
+        "timeout": runTimeout,
+        "workers": workerCount
+    })
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run every saved session headless for a few steps, reporting any that fail.")
+    parser.add_argument("sessionDirectory", nargs="?", default="save_files", help="Directory of saved session files")
+    parser.add_argument("--maxSteps", type=int, default=20, help="Steps to run each session for")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds each run may take")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    sweepRows = smokeRunSessions(args.sessionDirectory, args.maxSteps, args.timeout)
+    failedRows = [row for row in sweepRows if row["status"] != "completed"]
+    for row in sweepRows:
+        print(f"{row['session']:40} {row['algorithm']:36} {row['status']:10} {row.get('error', '')}")
+    print(f"{len(sweepRows) - len(failedRows)} of {len(sweepRows)} runs completed.")
+    sys.exit(1 if failedRows else 0)
@@ -28,6 +28,7 @@ class simStepView(tk.Frame):
 
         self.createStatusLabel()
         self.createStepCountLabel()
+        self.createStepRateLabel()
 
     def createStatusLabel(self):
         # Header text is static
@@ -51,3 +52,14 @@ class simStepView(tk.Frame):
         self.simStepCountTextValue = tk.IntVar(value=0)
         self.simStepCountText = tk.Label(self, font=(tkfont.nametofont("TkDefaultFont"), 12, "bold"), textvariable=self.simStepCountTextValue)
         self.simStepCountText.grid(row=1, column=1, sticky=tk.E)
+
+    def createStepRateLabel(self):
+        # Header text is static
+        self.stepRateHeaderText = tk.Label(self, font=(tkfont.nametofont("TkDefaultFont"), 8, "bold"),
+            text="Steps/s")
+        self.stepRateHeaderText.grid(row=0, column=2, sticky=tk.E)
+
+        # Descriptive text is dynamic, needs a stringvar
+        self.simStepRateTextValue = tk.StringVar(value="-")
+        self.simStepRateText = tk.Label(self, font=(tkfont.nametofont("TkDefaultFont"), 12, "bold"), textvariable=self.simStepRateTextValue)
+        self.simStepRateText.grid(row=1, column=2, sticky=tk.E)
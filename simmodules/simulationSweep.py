@@ -0,0 +1,180 @@
+import argparse
+import csv
+import itertools
+import json
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import time
+import traceback
+from simmodules.simulationHeadless import buildHeadlessSimulationSettings, runHeadlessSimulation
+from simmodules.simulationRunSpec import algorithmTypes, runSpecError
+
+# Only these algorithms plan within a window, so the sweep's window sizes are not varied for the others
+windowedAlgorithms = ["Windowed HCA* (WHCA*)"]
+
+# Scores taken from each run's packaged results into the results table
+sweepMetricColumns = ["stepCompleted", "tasksCompleted", "conflicts", "pathfindFailures", "meanServiceTime", "meanRunTime", "meanLifeTime"]
+sweepResultColumns = ["session", "schedule", "algorithm", "heuristic", "windowSize", "seed", "runIndex", "status", "runTime"] + sweepMetricColumns + ["error"]
+
+def expandSweepSpec(sweepSpec):
+    """
+        Lists the run configurations of a sweep spec, one for each combination of its options
+        The spec holds lists under "sessions", "schedules", "algorithms", "heuristics", "windowSizes" and "seeds";
+        only "sessions" and "algorithms" are required, a schedule of None generates tasks instead,
+        and a seed of None uses the session's own; "replications" runs each seed that many times, on separate streams
+    """
+    optionLists = [
+        sweepSpec["sessions"],
+        sweepSpec.get("schedules", [None]),
+        sweepSpec["algorithms"],
+        sweepSpec.get("heuristics", ["Dijkstra"]),
+        sweepSpec.get("windowSizes", [5]),
+        sweepSpec.get("seeds", [None]),
+        range(sweepSpec.get("replications", 1))
+    ]
+    # Caught here rather than failing every run they are part of
+    for session in sweepSpec["sessions"]:
+        if not os.path.isfile(session):
+            raise FileNotFoundError(f"No session file '{session}'; sessions are saved without an extension.")
+    for algorithm in sweepSpec["algorithms"]:
+        if algorithm not in algorithmTypes:
+            raise runSpecError(f"Unknown algorithm '{algorithm}'; expected one of {list(algorithmTypes)}.")
+    runConfigs = []
+    seenConfigs = set()
+    for session, schedule, algorithm, heuristic, windowSize, seed, runIndex in itertools.product(*optionLists):
+        if algorithm not in windowedAlgorithms:
+            # Every window size would run the same simulation
+            windowSize = None
+        configKey = (session, schedule, algorithm, heuristic, windowSize, seed, runIndex)
+        if configKey in seenConfigs:
+            continue
+        seenConfigs.add(configKey)
+        runConfigs.append({"session": session, "schedule": schedule, "algorithm": algorithm,
+            "heuristic": heuristic, "windowSize": windowSize, "seed": seed, "runIndex": runIndex})
+    return runConfigs
+
+def runSweepConfig(runConfig, maxSteps, settingOverrides, resultConnection):
+    # Body of each worker process, which sends back the packaged results or the error that stopped the run
+    # Only problems are logged from the workers, so that the sweep's progress is not buried
+    logging.getLogger().setLevel(logging.WARNING)
+    try:
+        settingsKwargs = dict(settingOverrides)
+        if runConfig["seed"] is not None:
+            settingsKwargs["randomSeed"] = runConfig["seed"]
+        settingsKwargs["randomRunIndex"] = runConfig["runIndex"]
+        settingsKwargs["heuristic"] = runConfig["heuristic"]
+        if runConfig["windowSize"] is not None:
+            settingsKwargs["windowSize"] = runConfig["windowSize"]
+        endConditions = {}
+        if runConfig["schedule"] is not None:
+            settingsKwargs["tasksAreScheduled"] = True
+            settingsKwargs["taskScheduleFile"] = runConfig["schedule"]
+            # Scheduled runs end with their schedule unless told otherwise
+            endConditions["simulationEndOnSchedule"] = True
+        endConditions.update(settingsKwargs.get("simulationEndConditions", {}))
+        settingsKwargs["simulationEndConditions"] = endConditions
+        simulationSettings = buildHeadlessSimulationSettings(runConfig["session"], runConfig["algorithm"], **settingsKwargs)
+        simulationResults = runHeadlessSimulation(runConfig["session"], simulationSettings, maxSteps)
+        resultConnection.send(("completed", simulationResults))
+    except Exception:
+        resultConnection.send(("error", traceback.format_exc()))
+    finally:
+        resultConnection.close()
+
+def packageSweepRow(runConfig, status, payload, runTime):
+    sweepRow = dict(runConfig)
+    sweepRow["status"] = status
+    sweepRow["runTime"] = runTime
+    if status == "completed":
+        for metricName in sweepMetricColumns:
+            sweepRow[metricName] = payload.get(metricName)
+    else:
+        # The last line of a traceback names the exception
+        sweepRow["error"] = payload.strip().splitlines()[-1]
+    return sweepRow
+
+def runSweep(sweepSpec, resultsFile=None):
+    """
+        Runs every configuration of the sweep spec headless, each in its own process, and returns the results table
+        "workers" sets how many run at once (default: every core), "timeout" the seconds a run may take before
+        it is stopped, and "maxSteps" and "settings" are passed on to every run
+        A run that raises, crashes or times out is recorded with that status, and the rest of the sweep carries on
+    """
+    runConfigs = expandSweepSpec(sweepSpec)
+    workerCount = sweepSpec.get("workers") or os.cpu_count()
+    runTimeout = sweepSpec.get("timeout")
+    maxSteps = sweepSpec.get("maxSteps")
+    settingOverrides = sweepSpec.get("settings", {})
+    logging.info(f"Sweep of {len(runConfigs)} runs starting on {workerCount} workers.")
+
+    sweepRows = [None] * len(runConfigs)
+    pendingRuns = list(range(len(runConfigs)))
+    pendingRuns.reverse()
+    # Runs in progress, by their index in runConfigs: (process, connection, startTime)
+    activeRuns = {}
+    while pendingRuns or activeRuns:
+        # Keep every worker busy
+        while pendingRuns and len(activeRuns) < workerCount:
+            runIndex = pendingRuns.pop()
+            receiveConnection, sendConnection = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=runSweepConfig,
+                args=(runConfigs[runIndex], maxSteps, settingOverrides, sendConnection), daemon=True)
+            process.start()
+            # Only the worker writes to its end of the pipe
+            sendConnection.close()
+            activeRuns[runIndex] = (process, receiveConnection, time.perf_counter())
+
+        # Sleep until a run reports or exits, waking regularly to check the timeouts
+        waitables = []
+        for process, receiveConnection, startTime in activeRuns.values():
+            waitables.extend([receiveConnection, process.sentinel])
+        multiprocessing.connection.wait(waitables, timeout=1)
+
+        for runIndex in list(activeRuns):
+            process, receiveConnection, startTime = activeRuns[runIndex]
+            runTime = time.perf_counter() - startTime
+            # Whatever a finished worker sent is already in the pipe, so liveness is checked before reading it
+            processAlive = process.is_alive()
+            if receiveConnection.poll():
+                try:
+                    status, payload = receiveConnection.recv()
+                except EOFError:
+                    status, payload = "crashed", f"Worker exited with code {process.exitcode}"
+            elif not processAlive:
+                status, payload = "crashed", f"Worker exited with code {process.exitcode}"
+            elif runTimeout is not None and runTime > runTimeout:
+                process.terminate()
+                status, payload = "timeout", f"Run exceeded its {runTimeout} second timeout"
+            else:
+                continue
+            process.join()
+            receiveConnection.close()
+            del activeRuns[runIndex]
+            if status != "completed":
+                logging.warning(f"Sweep run {runConfigs[runIndex]} ended with status '{status}':\n{payload}")
+            sweepRows[runIndex] = packageSweepRow(runConfigs[runIndex], status, payload, runTime)
+            logging.info(f"Sweep run {runIndex+1}/{len(runConfigs)} {status} in {runTime:.2f} seconds.")
+
+    if resultsFile is not None:
+        writeSweepResults(sweepRows, resultsFile)
+    return sweepRows
+
+def writeSweepResults(sweepRows, fid):
+    # One row per run, with blank cells for the scores of runs which did not complete
+    with open(fid, 'w', newline="") as out:
+        writer = csv.DictWriter(out, fieldnames=sweepResultColumns, restval="")
+        writer.writeheader()
+        writer.writerows(sweepRows)
+    logging.info(f"Sweep results written to '{fid}'.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a parameter sweep of headless simulations.")
+    parser.add_argument("sweepSpec", help="JSON file holding the sweep spec")
+    parser.add_argument("resultsFile", help="CSV file the results table is written to")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    with open(args.sweepSpec, 'r') as inp:
+        sweepSpec = json.load(inp)
+    runSweep(sweepSpec, args.resultsFile)
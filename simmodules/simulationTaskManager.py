@@ -3,6 +3,8 @@ pp = pprint.PrettyPrinter(indent=4)
 import logging
 import networkx as nx
 import sys
+from collections import Counter
+from simmodules.simulationMetrics import simTaskMetrics
 
 class simTaskManager:
     def __init__(self, parent):
@@ -10,6 +12,12 @@ class simTaskManager:
 
         # Data structures
         self.taskList = {}
+        # Secondary index of the task list by status, so lookups only visit tasks in the wanted states
+        self.taskStatusIndex = self.createTaskStatusIndex()
+        # Number of tasks using each node as a pickup or dropoff point
+        self.taskEndpointCount = Counter()
+        # Running statistics of completed tasks, updated as each completes
+        self.completedTaskMetrics = simTaskMetrics()
 
         logging.debug("Class 'simTaskManager' initialized.")
 
@@ -39,6 +47,9 @@ class simTaskManager:
             taskName = str(self.dictLength)
         self.latestTask = simTaskClass(self, **kwargs, taskName=taskName, numID=self.dictLength)
         self.taskList[self.dictLength] = self.latestTask
+        self.taskStatusIndex.setdefault(self.latestTask.taskStatus, {})[self.dictLength] = self.latestTask
+        self.taskEndpointCount[self.latestTask.pickupNode] += 1
+        self.taskEndpointCount[self.latestTask.dropoffNode] += 1
         logging.info("Task added to 'simTaskManager' task list.")
         self.parent.parent.simulationWindow.simDataView.updateTaskTreeView()
 
@@ -52,11 +63,14 @@ class simTaskManager:
 
         # Delete every task
         self.taskList = {}
+        self.taskStatusIndex = self.createTaskStatusIndex()
+        self.taskEndpointCount = Counter()
+        self.completedTaskMetrics = simTaskMetrics()
         taskTreeView = self.parent.parent.simulationWindow.simDataView.taskTreeView
         for row in taskTreeView.get_children():
             taskTreeView.delete(row)
 
-        print(self.taskList)
+        logging.debug(self.taskList)
 
         # Update the treeView
         self.parent.parent.simulationWindow.simDataView.updateAgentTreeView()
@@ -71,7 +85,7 @@ class simTaskManager:
         agentRef.taskStatus = "retrieving"
         agentRef.targetNode = None
         task.assignee = agentRef
-        task.taskStatus = "retrieving"
+        self.setTaskStatus(task, "retrieving")
         if timeStamp is not None:
             task.serviceAssignTime = timeStamp
 
@@ -88,12 +102,65 @@ class simTaskManager:
         agentRef.taskStatus = "unassigned"
         agentRef.targetNode = None
         task.assignee = None
-        task.taskStatus = "unassigned"
+        self.setTaskStatus(task, "unassigned")
 
         # Update the treeView
         self.parent.parent.simulationWindow.simDataView.updateAgentTreeView()
         self.parent.parent.simulationWindow.simDataView.updateTaskTreeView()
 
+    def createTaskStatusIndex(self):
+        return {"unassigned": {}, "retrieving": {}, "pickedUp": {}, "completed": {}}
+
+    def rebuildTaskStatusIndex(self):
+        # Needed when task statuses have been overwritten directly, such as when loading a saved state
+        self.taskStatusIndex = self.createTaskStatusIndex()
+        self.taskEndpointCount = Counter()
+        for taskID, task in self.taskList.items():
+            self.taskStatusIndex.setdefault(task.taskStatus, {})[taskID] = task
+            self.taskEndpointCount[task.pickupNode] += 1
+            self.taskEndpointCount[task.dropoffNode] += 1
+        # The completion statistics have to follow the rewound statuses
+        self.completedTaskMetrics = simTaskMetrics()
+        for task in self.getTasksWithStatus("completed"):
+            self.completedTaskMetrics.recordCompletedTask(task)
+
+    def setTaskStatus(self, task, taskStatus):
+        # Change the status of a task, moving it between the status indexes
+        self.taskStatusIndex.get(task.taskStatus, {}).pop(task.numID, None)
+        task.taskStatus = taskStatus
+        self.taskStatusIndex.setdefault(taskStatus, {})[task.numID] = task
+
+    def completeTask(self, task, timeStamp):
+        # Mark the task as delivered, and add its times to the running statistics
+        task.serviceCompleteTime = timeStamp
+        task.assignee = None
+        self.setTaskStatus(task, "completed")
+        self.completedTaskMetrics.recordCompletedTask(task)
+
+    def getTaskIDsWithStatus(self, *taskStatuses):
+        # IDs of the tasks in any of the given states, in the order the tasks were created
+        taskIDs = []
+        for taskStatus in taskStatuses:
+            taskIDs.extend(self.taskStatusIndex.get(taskStatus, {}).keys())
+        return sorted(taskIDs)
+
+    def getTasksWithStatus(self, *taskStatuses):
+        # Task objects in any of the given states, in the order the tasks were created
+        return [self.taskList[taskID] for taskID in self.getTaskIDsWithStatus(*taskStatuses)]
+
+    def countTasksWithStatus(self, *taskStatuses):
+        return sum(len(self.taskStatusIndex.get(taskStatus, {})) for taskStatus in taskStatuses)
+
+    def isTaskEndpoint(self, node, ignoredAgent=None):
+        # Whether any task picks up or drops off at the node, other than tasks assigned to the ignored agent
+        endpointCount = self.taskEndpointCount[node]
+        if endpointCount > 0 and ignoredAgent is not None:
+            # Only tasks being serviced have an assignee
+            for task in self.getTasksWithStatus("retrieving", "pickedUp"):
+                if task.assignee is ignoredAgent:
+                    endpointCount = endpointCount - (task.pickupNode == node) - (task.dropoffNode == node)
+        return endpointCount > 0
+
     def fixAssignments(self):
         # Iterate through the list of all tasks, fixing assignee to refer to objects instead of IDs
         # Needed to overcome pickling of data when retrieving the state
@@ -152,6 +219,9 @@ class simTaskManager:
                 self.taskList[taskNumID].assignee = None
                 self.taskList[taskNumID].taskStatus = "unassigned"
         
+        # Statuses were overwritten wholesale
+        self.rebuildTaskStatusIndex()
+
         # Update the treeView
         self.parent.parent.simulationWindow.simDataView.updateTaskTreeView()
 
@@ -201,16 +271,17 @@ class simTaskClass:
         self.serviceStartTime = None
         self.serviceCompleteTime = None
         # Allow passing positions (tuples) or nodes (strings)
+        mapIndex = self.parent.parent.simGraphData.simMapIndex
         if kwargs.get("pickupPosition"):
             self.pickupPosition = kwargs.get("pickupPosition")      # Expects Tuple
             self.dropoffPosition = kwargs.get("dropoffPosition")    # Expects Tuple
-            self.pickupNode = f"({self.pickupPosition[0]}, {self.pickupPosition[1]})"
-            self.dropoffNode = f"({self.dropoffPosition[0]}, {self.dropoffPosition[1]})"
+            self.pickupNode = mapIndex.getPositionName(self.pickupPosition)
+            self.dropoffNode = mapIndex.getPositionName(self.dropoffPosition)
         elif kwargs.get("pickupNode"):
             self.pickupNode = kwargs.get("pickupNode")
             self.dropoffNode = kwargs.get("dropoffNode")
-            self.pickupPosition = eval(self.pickupNode)
-            self.dropoffPosition = eval(self.dropoffNode)
+            self.pickupPosition = mapIndex.getNodePosition(self.pickupNode)
+            self.dropoffPosition = mapIndex.getNodePosition(self.dropoffNode)
 
         # Helpful references
         self.mainViewRef = self.parent.parent.parent.simulationWindow.simMainView
@@ -0,0 +1,87 @@
+import csv
+import logging
+from collections import namedtuple
+from itertools import count
+from heapq import heapify, heappop, heappush
+
+# A row of a task schedule, parsed into its typed fields
+# The row number keeps tasks released together in the order they appear in the file
+scheduledTask = namedtuple("scheduledTask", ["releaseTime", "row", "pickupNode", "dropoffNode", "timeLimit", "name"])
+
+class simTaskSchedule:
+    """
+        Task schedule loaded from a .csv, releasing tasks as the simulation reaches their release times
+        Rows are parsed once and kept in a min-heap by release time, so each release only touches the tasks being released
+        Streamed schedules are read from disk as they are needed instead, and are expected to be ordered by release time
+    """
+    columnNames = ["PickupNode", "DropoffNode", "TimeLimit", "ReleaseTime", "Name"]
+
+    def __init__(self, fid, streamFromDisk=False):
+        self.fid = fid
+        self.streamFromDisk = streamFromDisk
+        # Tasks which have been read but not yet released
+        self.pendingTasks = []
+        self.scheduleFile = None
+        self.scheduleReader = None
+        self.latestReleaseTime = None
+        self.rowCounter = count()
+
+        if self.streamFromDisk:
+            # Only the header is read up front
+            self.scheduleFile = open(self.fid, 'r', newline="")
+            self.scheduleReader = csv.reader(self.scheduleFile)
+            self.checkHeader(next(self.scheduleReader, None))
+            logging.info(f"Streaming task schedule from '{self.fid}'.")
+        else:
+            with open(self.fid, 'r', newline="") as inp:
+                reader = csv.reader(inp)
+                self.checkHeader(next(reader, None))
+                self.pendingTasks = [self.parseRow(row) for row in reader if row]
+            heapify(self.pendingTasks)
+            logging.info(f"Loaded {len(self.pendingTasks)} tasks from task schedule '{self.fid}'.")
+
+    def checkHeader(self, header):
+        if header != self.columnNames:
+            logging.warning(f"Task schedule '{self.fid}' header {header} does not match the template {self.columnNames}.")
+
+    def parseRow(self, row):
+        return scheduledTask(releaseTime=int(row[3]), row=next(self.rowCounter), pickupNode=row[0], dropoffNode=row[1],
+            timeLimit=int(row[2]), name=row[4])
+
+    def readUntil(self, currentTime):
+        # Pull rows from the file until one is found that releases after currentTime
+        if self.scheduleReader is None:
+            return
+        if self.latestReleaseTime is not None and self.latestReleaseTime > currentTime:
+            # The last row read is still waiting for its release
+            return
+        for row in self.scheduleReader:
+            if not row:
+                continue
+            task = self.parseRow(row)
+            if self.latestReleaseTime is not None and task.releaseTime < self.latestReleaseTime:
+                logging.warning(f"Streamed task schedule row {task.row} releases before the row preceding it, and may be released late.")
+            self.latestReleaseTime = task.releaseTime
+            heappush(self.pendingTasks, task)
+            if task.releaseTime > currentTime:
+                return
+        # The whole file has been read
+        self.closeFile()
+
+    def releaseTasks(self, currentTime):
+        # Returns the tasks due for release by currentTime, in the order they appear in the schedule
+        self.readUntil(currentTime)
+        releasedTasks = []
+        while self.pendingTasks and self.pendingTasks[0].releaseTime <= currentTime:
+            releasedTasks.append(heappop(self.pendingTasks))
+        releasedTasks.sort(key=lambda task: task.row)
+        return releasedTasks
+
+    def hasRemainingTasks(self):
+        return bool(self.pendingTasks) or self.scheduleReader is not None
+
+    def closeFile(self):
+        if self.scheduleFile is not None:
+            self.scheduleFile.close()
+        self.scheduleFile = None
+        self.scheduleReader = None